@@ -0,0 +1,279 @@
+"""Seed-and-extend alignment for nearly identical sequences.
+
+A global ``PairwiseAligner`` over the full reference and the full sequenced
+construct is quadratic in time and memory, and stalls on 20+ kb plasmids. In
+practice the two sequences are nearly identical, so almost all of the
+alignment is fixed by exact matches. Here we
+
+1. find exact k-mer anchors: k-mers sampled from the query at stride k that
+   occur exactly once in the reference;
+2. keep the longest chain of anchors that is colinear in both sequences;
+3. run the dynamic-programming aligner only on the short stretches between
+   anchors (and, within a bounded window, on the two ends).
+
+The result is a Biopython ``Alignment`` with the same coordinates layout the
+global aligner produces, or None when anchoring fails (too few anchors, or a
+gap too large to fill cheaply), in which case the caller falls back to the
+global aligner.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+
+import numpy as np
+
+# k-mers are packed two bits per base into int64, so k must be <= 31.
+default_kmer_size = 15
+
+# Largest gap (reference length x query length DP cells) we are willing to
+# fill with the DP aligner before giving up on anchoring.
+default_max_gap_cells = 4_000_000
+
+# Extra reference bases considered when aligning the unanchored ends.
+_end_window_pad = 64
+
+_base_codes = np.full(256, 4, dtype=np.uint8)
+for _i, _b in enumerate("ACGT"):
+    _base_codes[ord(_b)] = _i
+    _base_codes[ord(_b.lower())] = _i
+
+
+def encode_sequence(sequence: str) -> np.ndarray:
+    """Map A/C/G/T (any case) to 0-3 and everything else to 4, as uint8."""
+    return _base_codes[np.frombuffer(sequence.encode("ascii", "replace"), dtype=np.uint8)]
+
+
+def kmer_codes(codes: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """Pack every k-mer of an encoded sequence into an int64.
+
+    Returns ``(values, valid)`` for the ``len(codes) - k + 1`` k-mers; k-mers
+    containing a non-ACGT base are marked invalid.
+    """
+    n = len(codes) - k + 1
+    if n <= 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=bool)
+    values = np.zeros(n, dtype=np.int64)
+    for offset in range(k):
+        values = (values << 2) | (codes[offset : offset + n] & 3)
+    invalid = np.concatenate([[0], np.cumsum(codes == 4)])
+    valid = (invalid[k:] - invalid[:n]) == 0
+    return values, valid
+
+
+def unique_kmer_index(codes: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """Sorted k-mer values that occur exactly once, and their positions."""
+    values, valid = kmer_codes(codes, k)
+    positions = np.flatnonzero(valid)
+    values = values[valid]
+    order = np.argsort(values, kind="stable")
+    values, positions = values[order], positions[order]
+    if len(values) == 0:
+        return values, positions
+    first = np.concatenate([[True], values[1:] != values[:-1]])
+    last = np.concatenate([values[1:] != values[:-1], [True]])
+    unique = first & last
+    return values[unique], positions[unique]
+
+
+def lookup_kmers(
+    index_values: np.ndarray, index_positions: np.ndarray, values: np.ndarray
+) -> np.ndarray:
+    """Position of each k-mer in a ``unique_kmer_index``, or -1 if absent."""
+    if len(index_values) == 0:
+        return np.full(len(values), -1, dtype=np.int64)
+    slot = np.searchsorted(index_values, values)
+    slot = np.minimum(slot, len(index_values) - 1)
+    return np.where(index_values[slot] == values, index_positions[slot], -1)
+
+
+def _longest_colinear_chain(query_pos: np.ndarray, ref_pos: np.ndarray) -> list[int]:
+    """Indices of the longest chain with strictly increasing reference positions.
+
+    ``query_pos`` is already increasing, so this is a longest increasing
+    subsequence over ``ref_pos`` (patience sorting, O(n log n)).
+    """
+    tails: list[int] = []
+    tail_index: list[int] = []
+    previous = [-1] * len(ref_pos)
+    for i, r in enumerate(ref_pos.tolist()):
+        slot = bisect_left(tails, r)
+        if slot > 0:
+            previous[i] = tail_index[slot - 1]
+        if slot == len(tails):
+            tails.append(r)
+            tail_index.append(i)
+        else:
+            tails[slot] = r
+            tail_index[slot] = i
+    chain = []
+    i = tail_index[-1] if tail_index else -1
+    while i >= 0:
+        chain.append(i)
+        i = previous[i]
+    return chain[::-1]
+
+
+def find_anchor_blocks(
+    reference: str, query: str, k: int = default_kmer_size
+) -> list[tuple[int, int, int]]:
+    """Exact-match blocks ``(ref_start, query_start, length)`` in colinear order.
+
+    Query k-mers are sampled at stride ``k``; each one that occurs exactly once
+    in the reference is an anchor. Anchors on the longest colinear chain are
+    merged into blocks where they are adjacent on the same diagonal.
+    """
+    ref_values, ref_positions = unique_kmer_index(encode_sequence(reference), k)
+    query_values, query_valid = kmer_codes(encode_sequence(query), k)
+    sampled = np.arange(0, len(query_values), k)
+    sampled = sampled[query_valid[sampled]]
+    hit_ref = lookup_kmers(ref_values, ref_positions, query_values[sampled])
+    hit = hit_ref >= 0
+    query_pos, ref_pos = sampled[hit], hit_ref[hit]
+    if len(query_pos) == 0:
+        return []
+
+    blocks: list[list[int]] = []
+    for i in _longest_colinear_chain(query_pos, ref_pos):
+        q, r = int(query_pos[i]), int(ref_pos[i])
+        if blocks:
+            r0, q0, length = blocks[-1]
+            if q == q0 + length and r == r0 + length:
+                blocks[-1][2] += k
+                continue
+            if q < q0 + length or r < r0 + length:
+                # Overlaps the previous block on a different diagonal; drop it
+                continue
+        blocks.append([r, q, k])
+    return [tuple(b) for b in blocks]
+
+
+def _append_segment(points: list[tuple[int, int]], coordinates: np.ndarray) -> None:
+    """Append a sub-alignment's coordinates, skipping its (shared) first point."""
+    points.extend(zip(coordinates[0, 1:].tolist(), coordinates[1, 1:].tolist()))
+
+
+def _align_gap(
+    aligner,
+    reference: str,
+    query: str,
+    r0: int,
+    r1: int,
+    q0: int,
+    q1: int,
+    max_gap_cells: int,
+) -> np.ndarray | None:
+    """Coordinates (absolute) aligning reference[r0:r1] with query[q0:q1]."""
+    if r1 == r0 or q1 == q0:
+        return np.array([[r0, r1], [q0, q1]])
+    if (r1 - r0) * (q1 - q0) > max_gap_cells:
+        return None
+    try:
+        sub = aligner.align(reference[r0:r1], query[q0:q1])[0]
+    except (IndexError, OverflowError):
+        return None
+    coordinates = np.array(sub.coordinates)
+    coordinates[0] += r0
+    coordinates[1] += q0
+    return coordinates
+
+
+def _compress(points: list[tuple[int, int]]) -> np.ndarray:
+    """Drop empty steps and merge consecutive steps of the same kind."""
+    coords = np.array(points, dtype=np.int64).T
+    steps = np.diff(coords, axis=1)
+    keep = (steps != 0).any(axis=0)
+    coords = coords[:, np.concatenate([[True], keep])]
+    steps = np.diff(coords, axis=1)
+    # Step kind: 3 = both advance, 1 = reference only, 2 = query only
+    kind = (steps[0] > 0).astype(int) + 2 * (steps[1] > 0)
+    boundary = np.concatenate([[True], kind[1:] != kind[:-1], [True]])
+    return coords[:, boundary]
+
+
+def alignment_score(coordinates: np.ndarray, reference: str, query: str, aligner) -> float:
+    """Score an alignment given by ``coordinates`` under ``aligner``'s scheme.
+
+    Only the linear match/mismatch/affine-gap parameters are used, which is
+    how ``process_reference`` configures its aligner.
+    """
+    ref_codes = np.frombuffer(reference.encode("ascii", "replace"), dtype=np.uint8)
+    query_codes = np.frombuffer(query.encode("ascii", "replace"), dtype=np.uint8)
+    score = 0.0
+    for (r0, r1), (q0, q1) in zip(
+        zip(coordinates[0, :-1], coordinates[0, 1:]),
+        zip(coordinates[1, :-1], coordinates[1, 1:]),
+    ):
+        if r1 > r0 and q1 > q0:
+            matches = int((ref_codes[r0:r1] == query_codes[q0:q1]).sum())
+            score += matches * aligner.match_score
+            score += (r1 - r0 - matches) * aligner.mismatch_score
+        else:
+            length = (r1 - r0) + (q1 - q0)
+            score += aligner.open_gap_score + (length - 1) * aligner.extend_gap_score
+    return score
+
+
+def anchored_alignment(
+    reference: str,
+    query: str,
+    aligner,
+    k: int = default_kmer_size,
+    max_gap_cells: int = default_max_gap_cells,
+):
+    """Align ``query`` to ``reference`` using exact k-mer anchors.
+
+    Args:
+        reference: Target sequence (row 0 of the alignment).
+        query: Query sequence (row 1 of the alignment).
+        aligner: A global-mode ``Bio.Align.PairwiseAligner`` used for the
+            regions between anchors, so scoring matches the full aligner.
+        k: Anchor k-mer length (<= 31).
+        max_gap_cells: Give up if any gap needs more DP cells than this.
+
+    Returns:
+        A ``Bio.Align.Alignment``, or None if anchoring fails.
+    """
+    from Bio import Align
+
+    blocks = find_anchor_blocks(reference, query, k)
+    if not blocks:
+        return None
+
+    points: list[tuple[int, int]] = [(0, 0)]
+
+    # Leading end: align the query prefix against a bounded window of the
+    # reference just before the first anchor; the rest is a reference gap.
+    r_first, q_first, _ = blocks[0]
+    window_start = max(0, r_first - q_first - _end_window_pad) if q_first else r_first
+    points.append((window_start, 0))
+    segment = _align_gap(aligner, reference, query, window_start, r_first, 0, q_first, max_gap_cells)
+    if segment is None:
+        return None
+    _append_segment(points, segment)
+
+    for i, (r, q, length) in enumerate(blocks):
+        points.append((r + length, q + length))
+        if i + 1 < len(blocks):
+            r_next, q_next, _ = blocks[i + 1]
+            segment = _align_gap(
+                aligner, reference, query, r + length, r_next, q + length, q_next, max_gap_cells
+            )
+            if segment is None:
+                return None
+            _append_segment(points, segment)
+
+    # Trailing end, mirroring the leading end.
+    r_end, q_end = points[-1]
+    q_left = len(query) - q_end
+    window_end = min(len(reference), r_end + q_left + _end_window_pad) if q_left else r_end
+    segment = _align_gap(aligner, reference, query, r_end, window_end, q_end, len(query), max_gap_cells)
+    if segment is None:
+        return None
+    _append_segment(points, segment)
+    points.append((len(reference), len(query)))
+
+    coordinates = _compress(points)
+    alignment = Align.Alignment([reference, query], coordinates)
+    alignment.score = alignment_score(coordinates, reference, query, aligner)
+    return alignment
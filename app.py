@@ -1,30 +1,55 @@
+import asyncio
+import io
+import os
 import time
+import zipfile
 
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 
-from shiny import reactive
+from shiny import reactive, req
 from shiny.express import input, render, ui
+from shiny.session import get_current_session
 from shiny.types import FileInfo
 
 from shinywidgets import render_plotly
 
 from faicons import icon_svg
 
+from image_export import ExportQueueFull, image_renderer
+
 from evaluate_data import test_per_base_file
 
-from per_base_io import read_per_base_table
+from exports import (
+    aiter_in_thread,
+    gzip_chunks,
+    iter_arrow_chunks,
+    iter_csv_chunks,
+    iter_parquet_chunks,
+)
+
+from multi_sample import SampleStack, sample_metrics, sample_summary, stack_samples
+
+from per_base_io import preflight_per_base_table, read_per_base_table
+
+from pipeline import ProcessingRequest, RunControl, check_per_base_table
+
+from plot_delta import sync_overlays, sync_traces
+
+from plot_lod import PositionLOD, relayout_x_range
 
 from plotly_plots import (
     base_position_vs_value_plot_plotly,
-    distribution_violin_plot_plotly,
+    binned_violin_plot_plotly,
+    multi_sample_position_plot,
+    position_plot_overlays,
 )
 
 from process_data import (
     process_full_mean_values,
-    process_per_base_file,
     update_per_base_df,
-    update_mean_values_per_base,
+    with_aligned_ref,
 )
 from shared import (
     column_colors_dict,
@@ -37,14 +62,24 @@ from shared import (
     tabular_cols,
 )
 
-from process_reference import (
-    align_ref_to_variants,
-    process_reference_fasta,
-    process_reference_genbank,
-)
+from range_stats import RangeStatsIndex
+
+from result_cache import file_digest, frame_cache, processed_cache_key, sequence_digest
+
+from telemetry import pipeline_metrics
+
+from session_memory import session_registry, upload_rejection
+
+from process_reference import process_reference_file
+
+from qc_jobs import load_job_frames
+
+from origin_detection import Orientation, data_sequence, detect_origin
 
 from validation import validate_per_base_file
 
+from violin_summary import ViolinSummaries
+
 
 
 
@@ -147,18 +182,59 @@ def checkbox_with_tooltip(key, names, tooltips):
     )
 
 
+# Per-session memory accounting (see session_memory.py). This file also runs
+# once under a stub session to build the UI; only real sessions are registered.
+session = get_current_session()
+session_id = None if session is None or session.is_stub_session() else session.id
+if session_id is not None:
+    session_registry.open(session_id)
+    # Assigned, as Express would otherwise render the returned callback.
+    _unregister_session = session.on_ended(lambda: session_registry.close(session_id))
+
+# True while this session's intermediates are released after an idle period.
+session_released = reactive.value(False)
+
+# Record of the finished QC job loaded into this session (see qc_jobs.py), if any.
+loaded_job = reactive.value(None)
+# The loaded job's (auto_orient, reverse_complement, origin_shift), applied
+# until the inputs, updated to match, catch up (see orientation_settings).
+job_settings = reactive.value(None)
+# The loaded job's first selection range, for the slider once its bounds update.
+job_selection = reactive.value(None)
+
+
+def held(name: str, obj):
+    """Record ``obj`` as this session's ``name`` result and return it."""
+    if session_id is None:
+        return obj
+    return session_registry.hold(session_id, name, obj)
+
+
+def admit_upload(paths: list[str]) -> bool:
+    """False (after notifying) if the process is too close to its memory limit."""
+    rejection = upload_rejection(sum(os.path.getsize(path) for path in paths))
+    if rejection is not None:
+        ui.notification_show(rejection, type="warning", duration=None)
+    return rejection is None
+
+
 # These calcs must be defined before the UI block because they are referenced
 # as arguments to @reactive.event decorators, which are evaluated at definition time.
 @reactive.calc
 def per_base_input() -> list[FileInfo] | None:
     """Resolve the active per-base file source.
 
-    An explicit upload always wins; otherwise, once the user has clicked
+    A loaded QC job's input comes first (a later upload or example replaces
+    the job). Otherwise an explicit upload wins; once the user has clicked
     "Load example data", fall back to the bundled example TSV. Returning a
     FileInfo-shaped list keeps the rest of the pipeline agnostic about whether
     data came from an upload or the example. This is a per-session calc (no
     module-level state), preserving session isolation.
     """
+    job = loaded_job()
+    if job is not None:
+        path = job["per_base_path"]
+        return [{"name": path.name, "datapath": str(path)}]
     uploaded = input.per_base_file()
     if uploaded is not None:
         return uploaded
@@ -169,7 +245,12 @@ def per_base_input() -> list[FileInfo] | None:
 
 @reactive.calc
 def reference_input() -> list[FileInfo] | None:
-    """Resolve the active reference file source (upload wins, else the example)."""
+    """Resolve the active reference file source (a loaded job's, else the
+    upload, else the example)."""
+    job = loaded_job()
+    if job is not None:
+        path = job["reference_path"]
+        return None if path is None else [{"name": path.name, "datapath": str(path)}]
     uploaded = input.reference_file()
     if uploaded is not None:
         return uploaded
@@ -189,32 +270,104 @@ def parsed_reference() -> dict[str, dict | None] | None:
     file = reference_input()
     if file is None:
         return None
-    if file[0]["name"].endswith((".fa", ".fasta")):
-        result = process_reference_fasta(file)
-    elif file[0]["name"].endswith((".gb", ".genbank", ".gbk")):
-        result = process_reference_genbank(file)
-    else:
+    return process_reference_file(file)
+
+
+@reactive.extended_task
+async def parse_task(datapath: str, name: str) -> tuple[str, str, pd.DataFrame]:
+    """Check, hash, read and validate a per-base table on a worker thread.
+
+    The event loop is shared by every session in the process, so hashing or
+    parsing a large upload on it would freeze all other users meanwhile. The
+    header is checked before anything else, so a wrong file fails in
+    milliseconds; the integrity checks run right after the parse, and only
+    tables that pass them are cached.
+
+    Returns:
+        (datapath, content digest, parsed frame).
+
+    Raises:
+        ValueError: If the file is not a valid per-base table.
+    """
+
+    def parse() -> tuple[str, pd.DataFrame]:
+        preflight_per_base_table(datapath, name)
+        digest = file_digest(datapath)
+        cache_key = ("parsed", digest)
+        df = frame_cache.get(cache_key)
+        pipeline_metrics.cache("parsed", hit=df is not None)
+        if df is None:
+            start = time.perf_counter()
+            df = read_per_base_table(datapath)
+            pipeline_metrics.observe("read_per_base_table", time.perf_counter() - start, len(df))
+            check_per_base_table(df, name)
+            frame_cache.put(cache_key, df)
+        return digest, df
+
+    digest, df = await asyncio.to_thread(parse)
+    return datapath, digest, df
+
+
+@reactive.effect
+def start_parse():
+    """Parse each new per-base file in the background, dropping stale work."""
+    file: list[FileInfo] | None = per_base_input()
+    cancel_processing()
+    parse_task.cancel()
+    if file is None or session_released():
+        return
+    if admit_upload([file[0]["datapath"]]):
+        parse_task.invoke(file[0]["datapath"], file[0]["name"])
+
+
+@reactive.calc
+def parse_result() -> tuple[str, pd.DataFrame] | None:
+    """(digest, frame) of the active per-base file once parsed, else None.
+
+    While the background parse runs, dependents show as in progress.
+    """
+    file: list[FileInfo] | None = per_base_input()
+    if file is None or parse_task.status() == "error":
         return None
-    return result
+    datapath, digest, df = parse_task.result()
+    if datapath != file[0]["datapath"]:
+        # Result of a superseded upload; the current one is still queued.
+        req(False, cancel_output="progress")
+    return digest, df
+
+
+@reactive.calc
+def per_base_digest() -> str | None:
+    """Content hash of the active per-base file, used as the shared cache key."""
+    result = parse_result()
+    return None if result is None else result[0]
 
 
 @reactive.calc
 def parsed_per_base_file():
-    """Parse input per-base sequencing file."""
-    file: list[FileInfo] | None = per_base_input()
-    if file is None:
+    """Parse input per-base sequencing file.
+
+    While the background parse runs, dependents show as in progress.
+    """
+    if per_base_input() is None:
         return pd.DataFrame()
-    try:
-        df = read_per_base_table(file[0]["datapath"])
-    except Exception:
-        ui.notification_show("Could not parse the uploaded file. Check the format.")
+    result = parse_result()
+    if result is None:
+        with reactive.isolate():
+            error = parse_task.error.get()
+        ui.notification_show(
+            str(error)
+            if isinstance(error, ValueError)
+            else "Could not parse the uploaded file. Check the format."
+        )
         return pd.DataFrame()
+    df = result[1]
     if df.empty:
         ui.notification_show("Could not parse the uploaded file. Check the format.")
         return pd.DataFrame()
     if not validate_per_base_file(df):
         return pd.DataFrame()
-    return df
+    return held("parsed", df)
 
 
 @reactive.calc
@@ -226,20 +379,168 @@ def sequence_length():
     return int(parsed["pos"].max())
 
 
+@reactive.extended_task
+async def orientation_task(
+    key: tuple, parsed: pd.DataFrame, reference_sequence: str
+) -> tuple[tuple, Orientation | None]:
+    """Run origin/strand detection on a worker thread.
+
+    Detection takes seconds on multi-megabase plasmids, and the event loop is
+    shared by every session.
+    """
+    orientation = await asyncio.to_thread(
+        lambda: detect_origin(reference_sequence, data_sequence(parsed))
+    )
+    return key, orientation
+
+
 @reactive.calc
-def base_processed_data():
-    """Run expensive per-base processing. Independent of range inputs."""
+def orientation_settings() -> tuple[bool, bool, int]:
+    """(auto_orient, reverse_complement, origin_shift) to process with.
+
+    A loaded job's settings apply until the inputs have been updated to them,
+    so no run with the previous settings starts in between.
+    """
+    pending = job_settings()
+    if pending is not None:
+        return pending
+    return input.auto_orient(), input.reverse_complement(), input.origin_shift() or 0
+
+
+def orientation_inputs() -> tuple[tuple, pd.DataFrame, str] | None:
+    """(key, parsed, reference) for detection, or None when it does not apply."""
+    if not orientation_settings()[0]:
+        return None
+    parsed = parsed_per_base_file()
+    ref = parsed_reference()
+    if parsed.empty or not ref or not ref.get("sequence"):
+        return None
+    return (per_base_digest(), sequence_digest(ref["sequence"])), parsed, ref["sequence"]
+
+
+@reactive.effect
+def start_orientation():
+    """Detect the orientation of each new data/reference pair in the background."""
+    inputs = orientation_inputs()
+    orientation_task.cancel()
+    if inputs is not None:
+        orientation_task.invoke(*inputs)
+
+
+@reactive.calc
+def detected_orientation() -> Orientation | None:
+    """Origin shift and strand that map the data onto the reference.
+
+    None when detection is switched off, there is no reference, or the
+    sequences share too few k-mers; the manual settings apply then.
+    Dependents show as in progress while detection runs.
+    """
+    inputs = orientation_inputs()
+    if inputs is None or orientation_task.status() == "error":
+        return None
+    key, orientation = orientation_task.result()
+    if key != inputs[0]:
+        # Result for a superseded file or reference; the current one is queued.
+        req(False, cancel_output="progress")
+    return orientation
+
+
+@reactive.calc
+def processing_request() -> ProcessingRequest | None:
+    """Settings for the expensive per-base processing, or None without data."""
     parsed = parsed_per_base_file()
     if parsed.empty:
-        return pd.DataFrame()
-    data = process_per_base_file(parsed, input.reverse_complement(), input.origin_shift())
+        return None
     ref = parsed_reference()
-    if ref and ref.get("sequence"):
+    ref_seq = None
+    orientation = detected_orientation()
+    if orientation is not None:
+        # Detected settings put the data in the uploaded reference's own
+        # coordinates, so a single alignment against it as-is suffices.
+        reverse_complement = orientation.reverse_complement
+        origin_shift = orientation.origin_shift
         ref_seq = ref["sequence"]
-        if input.reverse_complement():
-            ref_seq = reverse_complement_sequence(ref_seq)
-        data = align_ref_to_variants(data, ref_seq)
-    return data
+    else:
+        _, reverse_complement, origin_shift = orientation_settings()
+        if ref and ref.get("sequence"):
+            ref_seq = ref["sequence"]
+            if reverse_complement:
+                ref_seq = reverse_complement_sequence(ref_seq)
+    return ProcessingRequest(
+        cache_key=processed_cache_key(
+            per_base_digest(), ref_seq, reverse_complement, origin_shift
+        ),
+        parsed=parsed,
+        reference_sequence=ref_seq,
+        reverse_complement=reverse_complement,
+        origin_shift=origin_shift,
+    )
+
+
+@reactive.extended_task
+async def processing_task(
+    request: ProcessingRequest, control: RunControl
+) -> tuple[tuple, pd.DataFrame]:
+    """Process and align on a worker thread. Results are shared across sessions
+    through the content-addressed frame_cache, so repeats skip the work."""
+    computed = False
+
+    def compute() -> pd.DataFrame:
+        nonlocal computed
+        computed = True
+        return request.run(control)
+
+    frame = await asyncio.to_thread(frame_cache.get_or_compute, request.cache_key, compute)
+    pipeline_metrics.cache("processed", hit=not computed)
+    return request.cache_key, frame
+
+
+# Control of this session's latest processing run; a newer request cancels it.
+processing_control = reactive.value(RunControl())
+
+
+def cancel_processing():
+    """Abandon the in-flight processing run, if any.
+
+    The asyncio side is cancelled at once; the worker thread stops before its
+    next stage, since Python threads cannot be interrupted mid-stage.
+    """
+    with reactive.isolate():
+        processing_control().cancel()
+    processing_task.cancel()
+
+
+@reactive.effect
+def start_processing():
+    """(Re)start background processing whenever its inputs change."""
+    request = processing_request()
+    cancel_processing()
+    if request is None:
+        return
+    control = RunControl()
+    processing_control.set(control)
+    processing_task.invoke(request, control)
+
+
+@reactive.calc
+def base_processed_data():
+    """Processed per-base frame for the current settings. Independent of range
+    inputs. Dependents show as in progress while the background run is going."""
+    request = processing_request()
+    if request is None or processing_task.status() == "error":
+        return pd.DataFrame()
+    cache_key, data = processing_task.result()
+    if cache_key != request.cache_key:
+        # Result of superseded settings; the current run is still queued.
+        req(False, cancel_output="progress")
+    return held("processed", data)
+
+
+# Visible x-range of the position plot, None until the user zooms or pans.
+position_plot_view = reactive.value(None)
+
+# Bumped when the live position plot cannot be patched and must be re-rendered.
+position_plot_rerender = reactive.value(0)
 
 
 @reactive.calc
@@ -276,6 +577,117 @@ def feature_regions_for_plot() -> list[dict]:
     return regions
 
 
+@reactive.calc
+def selected_ranges() -> list[tuple[int, int]]:
+    """Active selection: the chosen features if any, else the slider range."""
+    ref = parsed_reference()
+    if ref and ref["features"] and input.selected_features():
+        feature_ranges = [
+            (
+                int(ref["features"][feature].location.start),
+                int(ref["features"][feature].location.end),
+            )
+            for feature in input.selected_features()
+            if feature in ref["features"]
+        ]
+        if feature_ranges:
+            return feature_ranges
+    low, high = pos_range_debounced()
+    return [(low, high)]
+
+
+@reactive.calc
+def violin_summaries() -> ViolinSummaries | None:
+    """Per-(series, selection) violin summaries for the current processed frame."""
+    data = base_processed_data()
+    if data.empty:
+        return None
+    return ViolinSummaries(data)
+
+
+@reactive.extended_task
+async def comparison_task(
+    files: list[FileInfo], reverse_complement: bool, origin_shift: int
+) -> tuple[SampleStack, np.ndarray, pd.DataFrame]:
+    """Read, stack and score the comparison samples on a worker thread.
+
+    Parses share the ``("parsed", digest)`` frame_cache entries with the
+    single-sample view, so a file already open in another tab is not re-read.
+    """
+
+    def run():
+        for file in files:
+            preflight_per_base_table(file["datapath"], file["name"])
+        frames = [
+            frame_cache.get_or_compute(
+                ("parsed", file_digest(file["datapath"])),
+                lambda file=file: check_per_base_table(
+                    read_per_base_table(file["datapath"]), file["name"]
+                ),
+            )
+            for file in files
+        ]
+        stack = stack_samples(
+            frames, [file["name"] for file in files], reverse_complement, origin_shift
+        )
+        metrics = sample_metrics(stack)
+        return stack, metrics, sample_summary(stack, metrics)
+
+    return await asyncio.to_thread(run)
+
+
+@reactive.effect
+def start_comparison():
+    """Rescore the comparison samples when the uploads or orientation change."""
+    files = input.comparison_files()
+    comparison_task.cancel()
+    if not files or session_released():
+        return
+    if admit_upload([file["datapath"] for file in files]):
+        comparison_task.invoke(
+            files, input.reverse_complement(), input.origin_shift() or 0
+        )
+
+
+@reactive.calc
+def sample_comparison() -> tuple[SampleStack, np.ndarray, pd.DataFrame] | None:
+    """(stack, metrics, per-sample summary) of the comparison uploads, or None."""
+    if not input.comparison_files() or comparison_task.status() == "error":
+        return None
+    return held("comparison", comparison_task.result())
+
+
+def position_plot_for_export(displayed_fields: list) -> go.Figure:
+    """Full-resolution position plot of the current selection, for downloads."""
+    data = processed_per_base_file()
+    return base_position_vs_value_plot_plotly(
+        data,
+        mean_values_per_base(),
+        displayed_fields,
+        [0, int(data["pos"].max()) if not data.empty else 0],
+        input.pos_range()[0],
+        input.pos_range()[1],
+        last_selected_series(),
+        input.show_means(),
+        feature_regions_for_plot(),
+        normalize=input.normalize_plot(),
+    )
+
+
+async def render_png_export(figs: list[go.Figure]) -> list[bytes] | None:
+    """Render on the shared warm renderer; None (after notifying) on failure."""
+    try:
+        return await asyncio.to_thread(image_renderer.render_many, figs)
+    except ExportQueueFull as exc:
+        ui.notification_show(str(exc), type="warning")
+    except Exception:
+        ui.notification_show(
+            "PNG export requires the 'kaleido' package and Chrome. "
+            "Install with: pip install kaleido && plotly_get_chrome"
+        )
+    return None
+
+
 # Sidebar layout
 with ui.sidebar(title="Settings"):
     # --- 1. Data input ---
@@ -291,6 +703,41 @@ with ui.sidebar(title="Settings"):
         class_="btn-sm btn-outline-secondary",
     )
     ui.help_text("No file yet? Load a bundled example library to explore the app.")
+    ui.input_text("job_id", "Load a finished QC job", placeholder="Job id")
+    ui.input_action_button(
+        "load_job",
+        "Load job",
+        class_="btn-sm btn-outline-secondary",
+    )
+
+    @render.ui
+    def processing_status():
+        """Per-session progress of the background parse/process/align run."""
+        if job_load_task.status() == "running":
+            return ui.help_text("Loading job…")
+        if per_base_input() is None:
+            return None
+        if session_released():
+            return ui.TagList(
+                ui.help_text("Data released after inactivity."),
+                ui.input_action_button(
+                    "resume_session", "Reload", class_="btn-sm btn-outline-secondary"
+                ),
+            )
+        if parse_task.status() == "running":
+            return ui.help_text("Reading file…")
+        status = processing_task.status()
+        if status == "running":
+            # The worker thread updates the stage label; poll it while running.
+            reactive.invalidate_later(0.5)
+            with reactive.isolate():
+                stage = processing_control().stage
+            return ui.help_text(f"{stage}…")
+        if status == "error":
+            with reactive.isolate():
+                error = processing_task.error.get()
+            return ui.help_text(f"Processing failed: {error}")
+        return None
 
     # --- 2. Reference input (optional) ---
     ui.input_file(
@@ -322,11 +769,13 @@ with ui.sidebar(title="Settings"):
             display = f"{key} ({loc_start}–{loc_end})"
             grouped.setdefault(group, {})[key] = display
 
+        job = loaded_job()
         return ui.input_selectize(
             "selected_features",
             "Select feature",
             choices=grouped,
             multiple=True,
+            selected=None if job is None else job["options"]["features"],
         )
 
     ui.hr()
@@ -354,6 +803,30 @@ with ui.sidebar(title="Settings"):
     ui.hr()
 
     # --- 5. Advanced / reference alignment ---
+    ui.input_switch(
+        "auto_orient", "Detect origin and strand from reference", value=True
+    )
+
+    @render.ui
+    def orientation_status():
+        orientation = detected_orientation()
+        if orientation is None:
+            if (
+                orientation_settings()[0]
+                and parsed_reference()
+                and not parsed_per_base_file().empty
+            ):
+                return ui.help_text(
+                    "Could not detect the orientation; using the settings below."
+                )
+            return None
+        strand = "reverse" if orientation.reverse_complement else "forward"
+        return ui.help_text(
+            f"Detected origin shift {orientation.origin_shift} bp on the {strand} "
+            f"strand ({orientation.support:.0%} k-mer support). "
+            "The settings below are ignored."
+        )
+
     ui.input_switch("reverse_complement", "Reverse complement")
     ui.input_numeric("origin_shift", "Origin shift (bp)", value=0, min=0, step=1)
 
@@ -371,16 +844,42 @@ with ui.sidebar(title="Settings"):
 
     with ui.panel_conditional("output.export_ready === 'true'"):
 
+        ui.input_switch("gzip_csv", "Gzip CSV")
+
         @render.download(
-            filename="per_base_data.csv", media_type="text/csv", label="Per-base data"
+            filename=lambda: "per_base_data.csv.gz" if input.gzip_csv() else "per_base_data.csv",
+            media_type=lambda: "application/gzip" if input.gzip_csv() else "text/csv",
+            label="Per-base data",
         )
-        def download_per_base_csv():
-            """Download per-base data as CSV."""
-            df = processed_per_base_file()
-            if df.empty:
-                yield ""
-                return
-            yield df[tabular_cols].to_csv(index=False)
+        async def download_per_base_csv():
+            """Stream per-base data as CSV, formatted (and gzipped) in row chunks."""
+            chunks = iter_csv_chunks(processed_per_base_file(), tabular_cols)
+            if input.gzip_csv():
+                chunks = gzip_chunks(chunks)
+            async for chunk in aiter_in_thread(chunks):
+                yield chunk
+
+        @render.download(
+            filename="per_base_data.parquet",
+            media_type="application/vnd.apache.parquet",
+            label="Full frame (Parquet)",
+        )
+        async def download_per_base_parquet():
+            """Stream the full processed frame, every derived column, as Parquet."""
+            async for chunk in aiter_in_thread(
+                iter_parquet_chunks(processed_per_base_file())
+            ):
+                yield chunk
+
+        @render.download(
+            filename="per_base_data.arrow",
+            media_type="application/vnd.apache.arrow.file",
+            label="Full frame (Arrow)",
+        )
+        async def download_per_base_arrow():
+            """Stream the full processed frame as an Arrow IPC file."""
+            async for chunk in aiter_in_thread(iter_arrow_chunks(processed_per_base_file())):
+                yield chunk
 
         @render.download(
             filename="test_results.csv", media_type="text/csv", label="Test results"
@@ -398,28 +897,33 @@ with ui.sidebar(title="Settings"):
             media_type="image/png",
             label="Position plot (PNG)",
         )
-        def download_plot_png():
+        async def download_plot_png():
             """Download position plot as PNG."""
-            data = processed_per_base_file()
-            fig = base_position_vs_value_plot_plotly(
-                data,
-                mean_values_per_base(),
-                input.data_series(),
-                [0, int(data["pos"].max()) if not data.empty else 0],
-                input.pos_range()[0],
-                input.pos_range()[1],
-                last_selected_series(),
-                input.show_means(),
-                feature_regions_for_plot(),
-                normalize=input.normalize_plot(),
+            images = await render_png_export(
+                [position_plot_for_export(input.data_series())]
             )
-            try:
-                yield fig.to_image(format="png")
-            except Exception:
-                ui.notification_show(
-                    "PNG export requires the 'kaleido' package. Install with: pip install kaleido"
-                )
+            yield images[0] if images else b""
+
+        @render.download(
+            filename="position_plots.zip",
+            media_type="application/zip",
+            label="All series (PNG, zip)",
+        )
+        async def download_all_series_png():
+            """Download one position plot per series, rendered as a single batch."""
+            columns = processed_per_base_file().columns
+            series = [s for s in plottable_series if s in columns]
+            images = await render_png_export(
+                [position_plot_for_export([s]) for s in series]
+            )
+            if not images:
                 yield b""
+                return
+            buffer = io.BytesIO()
+            with zipfile.ZipFile(buffer, "w") as archive:
+                for name, image in zip(series, images):
+                    archive.writestr(f"{name}.png", image)
+            yield buffer.getvalue()
 
         @render.download(
             filename="position_plot.html",
@@ -428,19 +932,7 @@ with ui.sidebar(title="Settings"):
         )
         def download_plot_html():
             """Download position plot as interactive HTML."""
-            data = processed_per_base_file()
-            fig = base_position_vs_value_plot_plotly(
-                data,
-                mean_values_per_base(),
-                input.data_series(),
-                [0, int(data["pos"].max()) if not data.empty else 0],
-                input.pos_range()[0],
-                input.pos_range()[1],
-                last_selected_series(),
-                input.show_means(),
-                feature_regions_for_plot(),
-                normalize=input.normalize_plot(),
-            )
+            fig = position_plot_for_export(input.data_series())
             yield fig.to_html(include_plotlyjs="cdn").encode()
 
 
@@ -450,14 +942,10 @@ with ui.layout_columns(columns=2, col_widths=[9, 3]):
         with ui.navset_card_pill():
             with ui.nav_panel("Plots"):
 
+                # Series, normalization, zoom and overlays are patched into the
+                # live widget by the update_position_plot_* effects.
                 @render_plotly
-                @reactive.event(
-                    base_processed_data,
-                    input.data_series,
-                    last_selected_series,
-                    input.normalize_plot,
-                    feature_regions_for_plot,
-                )
+                @reactive.event(base_processed_data, position_plot_rerender)
                 def plotly_position_plot():
                     data = base_processed_data()
                     if data.empty:
@@ -472,21 +960,75 @@ with ui.layout_columns(columns=2, col_widths=[9, 3]):
                             input.show_means(),
                             normalize=input.normalize_plot(),
                         )
-                    pos_plot = base_position_vs_value_plot_plotly(
-                        data,
-                        mean_values_per_base(),
-                        input.data_series(),
-                        [0, int(data["pos"].max())],
-                        input.pos_range()[0],
-                        input.pos_range()[1],
-                        last_selected_series(),
-                        input.show_means(),
-                        feature_regions_for_plot(),
-                        normalize=input.normalize_plot(),
-                    )
+                    view = position_plot_view()
+                    means = mean_values_per_base()
+                    regions = feature_regions_for_plot()
+                    with pipeline_metrics.timed("position_plot", len(data)):
+                        pos_plot = base_position_vs_value_plot_plotly(
+                            data,
+                            means,
+                            input.data_series(),
+                            list(view) if view else [0, int(data["pos"].max())],
+                            input.pos_range()[0],
+                            input.pos_range()[1],
+                            last_selected_series(),
+                            input.show_means(),
+                            regions,
+                            normalize=input.normalize_plot(),
+                            lod=position_plot_lod(),
+                            view_range=view,
+                        )
 
                     return pos_plot
 
+            with ui.nav_panel("Compare samples"):
+                with ui.layout_columns(col_widths=[6, 6]):
+                    ui.input_file(
+                        "comparison_files",
+                        "Upload per-base tables to compare",
+                        accept=[".csv", ".tsv"],
+                        multiple=True,
+                    )
+                    ui.input_select(
+                        "comparison_series",
+                        "Metric",
+                        {key: column_names_dict[key] for key in plottable_series},
+                    )
+                ui.help_text(
+                    "Samples are aligned on position using the reverse complement "
+                    "and origin shift settings in the sidebar."
+                )
+
+                @render.ui
+                def comparison_status():
+                    if not input.comparison_files():
+                        return None
+                    status = comparison_task.status()
+                    if status == "running":
+                        return ui.help_text("Comparing samples…")
+                    if status == "error":
+                        with reactive.isolate():
+                            error = comparison_task.error.get()
+                        return ui.help_text(f"Comparison failed: {error}")
+                    return None
+
+                @render_plotly
+                def comparison_plot():
+                    comparison = sample_comparison()
+                    stack, metrics = (None, None) if comparison is None else comparison[:2]
+                    return multi_sample_position_plot(
+                        stack, metrics, input.comparison_series()
+                    )
+
+                @render.data_frame
+                def comparison_summary():
+                    comparison = sample_comparison()
+                    if comparison is None:
+                        return pd.DataFrame()
+                    return render.DataGrid(
+                        comparison[2].reset_index().round(4), filters=False
+                    )
+
             with ui.nav_panel("Tabular data"):
 
                 @render.data_frame
@@ -495,7 +1037,7 @@ with ui.layout_columns(columns=2, col_widths=[9, 3]):
                         return pd.DataFrame()
 
                     return render.DataGrid(
-                        pd.DataFrame(processed_per_base_file()[tabular_cols]),
+                        pd.DataFrame(with_aligned_ref(processed_per_base_file())[tabular_cols]),
                         filters=False,
                     )
 
@@ -513,17 +1055,21 @@ with ui.layout_columns(columns=2, col_widths=[9, 3]):
 
             @render_plotly
             @reactive.event(
-                pos_range_debounced,
-                input.data_series,
+                selected_ranges,
                 last_selected_series,
+                violin_summaries,
             )
             def render_value_violins():
-                distribution_plots = distribution_violin_plot_plotly(
-                    processed_per_base_file(),
-                    last_selected_series(),
-                    column_names_dict,
-                    column_colors_dict,
-                )
+                summaries = violin_summaries()
+                series = last_selected_series()
+                ranges = selected_ranges()
+                with pipeline_metrics.timed("violin_plot"):
+                    distribution_plots = binned_violin_plot_plotly(
+                        (None, None) if summaries is None else summaries.get(series, ranges),
+                        series,
+                        column_names_dict,
+                        column_colors_dict,
+                    )
 
                 return distribution_plots
 
@@ -581,34 +1127,38 @@ def processed_per_base_file():
     data = base_processed_data()
     if data.empty:
         return pd.DataFrame()
+    ranges = selected_ranges()
+    with pipeline_metrics.timed("update_per_base_df", len(data)):
+        return held("range_selected", update_per_base_df(data, ranges))
 
-    low, high = pos_range_debounced()
-    data = update_per_base_df(data, [(low, high)])
 
-    ref = parsed_reference()
-    if ref and ref["features"] and input.selected_features():
-        selected_range = []
-        for feature in input.selected_features():
-            if feature in ref["features"]:
-                selected_range.append(
-                    (
-                        int(ref["features"][feature].location.start),
-                        int(ref["features"][feature].location.end),
-                    )
-                )
-        if selected_range:
-            data = update_per_base_df(data, selected_range)
+@reactive.calc
+def range_stats_index() -> RangeStatsIndex | None:
+    """Cumulative sums over base_processed_data, built once per processed frame."""
+    data = base_processed_data()
+    if data.empty:
+        return None
+    return held("range_index", RangeStatsIndex(data))
+
 
-    return data
+@reactive.calc
+def position_plot_lod() -> PositionLOD | None:
+    """Min/max pyramids for the position plot, built once per processed frame."""
+    data = base_processed_data()
+    if data.empty:
+        return None
+    return PositionLOD(data)
 
 
-# TODO: this df should also include the means for the full series, not just selected vs. non-selected
 @reactive.calc
 def mean_values_per_base():
-    data = processed_per_base_file()
-    if data.empty:
+    """Selected/unselected/full means from the range index, without a frame pass."""
+    index = range_stats_index()
+    if index is None:
         return pd.DataFrame()
-    return update_mean_values_per_base(data)
+    ranges = selected_ranges()
+    with pipeline_metrics.timed("mean_values_per_base"):
+        return held("means", index.means(ranges))
 
 
 @reactive.calc
@@ -617,8 +1167,9 @@ def test_results():
     if data.empty:
         return pd.DataFrame()
     selected_means = mean_values_per_base()
-    full_means = process_full_mean_values(data)
-    return test_per_base_file(data, selected_means, full_means)
+    with pipeline_metrics.timed("test_per_base_file", len(data)):
+        full_means = process_full_mean_values(data)
+        return held("tests", test_per_base_file(data, selected_means, full_means))
 
 
 # Reactive effects
@@ -630,70 +1181,199 @@ def update_pos_range():
     """Update slider bounds and reset value when a new file is loaded."""
     if per_base_input() is not None:
         seq_len = sequence_length()
-        ui.update_slider("pos_range", min=0, max=seq_len, value=[0, seq_len])
+        with reactive.isolate():
+            selection = job_selection()
+        job_selection.set(None)
+        if selection is None or selection[1] > seq_len:
+            selection = [0, seq_len]
+        ui.update_slider("pos_range", min=0, max=seq_len, value=selection)
+
+
+@reactive.extended_task
+async def job_load_task(job_id: str) -> dict:
+    """Read a finished QC job's frames into the frame cache on a worker thread.
+
+    Raises:
+        ValueError: If there is no such job or it has not finished.
+    """
+    return await asyncio.to_thread(load_job_frames, job_id)
+
+
+@reactive.effect
+@reactive.event(input.load_job)
+def start_job_load():
+    job_id = input.job_id().strip()
+    if job_id:
+        job_load_task.invoke(job_id)
+
+
+@reactive.effect
+def apply_loaded_job():
+    """Switch the session to a loaded job's inputs and settings.
+
+    Its frames are in the frame cache by now, so parsing and processing them
+    are cache hits; the selection and tests are recomputed, as they are cheap.
+    """
+    status = job_load_task.status()
+    if status == "error":
+        with reactive.isolate():
+            error = job_load_task.error.get()
+        ui.notification_show(
+            str(error) if isinstance(error, ValueError) else "Could not load the job.",
+            type="error",
+        )
+        return
+    if status != "success":
+        return
+    with reactive.isolate():
+        job = job_load_task.value.get()
+    options = job["options"]
+    settings = (options["auto_orient"], options["reverse_complement"], options["origin_shift"])
+    job_settings.set(settings)
+    ui.update_switch("auto_orient", value=settings[0])
+    ui.update_switch("reverse_complement", value=settings[1])
+    ui.update_numeric("origin_shift", value=settings[2])
+    n_positions = job["settings"]["n_positions"]
+    selection = options["ranges"][0] if options["ranges"] else [0, n_positions]
+    job_selection.set(list(selection))
+    ui.update_slider("pos_range", min=0, max=n_positions, value=list(selection))
+    loaded_job.set(job)
+
+
+@reactive.effect
+def sync_job_settings():
+    """Hand the orientation settings back to the inputs once they match the job's."""
+    pending = job_settings()
+    current = (input.auto_orient(), input.reverse_complement(), input.origin_shift() or 0)
+    if pending is not None and current == pending:
+        job_settings.set(None)
+
+
+@reactive.effect
+@reactive.event(input.per_base_file, input.reference_file, input.load_example)
+def replace_loaded_job():
+    """A new upload or the example replaces a loaded job."""
+    loaded_job.set(None)
+    job_settings.set(None)
+    job_selection.set(None)
 
 
 @reactive.effect
-@reactive.event(input.pos_range, mean_values_per_base, input.show_means)
+@reactive.event(
+    input.pos_range,
+    mean_values_per_base,
+    input.show_means,
+    last_selected_series,
+    feature_regions_for_plot,
+)
 def update_position_plot_shapes():
-    """Update vlines/hlines via widget delta — avoids re-rendering scatter traces."""
+    """Patch only the changed shape/annotation properties (see plot_delta)."""
     w = plotly_position_plot.widget
     if w is None:
         return
-
     min_p, max_p = input.pos_range()
+    shapes, annotations = position_plot_overlays(
+        min_p,
+        max_p,
+        feature_regions_for_plot(),
+        mean_values_per_base(),
+        last_selected_series(),
+        input.show_means(),
+    )
+    sync_overlays(w, shapes, annotations)
 
-    # Build shapes on a temp figure using the same Plotly API as plotly_plots.py
-    tmp = go.Figure()
-    tmp.add_vline(x=min_p, line_width=1, line_dash="dash", line_color="black")
-    tmp.add_vline(x=max_p, line_width=1, line_dash="dash", line_color="black")
-
-    for region in feature_regions_for_plot():
-        tmp.add_vrect(
-            x0=region["start"],
-            x1=region["end"],
-            fillcolor=region.get("color", "rgba(100, 100, 255, 0.15)"),
-            layer="below",
-            line_width=0,
-            annotation_text=region.get("label", ""),
-            annotation_position="top left",
-            annotation_font_size=10,
-            annotation_font_color="gray",
-        )
 
-    if input.show_means():
-        means = mean_values_per_base()
-        if not means.empty:
-            col = f"{last_selected_series()}_mean"
-            if col in means.columns:
-                sel_mean = means.at["selected", col]
-                all_mean = (
-                    means.at["unselected", col]
-                    if "unselected" in means.index
-                    and not pd.isna(means.at["unselected", col])
-                    else sel_mean
-                )
-                if not pd.isna(sel_mean):
-                    tmp.add_hline(
-                        y=float(sel_mean),
-                        line_width=1,
-                        line_dash="dash",
-                        line_color="black",
-                        annotation_text=f"Selected mean: {float(sel_mean):.2f}",
-                    )
-                if not pd.isna(all_mean):
-                    tmp.add_hline(
-                        y=float(all_mean),
-                        line_width=1,
-                        line_dash="solid",
-                        line_color="black",
-                        annotation_text=f"Full mean: {float(all_mean):.2f}",
-                    )
+@reactive.effect
+def track_position_plot_view():
+    """Record the plot's x-range whenever the user zooms, pans or autoscales."""
+    w = plotly_position_plot.widget
+    if w is None:
+        return
 
-    w.update_layout(
-        shapes=list(tmp.layout.shapes),
-        annotations=list(tmp.layout.annotations),
+    def on_relayout(change):
+        # Plotly's own handler consumes the message; read the range from it first.
+        if change["new"]:
+            with reactive.isolate():
+                current = position_plot_view()
+            position_plot_view.set(
+                relayout_x_range(change["new"]["relayout_data"], current)
+            )
+
+    w.observe(on_relayout, names="_js2py_relayout")
+
+
+@reactive.effect
+@reactive.event(input.data_series, input.normalize_plot, position_plot_view)
+def update_position_plot_traces():
+    """Add, remove or restyle single traces instead of re-rendering the plot."""
+    w = plotly_position_plot.widget
+    data = base_processed_data()
+    if w is None or data.empty:
+        return
+    updated = sync_traces(
+        w,
+        data,
+        list(input.data_series()),
+        input.normalize_plot(),
+        position_plot_lod(),
+        position_plot_view(),
     )
+    if not updated:
+        # Placeholder on either side: no traces to patch, so render afresh.
+        position_plot_rerender.set(position_plot_rerender() + 1)
+
+
+def release_intermediates():
+    """Drop this session's tasks' results so its frames can be freed.
+
+    The calcs built on them are invalidated and recompute, mostly from the
+    shared frame cache, once the session becomes active again.
+    """
+    cancel_processing()
+    for task in (parse_task, orientation_task, processing_task, comparison_task):
+        task.cancel()
+        task.status.set("initial")
+        task.value.unset()
+    session_released.set(True)
+    session_registry.mark_released(session_id)
+
+
+@reactive.effect
+def release_when_idle():
+    """Release the session's intermediates after ``idle_seconds`` without input."""
+    if session_id is None or not session_registry.idle_seconds:
+        return
+    reactive.invalidate_later(min(60, session_registry.idle_seconds))
+    if session_registry.should_release(session_id):
+        release_intermediates()
+
+
+@reactive.effect
+def track_activity():
+    """Any change to the data or view inputs counts as activity."""
+    input.per_base_file()
+    input.load_example()
+    input.load_job()
+    input.reference_file()
+    input.pos_range()
+    input.data_series()
+    input.auto_orient()
+    input.reverse_complement()
+    input.origin_shift()
+    input.show_means()
+    input.normalize_plot()
+    input.comparison_files()
+    if session_id is not None:
+        session_registry.touch(session_id)
+    session_released.set(False)
+
+
+@reactive.effect
+@reactive.event(input.resume_session)
+def resume_session():
+    if session_id is not None:
+        session_registry.touch(session_id)
+    session_released.set(False)
 
 
 @reactive.effect
@@ -1,4 +1,4 @@
-"""ASGI entrypoint: the Shiny Express app plus a /healthz readiness endpoint.
+"""ASGI entrypoint: the Shiny Express app plus /healthz and the /metrics routes.
 
 This exists to satisfy the suite-wide deploy contract (which requires every app
 to expose an HTTP readiness probe). See docs/deploy-contract.md in the dms-tools
@@ -7,20 +7,39 @@ deploy repo.
 `app.py` is a Shiny Express app, so it has no explicit `App` object to attach a
 route to. `wrap_express_app()` builds that `App` for us. The returned `App` is
 itself the ASGI entrypoint and owns the Shiny lifespan, so we keep it as the
-root application and register one extra route on its internal Starlette router.
+root application and register extra routes on its internal Starlette router.
 Mounting Shiny under a *separate* parent Starlette app would drop Shiny's
 lifespan (Starlette does not propagate lifespan into mounted sub-apps).
 
+/metrics serves per-stage pipeline latency and input-size histograms, cache
+outcomes and the frame cache's size in Prometheus text format (see
+telemetry.py). /metrics/image-export reports the shared PNG export renderer's
+queue and latency percentiles as JSON (see image_export.py).
+/metrics/sessions reports open sessions, the bytes each holds and process
+memory against its limit as JSON (see session_memory.py).
+
+POST /api/qc is the headless QC API for LIMS integration, and /metrics/api
+reports its worker pool as JSON (see qc_api.py). /api/jobs submits, polls
+and fetches asynchronous QC jobs for inputs too slow for one request (see
+qc_jobs.py).
+
 Local dev is unchanged: `shiny run app.py` still works and simply omits
-/healthz. The container launches this module instead: `uvicorn asgi:app`.
+these routes. The container launches this module instead:
+`uvicorn asgi:app`.
 """
 
 from pathlib import Path
 
 from shiny.express import wrap_express_app
-from starlette.responses import JSONResponse
+from starlette.responses import JSONResponse, PlainTextResponse
 from starlette.routing import Route
 
+from image_export import image_renderer
+from qc_api import routes as qc_api_routes
+from qc_jobs import routes as qc_jobs_routes
+from session_memory import session_registry
+from telemetry import prometheus_text
+
 app = wrap_express_app(Path(__file__).parent / "app.py")
 
 
@@ -29,8 +48,28 @@ async def healthz(_request):
     return JSONResponse({"status": "ok"})
 
 
-# Insert ahead of Shiny's catch-all Mount("/") so /healthz resolves here and is
+async def metrics(_request):
+    """Pipeline stage metrics in the Prometheus text exposition format."""
+    return PlainTextResponse(prometheus_text(), media_type="text/plain; version=0.0.4")
+
+
+async def image_export_metrics(_request):
+    """Queue depth, counters and latency percentiles of the PNG export renderer."""
+    return JSONResponse(image_renderer.stats())
+
+
+async def session_metrics(_request):
+    """Open sessions, the bytes they hold and process memory use."""
+    return JSONResponse(session_registry.stats())
+
+
+# Insert ahead of Shiny's catch-all Mount("/") so these resolve here and are
 # not swallowed by Shiny's own routing.
-app.starlette_app.router.routes.insert(
-    0, Route("/healthz", healthz, methods=["GET"])
-)
+app.starlette_app.router.routes[0:0] = [
+    Route("/healthz", healthz, methods=["GET"]),
+    Route("/metrics", metrics, methods=["GET"]),
+    Route("/metrics/image-export", image_export_metrics, methods=["GET"]),
+    Route("/metrics/sessions", session_metrics, methods=["GET"]),
+    *qc_api_routes,
+    *qc_jobs_routes,
+]
@@ -0,0 +1,329 @@
+"""Headless batch QC: run the app's pipeline over many per-base files.
+
+Examples:
+    python batch_qc.py run1/*.tsv --reference backbone.gb --feature "my CDS" --jobs 8
+    python batch_qc.py --sample-sheet samples.csv --out-dir qc_results
+
+A sample sheet is a CSV/TSV with a ``per_base`` column and optional
+``sample``, ``reference``, ``reverse_complement``, ``origin_shift``,
+``auto_orient``, ``ranges`` ("start-end;start-end") and ``features`` ("name;name") columns.
+Relative paths are resolved against the sheet's directory.
+
+Writes ``<sample>_per_base.csv`` and ``<sample>_tests.csv`` per sample plus
+a combined ``summary.csv`` with one row per sample.
+
+With ``--stream`` (or ``--chunksize N``) each file is instead processed in
+chunks by ``streaming.stream_process_per_base_file``, for tables too large to
+load at once: the sample's rows go to ``<sample>_per_base.parquet`` and its
+running means to the summary. Streaming skips reference alignment and the
+t-tests, which need the whole table; a reference is still used for
+``--feature`` ranges.
+"""
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from pipeline import QCResult, load_reference, parse_ranges, run_qc, selection_ranges
+from process_data import aggregation_columns, with_aligned_ref
+from shared import tabular_cols, test_cols
+from streaming import default_chunksize, stream_process_per_base_file
+
+
+@dataclass(frozen=True)
+class SampleJob:
+    """Everything a worker needs to QC one sample (must stay picklable)."""
+
+    sample: str
+    per_base: Path
+    out_dir: Path
+    reference: Path | None = None
+    reverse_complement: bool = False
+    origin_shift: int = 0
+    auto_orient: bool = False
+    ranges: list[tuple[int, int]] = field(default_factory=list)
+    features: list[str] = field(default_factory=list)
+    # Rows per chunk in streaming mode; None loads the whole table
+    chunksize: int | None = None
+
+
+def summary_row(
+    job: SampleJob,
+    result: QCResult,
+    seconds: float,
+    n_positions: int | None = None,
+    n_selected: int | None = None,
+) -> dict:
+    """Flatten one sample's means and test results into a summary-table row.
+
+    ``n_positions``/``n_selected`` default to counts over ``result.processed``.
+    """
+    data = result.processed
+    row = {
+        "sample": job.sample,
+        "per_base": str(job.per_base),
+        "status": "ok",
+        "error": "",
+        "n_positions": len(data) if n_positions is None else n_positions,
+        "n_selected": int(data["is_selected"].sum()) if n_selected is None else n_selected,
+        "seconds": round(seconds, 3),
+    }
+    for group in ("full", "selected", "unselected"):
+        for col in aggregation_columns:
+            key = f"{col}_mean"
+            row[f"{group}_{key}"] = (
+                result.means.at[group, key]
+                if group in result.means.index and key in result.means.columns
+                else float("nan")
+            )
+    for col in test_cols:
+        tested = not result.tests.empty and col in result.tests.index
+        row[f"{col}_result"] = result.tests.at[col, "Result"] if tested else ""
+        row[f"{col}_p_adjusted"] = result.tests.at[col, "p_adjusted"] if tested else float("nan")
+    return row
+
+
+def stream_sample(job: SampleJob, ranges: list[tuple[int, int]], start: float) -> dict:
+    """Streaming-mode QC of one sample into ``<sample>_per_base.parquet``."""
+    if job.auto_orient:
+        raise ValueError("--auto-orient needs the whole table and cannot be streamed")
+    store = job.out_dir / f"{job.sample}_per_base.parquet"
+    means = stream_process_per_base_file(
+        job.per_base,
+        store,
+        reverse_complement=job.reverse_complement,
+        origin_shift=job.origin_shift,
+        selected_ranges=ranges or None,
+        chunksize=job.chunksize,
+    )
+    selected = pq.read_table(store, columns=["is_selected"]).column(0).to_numpy()
+    result = QCResult(processed=pd.DataFrame(), means=means, tests=pd.DataFrame())
+    return summary_row(
+        job,
+        result,
+        time.perf_counter() - start,
+        n_positions=len(selected),
+        n_selected=int(selected.sum()),
+    )
+
+
+def run_sample(job: SampleJob) -> dict:
+    """Worker entry point: QC one sample, write its CSVs, return its summary row."""
+    start = time.perf_counter()
+    try:
+        reference = load_reference(job.reference) if job.reference else None
+        ranges = selection_ranges(reference, job.ranges, job.features)
+        if job.chunksize:
+            return stream_sample(job, ranges, start)
+        result = run_qc(
+            job.per_base,
+            reference=reference,
+            reverse_complement=job.reverse_complement,
+            origin_shift=job.origin_shift,
+            selected_ranges=ranges or None,
+            auto_orient=job.auto_orient,
+        )
+        with_aligned_ref(result.processed)[tabular_cols].to_csv(
+            job.out_dir / f"{job.sample}_per_base.csv", index=False
+        )
+        result.tests.to_csv(job.out_dir / f"{job.sample}_tests.csv")
+    except Exception as exc:
+        return {
+            "sample": job.sample,
+            "per_base": str(job.per_base),
+            "status": "error",
+            "error": str(exc),
+            "seconds": round(time.perf_counter() - start, 3),
+        }
+    return summary_row(job, result, time.perf_counter() - start)
+
+
+def _truthy(value: str) -> bool:
+    return value.strip().lower() in ("1", "true", "yes")
+
+
+def _unique_name(name: str, seen: set[str]) -> str:
+    candidate, n = name, 1
+    while candidate in seen:
+        n += 1
+        candidate = f"{name}_{n}"
+    seen.add(candidate)
+    return candidate
+
+
+def jobs_from_sample_sheet(
+    path: Path, out_dir: Path, chunksize: int | None = None
+) -> list[SampleJob]:
+    """Build one SampleJob per sample-sheet row."""
+    sheet = pd.read_csv(path, sep=None, engine="python", dtype=str).fillna("")
+    if "per_base" not in sheet.columns:
+        raise ValueError(f"Sample sheet {path.name} needs a 'per_base' column")
+
+    def resolve(value: str) -> Path | None:
+        if not value:
+            return None
+        p = Path(value)
+        return p if p.is_absolute() else path.parent / p
+
+    jobs, seen = [], set()
+    for _, row in sheet.iterrows():
+        per_base = resolve(row["per_base"])
+        jobs.append(
+            SampleJob(
+                sample=_unique_name(row.get("sample") or per_base.stem, seen),
+                per_base=per_base,
+                out_dir=out_dir,
+                reference=resolve(row.get("reference", "")),
+                reverse_complement=_truthy(row.get("reverse_complement", "")),
+                origin_shift=int(row.get("origin_shift") or 0),
+                auto_orient=_truthy(row.get("auto_orient", "")),
+                ranges=parse_ranges(row.get("ranges", "")),
+                features=[f.strip() for f in row.get("features", "").split(";") if f.strip()],
+                chunksize=chunksize,
+            )
+        )
+    return jobs
+
+
+def stream_chunksize(args: argparse.Namespace) -> int | None:
+    """Rows per chunk if streaming was requested, else None."""
+    if args.chunksize is not None:
+        return args.chunksize
+    return default_chunksize if args.stream else None
+
+
+def jobs_from_args(args: argparse.Namespace) -> list[SampleJob]:
+    """Build SampleJobs from positional files and the shared options."""
+    if args.reference and len(args.reference) not in (1, len(args.per_base)):
+        raise ValueError("Pass one --reference for all files or one per file")
+    jobs, seen = [], set()
+    for i, per_base in enumerate(args.per_base):
+        reference = None
+        if args.reference:
+            reference = args.reference[0] if len(args.reference) == 1 else args.reference[i]
+        jobs.append(
+            SampleJob(
+                sample=_unique_name(per_base.stem, seen),
+                per_base=per_base,
+                out_dir=args.out_dir,
+                reference=reference,
+                reverse_complement=args.reverse_complement,
+                origin_shift=args.origin_shift,
+                auto_orient=args.auto_orient,
+                ranges=[tuple(r) for r in args.range],
+                features=list(args.feature),
+                chunksize=stream_chunksize(args),
+            )
+        )
+    return jobs
+
+
+def run_batch(jobs: list[SampleJob], n_jobs: int) -> pd.DataFrame:
+    """Run ``jobs`` across a process pool; returns the summary table."""
+    if n_jobs <= 1 or len(jobs) <= 1:
+        rows = [run_sample(job) for job in jobs]
+    else:
+        # spawn, not fork: forking a process that already runs threads (pandas,
+        # BLAS, a web server) can deadlock the children.
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=n_jobs, mp_context=context) as pool:
+            rows = list(pool.map(run_sample, jobs))
+    return pd.DataFrame(rows)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Run DIMPLE quick QC on many per-base files without the Shiny UI."
+    )
+    parser.add_argument("per_base", nargs="*", type=Path, help="Per-base CSV/TSV files")
+    parser.add_argument("--sample-sheet", type=Path, help="CSV/TSV listing samples (see module docs)")
+    parser.add_argument(
+        "--reference",
+        type=Path,
+        action="append",
+        default=[],
+        help="FASTA/GenBank reference; give once for all files or once per file",
+    )
+    parser.add_argument("--out-dir", type=Path, default=Path("qc_results"))
+    parser.add_argument(
+        "--jobs", "-j", type=int, default=os.cpu_count() or 1, help="Worker processes"
+    )
+    parser.add_argument("--reverse-complement", action="store_true")
+    parser.add_argument("--origin-shift", type=int, default=0)
+    parser.add_argument(
+        "--auto-orient",
+        action="store_true",
+        help="Detect origin shift and strand from the reference (overrides the two options above)",
+    )
+    parser.add_argument(
+        "--range",
+        type=int,
+        nargs=2,
+        action="append",
+        default=[],
+        metavar=("START", "END"),
+        help="Selected range (0-based start, inclusive end); repeatable",
+    )
+    parser.add_argument(
+        "--feature", action="append", default=[], help="Select a GenBank feature by name; repeatable"
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Process each file in chunks into <sample>_per_base.parquet "
+        "(no alignment or t-tests; see module docs)",
+    )
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        help=f"Rows per chunk when streaming (implies --stream; default {default_chunksize})",
+    )
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if bool(args.sample_sheet) == bool(args.per_base):
+        parser.error("give either per-base files or --sample-sheet")
+
+    args.out_dir.mkdir(parents=True, exist_ok=True)
+    try:
+        if args.sample_sheet:
+            jobs = jobs_from_sample_sheet(
+                args.sample_sheet, args.out_dir, stream_chunksize(args)
+            )
+        else:
+            jobs = jobs_from_args(args)
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    start = time.perf_counter()
+    summary = run_batch(jobs, args.jobs)
+    elapsed = time.perf_counter() - start
+    summary.to_csv(args.out_dir / "summary.csv", index=False)
+
+    failed = summary[summary["status"] != "ok"]
+    for _, row in failed.iterrows():
+        print(f"{row['sample']}: {row['error']}", file=sys.stderr)
+    print(
+        f"QC'd {len(jobs)} files ({len(failed)} failed) in {elapsed:.2f} s "
+        f"({len(jobs) / elapsed:.2f} files/s) with {args.jobs} jobs; "
+        f"summary in {args.out_dir / 'summary.csv'}",
+        file=sys.stderr,
+    )
+    return 1 if len(failed) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+"""Standalone performance benchmarks. Run from the repo root with ``python -m``."""
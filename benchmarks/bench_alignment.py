@@ -0,0 +1,72 @@
+"""Time anchored vs full global alignment of a reference to a mutated copy.
+
+The full global aligner is quadratic, so by default it only runs for sizes up
+to ``--global-max`` positions.
+
+Usage:
+    python -m benchmarks.bench_alignment --sizes 5000 50000 500000
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+
+from anchored_alignment import anchored_alignment
+from benchmarks.synthetic import make_reference
+from process_reference import _global_aligner
+
+
+def mutated_copy(reference: str, seed: int = 0) -> str:
+    """Copy of ``reference`` with ~0.1% substitutions and a few short indels."""
+    rng = np.random.default_rng(seed)
+    query = np.array(list(reference))
+    n = len(query)
+    sites = rng.choice(n, size=max(1, n // 1000), replace=False)
+    query[sites] = np.where(query[sites] == "A", "C", "A")
+    query = "".join(query)
+    for _ in range(max(1, n // 10_000)):
+        at = int(rng.integers(0, len(query) - 10))
+        if rng.random() < 0.5:
+            query = query[:at] + query[at + int(rng.integers(1, 10)) :]
+        else:
+            query = query[:at] + "GATTACA" + query[at:]
+    return query
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5_000, 50_000, 500_000])
+    parser.add_argument("--global-max", type=int, default=10_000)
+    args = parser.parse_args(argv)
+
+    aligner = _global_aligner()
+    print(f"{'positions':>10} {'global s':>10} {'anchored s':>11} {'speedup':>8} {'same score':>11}")
+    for n in args.sizes:
+        reference = make_reference(n)
+        query = mutated_copy(reference)
+
+        start = time.perf_counter()
+        anchored = anchored_alignment(reference, query, aligner)
+        anchored_s = time.perf_counter() - start
+        if anchored is None:
+            print(f"{n:>10} anchoring failed")
+            continue
+
+        if n <= args.global_max:
+            start = time.perf_counter()
+            best = aligner.align(reference, query)[0]
+            global_s = time.perf_counter() - start
+            same = anchored.score == best.score
+            print(
+                f"{n:>10} {global_s:>10.3f} {anchored_s:>11.4f} "
+                f"{global_s / anchored_s:>7.0f}x {str(same):>11}"
+            )
+        else:
+            print(f"{n:>10} {'-':>10} {anchored_s:>11.4f} {'-':>8} {'-':>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""Report bytes per position of the processed frame, default vs compact dtypes.
+
+Usage:
+    python -m benchmarks.bench_frame_memory --sizes 10000 100000 1000000
+"""
+
+from __future__ import annotations
+
+import argparse
+
+from benchmarks.synthetic import make_per_base_table
+from process_data import process_per_base_file
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args(argv)
+
+    print(f"{'positions':>10} {'default B/pos':>14} {'compact B/pos':>14} {'ratio':>6}")
+    for n in args.sizes:
+        parsed = make_per_base_table(n)
+        default = process_per_base_file(parsed, False)
+        compact = process_per_base_file(parsed, False, compact=True)
+        default_bytes = default.memory_usage(deep=True).sum() / n
+        compact_bytes = compact.memory_usage(deep=True).sum() / n
+        print(
+            f"{n:>10} {default_bytes:>14.1f} {compact_bytes:>14.1f} "
+            f"{default_bytes / compact_bytes:>5.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
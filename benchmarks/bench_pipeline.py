@@ -0,0 +1,231 @@
+"""Time and peak memory of every pipeline stage over synthetic per-base tables.
+
+Each stage runs on the previous stage's output, as in the app: parse, compute
+metrics (compact frame), align the reference, select ranges, aggregate, test,
+and build the position plot (with its level-of-detail index) and the violin
+plot (with its server-side summaries). Seconds are the best of ``--repeats``
+runs; peak MB is traced by ``tracemalloc`` on one extra run.
+
+Results are written as JSON. With ``--compare``, each (stage, positions) pair
+is checked against a stored baseline and the exit status is 1 if any stage is
+slower or uses more memory than the tolerances allow.
+
+Usage:
+    python -m benchmarks.bench_pipeline --output results.json
+    python -m benchmarks.bench_pipeline --sizes 1000 100000 --compare benchmarks/baseline.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import make_reference, write_per_base_table
+from evaluate_data import test_per_base_file
+from per_base_io import read_per_base_table
+from plot_lod import PositionLOD
+from plotly_plots import base_position_vs_value_plot_plotly, binned_violin_plot_plotly
+from process_data import (
+    process_full_mean_values,
+    process_per_base_file,
+    update_mean_values_per_base,
+    update_per_base_df,
+)
+from process_reference import align_ref_to_variants
+from shared import column_colors_dict, column_names_dict
+from violin_summary import ViolinSummaries
+
+default_sizes = [1_000, 10_000, 100_000, 1_000_000, 10_000_000]
+# Timing differences below this many seconds are noise, whatever the ratio
+min_seconds = 0.01
+
+
+def _mutated_reference(reference: str, seed: int = 0) -> str:
+    """``reference`` with ~0.1% substitutions, as a plasmid reference vs. reads."""
+    rng = np.random.default_rng(seed)
+    codes = np.frombuffer(reference.encode(), dtype=np.uint8).copy()
+    sites = rng.choice(len(codes), size=max(1, len(codes) // 1000), replace=False)
+    codes[sites] = np.where(codes[sites] == ord("A"), ord("C"), ord("A"))
+    return codes.tobytes().decode()
+
+
+def _best_of(fn, repeats: int):
+    """(last result, best seconds) over ``repeats`` calls of ``fn``."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def _peak_mb(fn) -> float:
+    """Peak traced MB during one call of ``fn``."""
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1e6
+
+
+def run_pipeline(path: Path, reference: str, repeats: int, memory: bool) -> list[dict]:
+    """One result row per stage for the per-base table at ``path``."""
+    rows = []
+
+    def measure(stage: str, fn):
+        result, seconds = _best_of(fn, repeats)
+        rows.append(
+            {
+                "stage": stage,
+                "seconds": seconds,
+                "peak_mb": _peak_mb(fn) if memory else None,
+            }
+        )
+        return result
+
+    parsed = measure("read_per_base_table", lambda: read_per_base_table(path))
+    n = int(parsed["pos"].max())
+    ranges = [(n // 4, n // 2)]
+    data = measure(
+        "process_per_base_file", lambda: process_per_base_file(parsed, False, compact=True)
+    )
+    # Writes the alignment columns into its input; repeats overwrite them
+    data = measure("align_ref_to_variants", lambda: align_ref_to_variants(data, reference))
+    updated = measure("update_per_base_df", lambda: update_per_base_df(data, ranges))
+    means = measure("update_mean_values_per_base", lambda: update_mean_values_per_base(updated))
+    full_means = process_full_mean_values(updated)
+    measure("test_per_base_file", lambda: test_per_base_file(updated, means, full_means))
+    measure(
+        "position_plot",
+        lambda: base_position_vs_value_plot_plotly(
+            updated,
+            means,
+            ["variant_fraction", "entropy"],
+            [0, n],
+            ranges[0][0],
+            ranges[0][1],
+            "variant_fraction",
+            True,
+            lod=PositionLOD(updated),
+        ),
+    )
+    measure(
+        "violin_plot",
+        lambda: binned_violin_plot_plotly(
+            ViolinSummaries(data).get("variant_fraction", ranges),
+            "variant_fraction",
+            column_names_dict,
+            column_colors_dict,
+        ),
+    )
+    return rows
+
+
+def run_suite(sizes: list[int], repeats: int, memory: bool = True) -> dict:
+    """Benchmark every stage at every size; the machine-readable results."""
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            reference = make_reference(n)
+            path = write_per_base_table(Path(tmp) / f"bench_{n}.tsv", n)
+            for row in run_pipeline(path, _mutated_reference(reference), repeats, memory):
+                results.append({"positions": n, **row})
+                print(
+                    f"{n:>10} {row['stage']:<28} {row['seconds']:>9.4f} "
+                    f"{'-' if row['peak_mb'] is None else format(row['peak_mb'], '.1f'):>9}",
+                    flush=True,
+                )
+            path.unlink()
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+        },
+        "repeats": repeats,
+        "results": results,
+    }
+
+
+def compare(
+    results: dict, baseline: dict, time_tolerance: float, memory_tolerance: float
+) -> list[str]:
+    """Regressions of ``results`` against ``baseline``, one message each.
+
+    A stage regresses when it is more than ``time_tolerance`` (a fraction)
+    slower, by at least ``min_seconds``, or traces more than
+    ``memory_tolerance`` more peak memory. Pairs missing from either side
+    are skipped.
+    """
+    base = {(row["stage"], row["positions"]): row for row in baseline["results"]}
+    regressions = []
+    for row in results["results"]:
+        old = base.get((row["stage"], row["positions"]))
+        if old is None:
+            continue
+        label = f"{row['stage']} @ {row['positions']:,}"
+        slower = row["seconds"] - old["seconds"]
+        if slower > max(min_seconds, old["seconds"] * time_tolerance):
+            regressions.append(
+                f"{label}: {old['seconds']:.4f}s -> {row['seconds']:.4f}s "
+                f"({row['seconds'] / old['seconds']:.2f}x)"
+            )
+        if row["peak_mb"] is not None and old.get("peak_mb") is not None:
+            if row["peak_mb"] > old["peak_mb"] * (1 + memory_tolerance) + 0.1:
+                regressions.append(
+                    f"{label}: peak {old['peak_mb']:.1f} MB -> {row['peak_mb']:.1f} MB"
+                )
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", help=f"Positions per table (default: {default_sizes}, "
+        "or the baseline's sizes with --compare)"
+    )
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--no-memory", action="store_true", help="Skip the traced run")
+    parser.add_argument("--output", type=Path, help="Write the results JSON here")
+    parser.add_argument("--compare", type=Path, help="Baseline results JSON to compare against")
+    parser.add_argument("--time-tolerance", type=float, default=0.5)
+    parser.add_argument("--memory-tolerance", type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+    sizes = args.sizes
+    if sizes is None:
+        sizes = (
+            sorted({row["positions"] for row in baseline["results"]}) if baseline else default_sizes
+        )
+
+    print(f"{'positions':>10} {'stage':<28} {'seconds':>9} {'peak MB':>9}")
+    results = run_suite(sizes, args.repeats, memory=not args.no_memory)
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Wrote {args.output}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.time_tolerance, args.memory_tolerance)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
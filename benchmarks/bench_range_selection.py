@@ -0,0 +1,64 @@
+"""Time multi-range selection: per-range comparison loop vs merged intervals.
+
+Usage:
+    python -m benchmarks.bench_range_selection --positions 1000000 --ranges 10000
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import make_per_base_table
+from process_data import process_per_base_file, update_per_base_df
+from range_stats import RangeStatsIndex
+
+
+def _loop_mask(per_base_df: pd.DataFrame, ranges: list[tuple[int, int]]) -> pd.Series:
+    """The previous O(ranges x positions) mask construction, for reference."""
+    mask = pd.Series(False, index=per_base_df.index)
+    for start, end in ranges:
+        mask |= (per_base_df["pos"] >= start + 1) & (per_base_df["pos"] <= end)
+    return mask
+
+
+def _time(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def random_ranges(n_positions: int, n_ranges: int, seed: int = 0) -> list[tuple[int, int]]:
+    """Feature-like ranges (50-2000 bp), many of them overlapping."""
+    rng = np.random.default_rng(seed)
+    starts = rng.integers(0, n_positions, n_ranges)
+    lengths = rng.integers(50, 2000, n_ranges)
+    return [(int(s), int(min(s + w, n_positions))) for s, w in zip(starts, lengths)]
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--positions", type=int, default=1_000_000)
+    parser.add_argument("--ranges", type=int, nargs="+", default=[10, 1_000, 10_000])
+    parser.add_argument(
+        "--skip-loop", action="store_true", help="Skip the slow per-range reference loop"
+    )
+    args = parser.parse_args(argv)
+
+    data = process_per_base_file(make_per_base_table(args.positions), False, compact=True)
+    index = RangeStatsIndex(data)
+
+    print(f"{'ranges':>8} {'loop mask s':>12} {'update_per_base_df s':>21} {'index means s':>14}")
+    for n_ranges in args.ranges:
+        ranges = random_ranges(args.positions, n_ranges)
+        loop_s = float("nan") if args.skip_loop else _time(lambda: _loop_mask(data, ranges))
+        update_s = _time(lambda: update_per_base_df(data, ranges))
+        means_s = _time(lambda: index.means(ranges))
+        print(f"{n_ranges:>8} {loop_s:>12.3f} {update_s:>21.3f} {means_s:>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
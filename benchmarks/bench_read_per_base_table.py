@@ -0,0 +1,49 @@
+"""Compare the fast typed reader with the legacy sniffing reader.
+
+Usage:
+    python -m benchmarks.bench_read_per_base_table --sizes 10000 100000 500000
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.synthetic import write_per_base_table
+from per_base_io import _read_per_base_table_sniffing, read_per_base_table
+
+
+def _best_of(fn, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 500_000])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    print(f"{'rows':>10} {'sep':>4} {'legacy s':>10} {'fast s':>10} {'speedup':>8} {'legacy MB':>10} {'fast MB':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            for sep, label in (("\t", "tsv"), (",", "csv")):
+                path = write_per_base_table(Path(tmp) / f"bench_{n}.{label}", n, sep=sep)
+                legacy = _best_of(lambda: _read_per_base_table_sniffing(path), args.repeats)
+                fast = _best_of(lambda: read_per_base_table(path), args.repeats)
+                legacy_mb = _read_per_base_table_sniffing(path).memory_usage(deep=True).sum() / 1e6
+                fast_mb = read_per_base_table(path).memory_usage(deep=True).sum() / 1e6
+                print(
+                    f"{n:>10} {label:>4} {legacy:>10.3f} {fast:>10.3f} "
+                    f"{legacy / fast:>7.1f}x {legacy_mb:>10.1f} {fast_mb:>8.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Peak traced memory and time: in-memory pipeline vs chunked streaming.
+
+Usage:
+    python -m benchmarks.bench_streaming --sizes 1000000 5000000 --chunksize 200000
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from benchmarks.synthetic import write_per_base_table
+from per_base_io import read_per_base_table
+from process_data import process_per_base_file, update_mean_values_per_base, update_per_base_df
+from streaming import default_chunksize, stream_process_per_base_file
+
+
+def _measure(fn) -> tuple[float, float]:
+    """Return (seconds, peak traced MB) for one call of ``fn``."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak / 1e6
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000_000, 5_000_000])
+    parser.add_argument("--chunksize", type=int, default=default_chunksize)
+    args = parser.parse_args(argv)
+
+    print(f"{'rows':>10} {'in-memory s':>12} {'peak MB':>9} {'streamed s':>11} {'peak MB':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            path = write_per_base_table(Path(tmp) / f"bench_{n}.tsv", n)
+
+            def in_memory():
+                data = process_per_base_file(read_per_base_table(path), False, compact=True)
+                update_mean_values_per_base(update_per_base_df(data, [(0, n)]))
+
+            def streamed():
+                stream_process_per_base_file(
+                    path, Path(tmp) / "out.parquet", chunksize=args.chunksize
+                )
+
+            mem_s, mem_mb = _measure(in_memory)
+            str_s, str_mb = _measure(streamed)
+            print(f"{n:>10} {mem_s:>12.2f} {mem_mb:>9.0f} {str_s:>11.2f} {str_mb:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Load test for the headless QC API of a running server.
+
+Posts a synthetic per-base table to /api/qc from ``--concurrency`` clients
+until ``--requests`` requests have been sent, while probing /healthz in the
+background. The probe latency shows whether API load slows down everything
+else served by the process (the interactive sessions share its event loop).
+Reports status counts and latency percentiles for both.
+
+Start the server first, e.g. ``uvicorn asgi:app --port 8080``.
+
+Usage:
+    python -m benchmarks.load_test_api --url http://localhost:8080 --positions 100000
+    python -m benchmarks.load_test_api --concurrency 8 --requests 40 --format csv
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.synthetic import write_per_base_table
+
+boundary = "dimple-load-test"
+
+
+def multipart_body(fields: dict[str, str], filename: str, content: bytes) -> bytes:
+    """multipart/form-data body with ``fields`` and the table as ``per_base``."""
+    parts = [
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+        for name, value in fields.items()
+    ]
+    parts.append(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="per_base"; '
+        f'filename="{filename}"\r\nContent-Type: text/tab-separated-values\r\n\r\n'.encode()
+        + content
+        + b"\r\n"
+    )
+    parts.append(f"--{boundary}--\r\n".encode())
+    return b"".join(parts)
+
+
+def timed_request(request: urllib.request.Request, timeout: float) -> tuple[int, float]:
+    """(HTTP status, seconds) of one request, reading the whole response."""
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as exc:
+        exc.read()
+        status = exc.code
+    except OSError:
+        status = 0  # connection error or timeout
+    return status, time.perf_counter() - start
+
+
+def summarize(label: str, results: list[tuple[int, float]]) -> None:
+    statuses = Counter(status for status, _ in results)
+    seconds = np.array([seconds for _, seconds in results]) * 1000
+    if not len(seconds):
+        print(f"{label}: no requests")
+        return
+    p50, p90, p99 = np.percentile(seconds, [50, 90, 99])
+    print(
+        f"{label}: {len(results)} requests, statuses {dict(sorted(statuses.items()))}, "
+        f"ms p50 {p50:.0f} p90 {p90:.0f} p99 {p99:.0f} max {seconds.max():.0f}"
+    )
+
+
+def run_load(
+    url: str,
+    content: bytes,
+    concurrency: int,
+    n_requests: int,
+    fields: dict[str, str],
+    timeout: float,
+) -> tuple[list[tuple[int, float]], list[tuple[int, float]], float]:
+    """(API results, /healthz probe results, wall seconds)."""
+    body = multipart_body(fields, "load_test.tsv", content)
+    headers = {"Content-Type": f"multipart/form-data; boundary={boundary}"}
+    done = threading.Event()
+    probes: list[tuple[int, float]] = []
+
+    def probe() -> None:
+        while not done.is_set():
+            probes.append(timed_request(urllib.request.Request(f"{url}/healthz"), timeout))
+            done.wait(0.1)
+
+    def post(_: int) -> tuple[int, float]:
+        request = urllib.request.Request(f"{url}/api/qc", data=body, headers=headers)
+        return timed_request(request, timeout)
+
+    prober = threading.Thread(target=probe, daemon=True)
+    prober.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(post, range(n_requests)))
+    wall = time.perf_counter() - start
+    done.set()
+    prober.join()
+    return results, probes, wall
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8080")
+    parser.add_argument("--positions", type=int, default=10_000, help="Rows of the table")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--format", choices=["json", "csv", "arrow"], default="json")
+    parser.add_argument("--ranges", default="", help='Selection, e.g. "100-400;600-900"')
+    parser.add_argument("--timeout", type=float, default=300.0)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        content = write_per_base_table(Path(tmp) / "load_test.tsv", args.positions).read_bytes()
+    url = args.url.rstrip("/")
+    print(
+        f"{args.requests} requests of {len(content) / 1e6:.1f} MB "
+        f"({args.positions:,} positions), {args.concurrency} at a time, to {url}/api/qc"
+    )
+    results, probes, wall = run_load(
+        url,
+        content,
+        args.concurrency,
+        args.requests,
+        {"format": args.format, "ranges": args.ranges},
+        args.timeout,
+    )
+    summarize("/api/qc", results)
+    summarize("/healthz", probes)
+    ok = sum(status == 200 for status, _ in results)
+    print(f"{ok / wall:.2f} successful QC runs/s over {wall:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Synthetic Plasmidsaurus-style per-base tables for benchmarking."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+_bases = np.array(list("ACGT"))
+
+
+def make_reference(n_positions: int, seed: int = 0) -> str:
+    """Random reference sequence of length ``n_positions``."""
+    rng = np.random.default_rng(seed)
+    return "".join(_bases[rng.integers(0, 4, n_positions)])
+
+
+def make_per_base_table(
+    n_positions: int,
+    seed: int = 0,
+    reference: str | None = None,
+    variant_region: tuple[int, int] | None = None,
+) -> pd.DataFrame:
+    """Build a per-base table with realistic-looking counts.
+
+    Every position is dominated by its reference base with a little noise;
+    positions inside ``variant_region`` (0-based, half-open) carry a mix of
+    non-reference bases, as a mutated subpool would.
+    """
+    rng = np.random.default_rng(seed)
+    if reference is None:
+        reference = make_reference(n_positions, seed)
+    ref_idx = np.searchsorted(_bases, np.frombuffer(reference.encode(), dtype="S1").astype(str))
+
+    reads_all = rng.integers(800, 2500, n_positions)
+    noise = rng.poisson(2, (n_positions, 4))
+    if variant_region is not None:
+        start, end = variant_region
+        noise[start:end] += rng.poisson(60, (end - start, 4))
+    noise[np.arange(n_positions), ref_idx] = 0
+    deletions = rng.poisson(1, n_positions)
+    insertions = rng.poisson(1, n_positions)
+    counts = noise.copy()
+    counts[np.arange(n_positions), ref_idx] = np.maximum(
+        reads_all - noise.sum(axis=1) - deletions, 0
+    )
+    reads_all = counts.sum(axis=1) + deletions
+    matches = counts[np.arange(n_positions), ref_idx]
+
+    return pd.DataFrame(
+        {
+            "pos": np.arange(1, n_positions + 1),
+            "ref": list(reference),
+            "reads_all": reads_all,
+            "matches": matches,
+            "mismatches": reads_all - matches - deletions,
+            "deletions": deletions,
+            "insertions": insertions,
+            "low_conf": np.zeros(n_positions, dtype=int),
+            "A": counts[:, 0],
+            "C": counts[:, 1],
+            "G": counts[:, 2],
+            "T": counts[:, 3],
+        }
+    )
+
+
+def write_per_base_table(
+    path: str | Path, n_positions: int, sep: str = "\t", seed: int = 0
+) -> Path:
+    """Write a synthetic per-base table to ``path`` and return the path."""
+    path = Path(path)
+    make_per_base_table(n_positions, seed).to_csv(path, sep=sep, index=False)
+    return path
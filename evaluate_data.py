@@ -2,8 +2,6 @@
 
 import numpy as np
 import pandas as pd
-import scipy.stats as stats
-from statsmodels.stats.multitest import multipletests
 
 from shared import test_cols
 
@@ -22,6 +20,80 @@ def test_per_base_file(
     return test_mean_values(processed_data, selected_means_df, full_mean_df)
 
 
+def welch_t_tests(
+    selected_values: np.ndarray, unselected_values: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """Welch's t-test of selected vs unselected rows for every metric at once.
+
+    Same arithmetic, in the same order, as ``scipy.stats.ttest_ind(...,
+    equal_var=False)`` on each metric, so the results are identical: two-pass
+    variances, Welch-Satterthwaite degrees of freedom and a two-sided
+    Student-t p-value. A NaN anywhere in a group propagates to that metric.
+
+    Args:
+        selected_values: C-contiguous float64 array (n_metrics, n_selected).
+            Contiguous rows make each mean use the same pairwise summation as
+            scipy's per-metric call.
+        unselected_values: Likewise, (n_metrics, n_unselected).
+
+    Returns:
+        (t statistics, p-values), each of length n_metrics; NaN where either
+        group has fewer than two rows.
+    """
+    groups = (selected_values, unselected_values)
+    n1, n2 = (float(g.shape[1]) for g in groups)
+    if n1 < 2 or n2 < 2:
+        nan = np.full(selected_values.shape[0], np.nan)
+        return nan, nan.copy()
+
+    means, vns = [], []
+    for group, n in zip(groups, (n1, n2)):
+        mean = group.mean(axis=1)
+        deviations = group - mean[:, None]
+        np.square(deviations, out=deviations)
+        var = deviations.mean(axis=1) * (n / (n - 1))
+        means.append(mean)
+        vns.append(var / n)
+    vn1, vn2 = vns
+    with np.errstate(divide="ignore", invalid="ignore"):
+        df = (vn1 + vn2) ** 2 / (vn1**2 / (n1 - 1) + vn2**2 / (n2 - 1))
+        # Undefined only when both variances are zero; any df gives the same p.
+        df = np.where(np.isnan(df), 1.0, df)
+        t_stats = (means[0] - means[1]) / np.sqrt(vn1 + vn2)
+    from scipy import special
+
+    p_values = 2 * special.stdtr(df, -np.abs(t_stats))
+    return t_stats, p_values
+
+
+def fdr_bh(p_values: np.ndarray, alpha: float = 0.05) -> tuple[np.ndarray, np.ndarray]:
+    """Benjamini-Hochberg correction, as statsmodels' ``multipletests(method="fdr_bh")``.
+
+    Args:
+        p_values: 1-D array without NaNs.
+        alpha: Family-wise false discovery rate.
+
+    Returns:
+        (rejected, corrected p-values) in the input order.
+    """
+    n = len(p_values)
+    order = np.argsort(p_values)
+    p_sorted = p_values[order]
+    ecdf_factor = np.arange(1, n + 1) / float(n)
+
+    reject = p_sorted <= ecdf_factor * alpha
+    if reject.any():
+        reject[: np.nonzero(reject)[0].max()] = True
+    corrected = np.minimum.accumulate((p_sorted / ecdf_factor)[::-1])[::-1]
+    corrected[corrected > 1] = 1
+
+    rejected = np.empty_like(reject)
+    rejected[order] = reject
+    corrected_out = np.empty_like(corrected)
+    corrected_out[order] = corrected
+    return rejected, corrected_out
+
+
 def test_mean_values(
     processed_data: pd.DataFrame,
     selected_means_df: pd.DataFrame,
@@ -29,46 +101,36 @@ def test_mean_values(
 ) -> pd.DataFrame:
     """Function to test the mean values and return a dataframe with summary pass/fail results"""
 
-    # Run t-tests for all columns and collect results
-    p_values = []
-    t_stats = []
-    for column in test_cols:
-        selected_values = processed_data[processed_data["is_selected"]][column]
-        unselected_values = processed_data[~processed_data["is_selected"]][column]
-
-        if len(selected_values) < 2 or len(unselected_values) < 2:
-            t_stats.append(np.nan)
-            p_values.append(np.nan)
-            continue
-
-        t_test_result = stats.ttest_ind(
-            selected_values,
-            unselected_values,
-            equal_var=False,
-        )
-        t_stats.append(t_test_result.statistic)
-        p_values.append(t_test_result.pvalue)
+    # (metric, row) matrices per group, gathered once. Compact frames store
+    # metrics as float32 or int32, so everything is tested in float64.
+    is_selected = processed_data["is_selected"].to_numpy(dtype=bool)
+    groups = []
+    for rows in (np.flatnonzero(is_selected), np.flatnonzero(~is_selected)):
+        group = np.empty((len(test_cols), len(rows)), dtype=np.float64)
+        for i, column in enumerate(test_cols):
+            group[i] = processed_data[column].to_numpy().take(rows)
+        groups.append(group)
+    t_stats, p_arr = welch_t_tests(*groups)
 
     # Apply Benjamini-Hochberg FDR correction (filter NaN p-values first)
-    p_arr = np.array(p_values)
     valid_mask = ~np.isnan(p_arr)
     corrected_p = np.full_like(p_arr, np.nan)
     rejected = np.full(len(p_arr), False)
 
     if valid_mask.any():
-        rej, cor, _, _ = multipletests(p_arr[valid_mask], method="fdr_bh")
+        rej, cor = fdr_bh(p_arr[valid_mask])
         corrected_p[valid_mask] = cor
         rejected[valid_mask] = rej
 
-    rows = []
-    for i, column in enumerate(test_cols):
-        rows.append({
-            "Metric": column,
+    return pd.DataFrame(
+        {
             "Test": "Compare means",
-            "Result": "Skip" if np.isnan(p_values[i]) else ("Pass" if rejected[i] else "Fail"),
-            "p_value": p_values[i],
-            "p_adjusted": corrected_p[i],
-            "t_stat": t_stats[i],
-        })
-
-    return pd.DataFrame(rows).set_index("Metric")
+            "Result": np.where(
+                np.isnan(p_arr), "Skip", np.where(rejected, "Pass", "Fail")
+            ),
+            "p_value": p_arr,
+            "p_adjusted": corrected_p,
+            "t_stat": t_stats,
+        },
+        index=pd.Index(test_cols, name="Metric"),
+    )
@@ -0,0 +1,225 @@
+"""Process-wide, long-lived image-export renderer for PNG downloads.
+
+``fig.to_image`` starts a fresh kaleido/Chromium renderer for every call,
+which takes seconds and briefly doubles the container's memory. Here one
+renderer is started lazily on the first export and kept warm:
+
+* a kaleido browser with ``concurrency`` tabs lives on its own event-loop
+  thread; kaleido hands each render a free tab, so at most ``concurrency``
+  figures render at once and the rest wait for a tab;
+* at most ``max_pending`` figures may be queued or rendering. Beyond that,
+  ``render_many`` raises ``ExportQueueFull`` right away rather than letting
+  requests pile up behind a slow export;
+* ``render_many`` renders a batch of figures (e.g. one per plottable series)
+  in one round trip to the renderer thread;
+* request latencies are kept for ``stats()``, which is served
+  at /metrics/image-export (see asgi.py).
+
+Session isolation: ``image_renderer`` keeps no figures or images between calls.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import atexit
+import concurrent.futures
+import os
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Sequence
+from typing import Any
+
+import numpy as np
+
+default_concurrency = 2
+# Room for a couple of full reports (one figure per plottable series) at once
+default_max_pending = 32
+default_timeout = 60.0
+latency_window = 1000
+
+
+class ExportQueueFull(RuntimeError):
+    """Raised when accepting a render would exceed ``max_pending`` figures."""
+
+
+def _open_kaleido(concurrency: int, timeout: float):
+    import kaleido
+
+    return kaleido.Kaleido(n=concurrency, timeout=timeout)
+
+
+class ImageRenderer:
+    """Warm kaleido renderer with a bounded queue and latency statistics.
+
+    Args:
+        concurrency: Figures rendered at once (browser tabs).
+        max_pending: Figures that may be queued or rendering at once.
+        timeout: Seconds to wait for one ``render_many`` call.
+        open_browser: Factory returning an async context manager whose value
+            has kaleido's ``calc_fig(fig, opts)``; defaults to kaleido itself.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = default_concurrency,
+        max_pending: int = default_max_pending,
+        timeout: float = default_timeout,
+        open_browser: Callable[[int, float], Any] = _open_kaleido,
+    ) -> None:
+        self.concurrency = concurrency
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._open_browser = open_browser
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._browser: concurrent.futures.Future | None = None
+        self._context = None
+        self._pending = 0
+        self._latencies: deque[float] = deque(maxlen=latency_window)
+        self._startup_seconds: float | None = None
+        self._counts = {"renders": 0, "figures": 0, "errors": 0, "rejected": 0}
+
+    @property
+    def running(self) -> bool:
+        return self._browser is not None
+
+    def _ensure_started(self) -> concurrent.futures.Future:
+        """Start the renderer thread and browser once; later calls reuse them."""
+        with self._lock:
+            if self._browser is None:
+                if self._loop is None:
+                    self._loop = asyncio.new_event_loop()
+                    threading.Thread(
+                        target=self._loop.run_forever, name="image-export", daemon=True
+                    ).start()
+                    atexit.register(self.close)
+                self._browser = asyncio.run_coroutine_threadsafe(
+                    self._start_browser(), self._loop
+                )
+            return self._browser
+
+    async def _start_browser(self):
+        start = time.perf_counter()
+        context = self._open_browser(self.concurrency, self.timeout)
+        browser = await context.__aenter__()
+        self._context = context
+        self._startup_seconds = time.perf_counter() - start
+        return browser
+
+    async def _render_all(self, browser_future, fig_dicts, opts) -> list[bytes]:
+        browser = await asyncio.wrap_future(browser_future)
+        return list(
+            await asyncio.gather(*(browser.calc_fig(fig, opts) for fig in fig_dicts))
+        )
+
+    def render_many(
+        self,
+        figs: Sequence[Any],
+        format: str = "png",
+        width: int | None = None,
+        height: int | None = None,
+        scale: float | None = None,
+    ) -> list[bytes]:
+        """Render figures to image bytes, in order, in one batch.
+
+        Raises:
+            ExportQueueFull: The batch would exceed ``max_pending`` figures.
+        """
+        with self._lock:
+            if self._pending + len(figs) > self.max_pending:
+                self._counts["rejected"] += 1
+                raise ExportQueueFull(
+                    f"Image export is busy ({self._pending} figures in progress); "
+                    "try again shortly."
+                )
+            self._pending += len(figs)
+        opts = {"format": format, "width": width, "height": height, "scale": scale}
+        opts = {key: value for key, value in opts.items() if value is not None}
+        fig_dicts = [fig.to_dict() if hasattr(fig, "to_dict") else fig for fig in figs]
+
+        start = time.perf_counter()
+        browser_future = None
+        try:
+            browser_future = self._ensure_started()
+            future = asyncio.run_coroutine_threadsafe(
+                self._render_all(browser_future, fig_dicts, opts), self._loop
+            )
+            try:
+                images = future.result(timeout=self.timeout)
+            except concurrent.futures.TimeoutError:
+                future.cancel()
+                raise
+        except BaseException:
+            with self._lock:
+                self._counts["errors"] += 1
+                failed_start = (
+                    browser_future is not None
+                    and browser_future.done()
+                    and browser_future.exception() is not None
+                )
+                if failed_start and self._browser is browser_future:
+                    self._browser = None  # failed to start; retry on the next call
+            raise
+        finally:
+            with self._lock:
+                self._pending -= len(figs)
+        with self._lock:
+            self._latencies.append(time.perf_counter() - start)
+            self._counts["renders"] += 1
+            self._counts["figures"] += len(figs)
+        return images
+
+    def render(self, fig: Any, **opts: Any) -> bytes:
+        """Render one figure; see ``render_many``."""
+        return self.render_many([fig], **opts)[0]
+
+    def stats(self) -> dict[str, Any]:
+        """Counters, queue depth and export latency percentiles in milliseconds."""
+        with self._lock:
+            latencies = np.array(self._latencies) * 1000
+            stats: dict[str, Any] = {
+                **self._counts,
+                "running": self.running,
+                "pending": self._pending,
+                "concurrency": self.concurrency,
+                "max_pending": self.max_pending,
+                "startup_ms": None
+                if self._startup_seconds is None
+                else round(self._startup_seconds * 1000, 1),
+            }
+        if len(latencies):
+            p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+            stats["latency_ms"] = {
+                "count": len(latencies),
+                "p50": round(float(p50), 1),
+                "p90": round(float(p90), 1),
+                "p99": round(float(p99), 1),
+                "max": round(float(latencies.max()), 1),
+            }
+        else:
+            stats["latency_ms"] = {"count": 0}
+        return stats
+
+    def close(self) -> None:
+        """Shut the browser and the renderer thread down."""
+        with self._lock:
+            loop, context = self._loop, self._context
+            self._loop = self._browser = self._context = None
+        if loop is None:
+            return
+        if context is not None:
+            shutdown = asyncio.run_coroutine_threadsafe(
+                context.__aexit__(None, None, None), loop
+            )
+            try:
+                shutdown.result(timeout=10)
+            except Exception:
+                pass
+        loop.call_soon_threadsafe(loop.stop)
+
+
+image_renderer = ImageRenderer(
+    concurrency=int(os.environ.get("DIMPLE_EXPORT_CONCURRENCY", default_concurrency)),
+    max_pending=int(os.environ.get("DIMPLE_EXPORT_MAX_PENDING", default_max_pending)),
+)
@@ -0,0 +1,219 @@
+"""Multi-sample comparison: several per-base tables on one position axis.
+
+Libraries built on the same backbone (replicates, successive construction
+attempts) are compared by stacking their counts into one array and computing
+the ``process_per_base_file`` metrics for every sample at once:
+
+* ``stack_samples`` aligns the tables on the union of their positions, giving
+  a ``(samples, positions, count_columns)`` array. Positions a sample lacks
+  hold zero counts and are flagged in ``present``;
+* ``sample_metrics`` evaluates the ``aggregation_columns`` metrics in one
+  NumPy pass over that array, giving ``(samples, positions, metrics)`` with
+  NaN wherever a sample has no data;
+* ``sample_summary`` reduces that to one row of means and standard deviations
+  per sample, named as in ``process_full_mean_values``.
+
+Origin shift and reverse complement are applied to positions and bases while
+stacking, so each sample's metrics match ``process_per_base_file`` on its own.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from process_data import aggregation_columns
+from shared import COMPLEMENT
+
+count_columns = ["A", "C", "G", "T", "insertions", "deletions", "reads_all"]
+
+# Column of each base in ``count_columns`` (-1 for anything else), by ASCII code
+_base_index = np.full(256, -1, dtype=np.int8)
+for _i, _b in enumerate("ACGT"):
+    _base_index[ord(_b)] = _i
+
+# ASCII code of each base's complement; 0 (no base) for anything else
+_complement_code = np.zeros(256, dtype=np.uint8)
+for _b, _c in COMPLEMENT.items():
+    _complement_code[ord(_b)] = ord(_c)
+
+
+@dataclass(frozen=True, eq=False)
+class SampleStack:
+    """Counts of several samples on a common position axis.
+
+    Attributes:
+        names: Sample names, one per row of the arrays below.
+        pos: Common 1-based position axis, sorted, shape ``(positions,)``.
+        counts: ``count_columns`` per sample and position, shape
+            ``(samples, positions, len(count_columns))``.
+        ref_codes: ASCII code of each sample's reference base (0 if absent),
+            shape ``(samples, positions)``.
+        present: Whether the sample has a row for the position.
+        sequence_lengths: Each sample's ``pos`` maximum before any shift, as
+            ``process_per_base_file`` uses for the subpool codon fraction.
+    """
+
+    names: tuple[str, ...]
+    pos: np.ndarray
+    counts: np.ndarray
+    ref_codes: np.ndarray
+    present: np.ndarray
+    sequence_lengths: np.ndarray
+
+
+def _ref_codes(ref: pd.Series) -> np.ndarray:
+    """ASCII code of the first character of each reference base ("" for NaN)."""
+    return np.asarray(ref.fillna("").astype(str), dtype="S1").view(np.uint8)
+
+
+def stack_samples(
+    frames: Sequence[pd.DataFrame],
+    names: Sequence[str],
+    reverse_complement: bool = False,
+    origin_shift: int = 0,
+) -> SampleStack:
+    """Align parsed per-base tables on the union of their positions.
+
+    Args:
+        frames: Outputs of ``read_per_base_table``, one per sample.
+        names: Sample names, e.g. the uploaded file names.
+        reverse_complement: As in ``process_per_base_file``, for every sample.
+        origin_shift: As in ``process_per_base_file``, for every sample.
+
+    Raises:
+        ValueError: If there are no samples, the names do not match the
+            frames, or a frame is empty.
+    """
+    if not frames:
+        raise ValueError("No samples to compare")
+    if len(frames) != len(names):
+        raise ValueError(f"Got {len(names)} names for {len(frames)} samples")
+    lengths = np.array([len(frame) for frame in frames])
+    if (lengths == 0).any():
+        raise ValueError(f"{names[int(np.argmin(lengths))]} has no rows")
+
+    combined = pd.concat(
+        [frame[["pos", "ref", *count_columns]] for frame in frames], ignore_index=True
+    )
+    sample = np.repeat(np.arange(len(frames)), lengths)
+    pos = combined["pos"].to_numpy(dtype=np.int64)
+    counts = combined[count_columns].to_numpy(dtype=np.int32, copy=True)
+    ref_codes = _ref_codes(combined["ref"])
+
+    starts = np.r_[0, np.cumsum(lengths)[:-1]]
+    sequence_lengths = np.maximum.reduceat(pos, starts)
+    row_length = sequence_lengths[sample]
+    if origin_shift > 0:
+        pos = ((pos - origin_shift - 1) % row_length) + 1
+    if reverse_complement:
+        pos = row_length - pos + 1
+        counts[:, :4] = counts[:, [3, 2, 1, 0]]
+        ref_codes = _complement_code[ref_codes]
+
+    axis, column = np.unique(pos, return_inverse=True)
+    shape = (len(frames), len(axis))
+    stacked = np.zeros((*shape, len(count_columns)), dtype=np.int32)
+    stacked[sample, column] = counts
+    stacked_ref = np.zeros(shape, dtype=np.uint8)
+    stacked_ref[sample, column] = ref_codes
+    present = np.zeros(shape, dtype=bool)
+    present[sample, column] = True
+    return SampleStack(
+        names=tuple(names),
+        pos=axis,
+        counts=stacked,
+        ref_codes=stacked_ref,
+        present=present,
+        sequence_lengths=sequence_lengths,
+    )
+
+
+def _finite(values: np.ndarray) -> np.ndarray:
+    return np.where(np.isfinite(values), values, np.nan)
+
+
+def _entropy(planes: np.ndarray) -> np.ndarray:
+    """Shannon entropy over axis 0, as ``scipy.stats.entropy`` (NaN for all zeros)."""
+    from scipy.special import entr
+
+    return entr(planes / planes.sum(axis=0)).sum(axis=0)
+
+
+def sample_metrics(stack: SampleStack) -> np.ndarray:
+    """``aggregation_columns`` metrics of every sample and position.
+
+    Returns:
+        float32 array of shape ``(samples, positions, len(aggregation_columns))``,
+        NaN where a sample has no row for the position.
+    """
+    # One contiguous (samples, positions) plane per count column, so every
+    # reduction over the four bases is elementwise rather than strided.
+    planes = np.ascontiguousarray(np.moveaxis(stack.counts, -1, 0), dtype=np.float64)
+    bases = planes[:4]
+    insertions, deletions, reads_all = planes[4:]
+    # Per sample, broadcast over positions
+    subpool_codon_fraction = 1 / (stack.sequence_lengths[:, None] // 3 + 1)
+
+    non_max = np.where(bases == bases.max(axis=0), 0.0, bases)
+    ref_mask = _base_index[stack.ref_codes] == np.arange(4)[:, None, None]
+    n_variants = non_max.sum(axis=0)
+    n_indels = insertions + deletions
+    n_total = bases.sum(axis=0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        variant_fraction = _finite(n_variants / reads_all)
+        effective_entropy = _entropy(np.where(non_max < 3, 0.0, non_max))
+        metrics = {
+            "n_total": n_total,
+            "reads_all": reads_all,
+            "n_variants": n_variants,
+            "variant_fraction": variant_fraction,
+            "variant_fraction_percent": _finite(
+                (4 / 3) * variant_fraction / subpool_codon_fraction
+            ),
+            "indel_fraction": _finite(n_indels / reads_all),
+            "indel_substitution_ratio": _finite(n_indels / n_variants),
+            "max_variant_base": np.where(ref_mask, 0.0, bases).max(axis=0),
+            "entropy": _entropy(bases),
+            "effective_entropy": effective_entropy,
+            "percent_of_max_entropy": effective_entropy / np.log(3),
+            "expected_variant_codons": subpool_codon_fraction * n_total,
+            "expected_ref_n": n_total * (1 - subpool_codon_fraction),
+            "insertions": insertions,
+            "deletions": deletions,
+        }
+
+    result = np.empty((*stack.present.shape, len(aggregation_columns)), dtype=np.float32)
+    for i, col in enumerate(aggregation_columns):
+        result[..., i] = metrics[col]
+    result[~stack.present] = np.nan
+    return result
+
+
+def sample_summary(stack: SampleStack, metrics: np.ndarray) -> pd.DataFrame:
+    """Mean and standard deviation of each metric over positions, per sample.
+
+    Columns are ``<metric>_mean`` and ``<metric>_std`` as in
+    ``process_full_mean_values``; NaNs are skipped as pandas would.
+    """
+    # (samples, metrics, positions), so the reductions run over contiguous rows
+    values = np.ascontiguousarray(np.swapaxes(metrics, 1, 2), dtype=np.float64)
+    valid = ~np.isnan(values)
+    n = valid.sum(axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.where(valid, values, 0.0).sum(axis=-1) / n
+        squares = np.where(valid, values - mean[..., None], 0.0) ** 2
+        std = np.sqrt(squares.sum(axis=-1) / (n - 1))
+    mean[n == 0] = np.nan
+    std[n < 2] = np.nan
+    columns = [f"{col}_{stat}" for col in aggregation_columns for stat in ("mean", "std")]
+    return pd.DataFrame(
+        np.stack([mean, std], axis=-1).reshape(len(stack.names), -1),
+        index=pd.Index(stack.names, name="sample"),
+        columns=columns,
+    )
+
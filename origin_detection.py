@@ -0,0 +1,126 @@
+"""Detect the origin shift and strand of circular per-base data.
+
+Whole-plasmid sequencing reports positions from wherever the provider's
+assembly happens to start, and possibly on the opposite strand to the user's
+reference. Every exact k-mer match between the data sequence and the
+reference votes for one rotation, ``(data index - reference index) mod L``;
+the rotation with the most votes, on whichever strand collects more of them,
+is the orientation. That is a handful of NumPy passes over the sequences, so
+it is cheap enough to run on every upload instead of asking the user to guess.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from anchored_alignment import encode_sequence, kmer_codes, lookup_kmers, unique_kmer_index
+from shared import reverse_complement_sequence
+
+default_origin_kmer_size = 16
+
+# Fraction of data k-mers that must vote for the winning rotation before we
+# trust it. Subpool data differs from the reference only in a small variant
+# region, so a correct orientation normally scores well above this.
+default_min_support = 0.2
+
+
+@dataclass(frozen=True)
+class Orientation:
+    """Settings that put per-base data into the reference's coordinates.
+
+    ``origin_shift`` and ``reverse_complement`` have the same meaning as the
+    arguments of ``process_per_base_file``; the processed data then lines up
+    with the reference as uploaded (not reverse complemented).
+    """
+
+    origin_shift: int
+    reverse_complement: bool
+    support: float
+
+
+def _circular_kmers(sequence: str, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """k-mers of a circular sequence, including those spanning the origin."""
+    codes = encode_sequence(sequence + sequence[: k - 1])
+    return kmer_codes(codes, k)
+
+
+def _rotation_votes(
+    data_values: np.ndarray,
+    data_valid: np.ndarray,
+    reference: str,
+    k: int,
+    sequence_length: int,
+) -> tuple[int, int]:
+    """Best rotation and its vote count against one strand of the reference."""
+    ref_values, ref_positions = unique_kmer_index(
+        encode_sequence(reference + reference[: k - 1]), k
+    )
+    hits = lookup_kmers(ref_values, ref_positions, data_values)
+    data_index = np.flatnonzero(data_valid & (hits >= 0))
+    if len(data_index) == 0:
+        return 0, 0
+    rotations = (data_index - hits[data_index]) % sequence_length
+    counts = np.bincount(rotations, minlength=sequence_length)
+    best = int(counts.argmax())
+    return best, int(counts[best])
+
+
+def data_sequence(per_base_df: pd.DataFrame) -> str:
+    """The table's ``ref`` bases in ``pos`` order, as ``detect_origin`` expects.
+
+    Built from a byte array rather than by joining Python strings, which
+    takes seconds on multi-megabase tables. Missing bases become "N".
+    """
+    order = np.argsort(per_base_df["pos"].to_numpy(), kind="stable")
+    bases = np.asarray(per_base_df["ref"].to_numpy(dtype=object, na_value="N"), dtype="S1")
+    return bases[order].tobytes().decode("ascii")
+
+
+def detect_origin(
+    reference_sequence: str,
+    data_sequence: str,
+    k: int = default_origin_kmer_size,
+    min_support: float = default_min_support,
+) -> Orientation | None:
+    """Find the origin shift and strand mapping the data onto the reference.
+
+    Args:
+        reference_sequence: Reference as uploaded.
+        data_sequence: The data's ``ref`` bases in ``pos`` order.
+        k: k-mer length used for matching.
+        min_support: Minimum fraction of data k-mers on the winning rotation.
+
+    Returns:
+        The detected ``Orientation``, or None if the sequences do not share
+        enough k-mers to call one.
+    """
+    sequence_length = len(data_sequence)
+    if sequence_length < k or len(reference_sequence) < k:
+        return None
+
+    data_values, data_valid = _circular_kmers(data_sequence, k)
+    n_kmers = int(data_valid.sum())
+    if n_kmers == 0:
+        return None
+
+    # Forward strand: data index i lines up with reference index j when the
+    # data is rotated by (i - j). Reverse strand: the same holds against the
+    # reverse-complemented reference, after which process_per_base_file's
+    # reverse complement flips the data back onto the forward reference.
+    forward = _rotation_votes(data_values, data_valid, reference_sequence, k, sequence_length)
+    reverse = _rotation_votes(
+        data_values,
+        data_valid,
+        reverse_complement_sequence(reference_sequence),
+        k,
+        sequence_length,
+    )
+    is_reverse = reverse[1] > forward[1]
+    rotation, votes = reverse if is_reverse else forward
+    support = votes / n_kmers
+    if support < min_support:
+        return None
+    return Orientation(origin_shift=rotation, reverse_complement=is_reverse, support=support)
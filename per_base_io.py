@@ -2,11 +2,64 @@
 
 from __future__ import annotations
 
+from collections.abc import Iterator
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 
-from validation import expected_columns
+from validation import expected_columns, missing_columns
+
+# Delimiters we recognise when sniffing the header line, in preference order.
+_candidate_delimiters = ("\t", ",", ";")
+
+# Rows read by preflight_per_base_table after the header
+preflight_rows = 100
+
+# First characters of sequence files that are commonly uploaded by mistake
+_sequence_file_markers = {"@": "FASTQ", ">": "FASTA", "LOCUS": "GenBank"}
+
+# Explicit dtypes for the required columns. Counts are stored as int32 where
+# every value fits (see _narrow_counts), and `ref` has only a handful of
+# distinct values, so a categorical is much smaller than an object column.
+# `low_conf` is left to inference: exports disagree on whether it is a bool or
+# a 0/1 integer.
+per_base_dtypes: dict[str, str] = {
+    "pos": "int32",
+    "ref": "category",
+    "reads_all": "int32",
+    "matches": "int32",
+    "mismatches": "int32",
+    "deletions": "int32",
+    "insertions": "int32",
+    "A": "int32",
+    "C": "int32",
+    "G": "int32",
+    "T": "int32",
+}
+
+# Schema the C engine parses with. Counts are read as int64, because the C
+# engine silently wraps values that overflow int32 instead of raising.
+_read_dtypes = {
+    col: "int64" if dtype == "int32" else dtype for col, dtype in per_base_dtypes.items()
+}
+
+
+def _narrow_counts(df: pd.DataFrame) -> pd.DataFrame:
+    """Cast the count columns of ``df`` to int32 where all their values fit.
+
+    Columns with larger values (e.g. reads_all beyond 2**31 - 1) stay int64.
+    """
+    limits = np.iinfo(np.int32)
+    narrow = {
+        col: dtype
+        for col, dtype in per_base_dtypes.items()
+        if dtype == "int32"
+        and col in df.columns
+        and df[col].dtype == "int64"
+        and (df.empty or (df[col].min() >= limits.min and df[col].max() <= limits.max))
+    }
+    return df.astype(narrow) if narrow else df
 
 
 def _has_required_columns(df: pd.DataFrame) -> bool:
@@ -30,19 +83,33 @@ def _strip_leading_junk_column(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def read_per_base_table(path: str | Path) -> pd.DataFrame:
+def _sniff_header_delimiter(path: Path) -> str | None:
+    """Pick the delimiter from the header line alone.
+
+    Returns the first candidate delimiter whose split of the header contains
+    every required column, or None if no candidate does (e.g. the file is not
+    a per-base table, or the header is quoted in some unusual way).
     """
-    Read a per-base table from CSV or TSV.
+    try:
+        with open(path, encoding="utf-8-sig", errors="replace") as handle:
+            header = handle.readline()
+    except OSError:
+        return None
 
-    Tries auto-detected delimiter first, then tab, then comma.
+    required = set(expected_columns)
+    for sep in _candidate_delimiters:
+        fields = {field.strip().strip('"') for field in header.rstrip("\r\n").split(sep)}
+        if required <= fields:
+            return sep
+    return None
 
-    Args:
-        path: Path to the uploaded file on disk.
 
-    Returns:
-        Parsed DataFrame with required columns, or empty if parsing fails.
+def _read_per_base_table_sniffing(path: Path) -> pd.DataFrame:
+    """Fallback reader: auto-detected delimiter first, then tab, then comma.
+
+    This uses pandas' pure-Python parser for the sniffing pass and may parse
+    the file up to three times, so it only runs when the fast path fails.
     """
-    path = Path(path)
     seps: list[str | None] = [None, "\t", ","]
     last_error: Exception | None = None
 
@@ -63,3 +130,139 @@ def read_per_base_table(path: str | Path) -> pd.DataFrame:
     if last_error is not None:
         raise last_error
     return pd.DataFrame()
+
+
+def _read_per_base_table_fast(path: Path) -> pd.DataFrame | None:
+    """Single-pass C-engine parse using the header-sniffed delimiter.
+
+    Returns None when the fast path does not apply (unknown delimiter, values
+    that do not fit the dtype schema, ...) so the caller can fall back.
+    """
+    sep = _sniff_header_delimiter(path)
+    if sep is None:
+        return None
+    try:
+        df = pd.read_csv(path, sep=sep, header=0, engine="c", dtype=_read_dtypes)
+    except (ValueError, TypeError, OverflowError, pd.errors.ParserError):
+        return None
+
+    df = _strip_leading_junk_column(df)
+    if not _has_required_columns(df):
+        return None
+    return _narrow_counts(df)
+
+
+def preflight_per_base_table(path: str | Path, name: str | None = None) -> None:
+    """Check the header and first ``preflight_rows`` rows before a full parse.
+
+    Catches the common wrong uploads (a FASTQ, FASTA or GenBank file, another
+    CSV, a table with text in a count column or unsorted positions) in
+    milliseconds, however large the file.
+
+    Args:
+        path: Path to the uploaded file on disk.
+        name: File name to show in errors (default: the name in ``path``).
+
+    Raises:
+        ValueError: If the file cannot be a per-base table.
+    """
+    path = Path(path)
+    name = name or path.name
+    try:
+        with open(path, encoding="utf-8-sig", errors="replace") as handle:
+            first_line = handle.readline()
+    except OSError as exc:
+        raise ValueError(f"Could not read {name}: {exc.strerror}") from exc
+    for marker, kind in _sequence_file_markers.items():
+        if first_line.startswith(marker):
+            raise ValueError(f"{name} looks like a {kind} file, not a per-base table.")
+
+    sep = _sniff_header_delimiter(path)
+    try:
+        if sep is None:
+            head = pd.read_csv(path, sep=None, engine="python", nrows=preflight_rows)
+        else:
+            head = pd.read_csv(path, sep=sep, engine="c", nrows=preflight_rows)
+    except (ValueError, pd.errors.ParserError, UnicodeDecodeError) as exc:
+        raise ValueError(f"Could not parse {name}. Check the format.") from exc
+    if head.columns.empty:
+        raise ValueError(f"Could not parse {name}. Check the format.")
+
+    head = _strip_leading_junk_column(head)
+    missing = missing_columns(head)
+    if missing:
+        raise ValueError(f"{name} is missing required columns: {', '.join(sorted(missing))}")
+    if head.empty:
+        raise ValueError(f"{name} has no data rows.")
+    non_integer = [
+        col
+        for col, dtype in per_base_dtypes.items()
+        if dtype == "int32" and not pd.api.types.is_integer_dtype(head[col])
+    ]
+    if non_integer:
+        raise ValueError(f"{name} has non-integer values in: {', '.join(non_integer)}")
+    if not head["pos"].is_monotonic_increasing or head["pos"].duplicated().any():
+        raise ValueError(f"{name} has positions out of order; pos must increase.")
+
+
+def read_per_base_table(path: str | Path) -> pd.DataFrame:
+    """
+    Read a per-base table from CSV or TSV.
+
+    The delimiter is detected from the header line and the file is parsed
+    once with the C engine and the ``per_base_dtypes`` schema (int32 counts
+    where they fit, else int64; categorical ``ref``). If that fails, falls back to the slower sniffing
+    reader, which tries an auto-detected delimiter, then tab, then comma.
+
+    Args:
+        path: Path to the uploaded file on disk.
+
+    Returns:
+        Parsed DataFrame with required columns, or empty if parsing fails.
+    """
+    path = Path(path)
+
+    df = _read_per_base_table_fast(path)
+    if df is not None:
+        return df
+
+    return _read_per_base_table_sniffing(path)
+
+
+def iter_per_base_table_chunks(
+    path: str | Path, chunksize: int, usecols: list[str] | None = None
+) -> Iterator[pd.DataFrame]:
+    """
+    Read a per-base table in chunks of ``chunksize`` rows.
+
+    Uses the same header-sniffed delimiter and dtype schema as the fast path
+    of ``read_per_base_table``; there is no slow fallback, because the point
+    is never to hold the whole table in memory.
+
+    Args:
+        path: Path to the per-base file on disk.
+        chunksize: Rows per chunk.
+        usecols: Optional subset of columns to read.
+
+    Raises:
+        ValueError: If the header does not contain the required columns.
+    """
+    path = Path(path)
+    sep = _sniff_header_delimiter(path)
+    if sep is None:
+        raise ValueError(f"{path.name} does not look like a per-base table")
+    dtypes = _read_dtypes
+    if usecols is not None:
+        dtypes = {col: dtype for col, dtype in _read_dtypes.items() if col in usecols}
+    with pd.read_csv(
+        path,
+        sep=sep,
+        header=0,
+        engine="c",
+        dtype=dtypes,
+        usecols=usecols,
+        chunksize=chunksize,
+    ) as reader:
+        for chunk in reader:
+            chunk = chunk if usecols is not None else _strip_leading_junk_column(chunk)
+            yield _narrow_counts(chunk)
@@ -0,0 +1,303 @@
+"""Session-free QC pipeline: the chain the Shiny app runs, as plain functions.
+
+read_per_base_table -> process_per_base_file -> align_ref_to_variants ->
+update_per_base_df -> update_mean_values_per_base -> test_per_base_file
+
+Nothing here touches Shiny, so it can run in worker processes (see batch_qc.py)
+and in the app's background threads (see ``process_and_align``).
+"""
+
+from __future__ import annotations
+
+import threading
+from collections.abc import Hashable
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import pandas as pd
+
+from evaluate_data import test_per_base_file
+from origin_detection import data_sequence, detect_origin
+from per_base_io import preflight_per_base_table, read_per_base_table
+from process_data import (
+    process_full_mean_values,
+    process_per_base_file,
+    update_mean_values_per_base,
+    update_per_base_df,
+)
+from process_reference import align_ref_to_variants, process_reference_file
+from shared import reverse_complement_sequence
+from telemetry import pipeline_metrics
+from validation import integrity_problems, missing_columns
+
+
+@dataclass(frozen=True)
+class QCResult:
+    """Outputs of one pipeline run."""
+
+    processed: pd.DataFrame
+    means: pd.DataFrame
+    tests: pd.DataFrame
+
+
+class PipelineCancelled(Exception):
+    """Raised between stages when a run's ``RunControl`` has been cancelled."""
+
+
+@dataclass
+class RunControl:
+    """Shared between a caller and a worker thread running ``process_and_align``.
+
+    The worker records the stage it is in; the caller may cancel the run, which
+    takes effect before the next stage starts.
+    """
+
+    stage: str = "Queued"
+    _cancelled: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def enter(self, stage: str) -> None:
+        """Record the next stage, or raise PipelineCancelled if cancelled."""
+        if self.cancelled:
+            raise PipelineCancelled(stage)
+        self.stage = stage
+
+
+def load_reference(path: str | Path) -> dict[str, dict | None]:
+    """Parse a FASTA or GenBank reference file from disk.
+
+    Raises:
+        ValueError: If the file is not a single-record FASTA/GenBank file.
+    """
+    path = Path(path)
+    reference = process_reference_file([{"name": path.name, "datapath": str(path)}])
+    if reference is None or not reference.get("sequence"):
+        raise ValueError(f"Could not parse reference {path.name}: expected one FASTA or GenBank record")
+    return reference
+
+
+def feature_ranges(
+    reference: dict[str, dict | None], names: list[str]
+) -> list[tuple[int, int]]:
+    """Selection ranges for the named GenBank features, as the app builds them.
+
+    Raises:
+        ValueError: If a name is not a feature of ``reference``.
+    """
+    features = reference.get("features") or {}
+    ranges = []
+    for name in names:
+        if name not in features:
+            raise ValueError(f"Reference has no feature named {name!r}")
+        ranges.append((int(features[name].location.start), int(features[name].location.end)))
+    return ranges
+
+
+def parse_ranges(text: str) -> list[tuple[int, int]]:
+    """Parse "start-end;start-end" into a list of (start, end) tuples."""
+    ranges = []
+    for part in str(text).split(";"):
+        part = part.strip()
+        if not part:
+            continue
+        start, _, end = part.partition("-")
+        ranges.append((int(start), int(end)))
+    return ranges
+
+
+def selection_ranges(
+    reference: dict[str, dict | None] | None,
+    ranges: list[tuple[int, int]],
+    features: list[str],
+) -> list[tuple[int, int]]:
+    """``ranges`` plus the ranges of the named reference ``features``.
+
+    Raises:
+        ValueError: If features are named without a reference, or a name is
+            not a feature of it.
+    """
+    ranges = list(ranges)
+    if features:
+        if reference is None:
+            raise ValueError("Feature selection requires a GenBank reference")
+        ranges += feature_ranges(reference, features)
+    return ranges
+
+
+def check_per_base_table(df: pd.DataFrame, name: str) -> pd.DataFrame:
+    """Return a parsed per-base table unchanged if it is complete and consistent.
+
+    Args:
+        df: Output of ``read_per_base_table``.
+        name: File name to show in errors.
+
+    Raises:
+        ValueError: If the table is empty, lacks required columns, or fails
+            the integrity checks of ``validation.integrity_problems``.
+    """
+    if df.empty:
+        raise ValueError(f"Could not parse {name}. Check the format.")
+    missing = missing_columns(df)
+    if missing:
+        raise ValueError(f"{name} is missing required columns: {', '.join(sorted(missing))}")
+    problems = integrity_problems(df)
+    if problems:
+        raise ValueError(f"{name} failed integrity checks: {'; '.join(problems)}")
+    return df
+
+
+def read_validated_per_base_table(path: str | Path, name: str | None = None) -> pd.DataFrame:
+    """Pre-flight check, read and validate a per-base table.
+
+    Args:
+        path: Per-base CSV/TSV on disk.
+        name: File name to show in errors (default: the name in ``path``).
+
+    Raises:
+        ValueError: If the file is not a per-base table, cannot be parsed, or
+            fails the column or integrity checks.
+    """
+    name = name or Path(path).name
+    preflight_per_base_table(path, name)
+    return check_per_base_table(read_per_base_table(path), name)
+
+
+def process_and_align(
+    parsed: pd.DataFrame,
+    reference_sequence: str | None,
+    reverse_complement: bool,
+    origin_shift: int,
+    control: RunControl | None = None,
+) -> pd.DataFrame:
+    """The expensive, settings-dependent part of the pipeline.
+
+    Args:
+        parsed: Output of ``read_per_base_table``.
+        reference_sequence: Reference on the same strand as the processed data
+            (already reverse complemented if needed), or None to skip alignment.
+        reverse_complement: Passed to ``process_per_base_file``.
+        origin_shift: Passed to ``process_per_base_file``.
+        control: Optional stage reporting and cancellation between stages.
+
+    Raises:
+        PipelineCancelled: If ``control`` was cancelled before a stage started.
+    """
+    control = control if control is not None else RunControl()
+    control.enter("Computing per-base metrics")
+    with pipeline_metrics.timed("process_per_base_file", len(parsed)):
+        data = process_per_base_file(parsed, reverse_complement, origin_shift, compact=True)
+    if reference_sequence is not None:
+        control.enter("Aligning reference")
+        with pipeline_metrics.timed("align_ref_to_variants", len(data)):
+            data = align_ref_to_variants(data, reference_sequence)
+    control.enter("Done")
+    return data
+
+
+@dataclass(frozen=True, eq=False)
+class ProcessingRequest:
+    """Arguments of ``process_and_align``, captured for a later background run.
+
+    ``cache_key`` identifies the result (see result_cache.processed_cache_key).
+    """
+
+    cache_key: Hashable
+    parsed: pd.DataFrame
+    reference_sequence: str | None
+    reverse_complement: bool
+    origin_shift: int
+
+    def run(self, control: RunControl | None = None) -> pd.DataFrame:
+        return process_and_align(
+            self.parsed,
+            self.reference_sequence,
+            self.reverse_complement,
+            self.origin_shift,
+            control,
+        )
+
+
+def resolve_orientation(
+    parsed: pd.DataFrame,
+    reference: dict[str, dict | None] | None,
+    reverse_complement: bool,
+    origin_shift: int,
+    auto_orient: bool,
+) -> tuple[str | None, bool, int]:
+    """Settings for ``process_and_align``, as the app derives them.
+
+    Returns:
+        (reference sequence on the processed strand or None,
+        reverse_complement, origin_shift), with the detected orientation
+        when ``auto_orient`` is set and detection succeeds.
+    """
+    has_reference = reference is not None and bool(reference.get("sequence"))
+
+    orientation = None
+    if auto_orient and has_reference:
+        orientation = detect_origin(reference["sequence"], data_sequence(parsed))
+    if orientation is not None:
+        reverse_complement = orientation.reverse_complement
+        origin_shift = orientation.origin_shift
+
+    ref_seq = None
+    if has_reference:
+        ref_seq = reference["sequence"]
+        # Detected orientations are relative to the reference as uploaded
+        if reverse_complement and orientation is None:
+            ref_seq = reverse_complement_sequence(ref_seq)
+    return ref_seq, reverse_complement, origin_shift
+
+
+def select_and_test(
+    data: pd.DataFrame, selected_ranges: list[tuple[int, int]] | None = None
+) -> QCResult:
+    """Range selection, means and tests on the output of ``process_and_align``.
+
+    ``selected_ranges`` defaults to the whole sequence, like the app's slider.
+    """
+    if not selected_ranges:
+        selected_ranges = [(0, int(data["pos"].max()))]
+    data = update_per_base_df(data, selected_ranges)
+
+    means = update_mean_values_per_base(data)
+    tests = test_per_base_file(data, means, process_full_mean_values(data))
+    return QCResult(processed=data, means=means, tests=tests)
+
+
+def run_qc(
+    per_base_path: str | Path,
+    reference: dict[str, dict | None] | None = None,
+    reverse_complement: bool = False,
+    origin_shift: int = 0,
+    selected_ranges: list[tuple[int, int]] | None = None,
+    auto_orient: bool = False,
+) -> QCResult:
+    """Run the full QC pipeline on one per-base file.
+
+    Args:
+        per_base_path: Per-base CSV/TSV on disk.
+        reference: Parsed reference from ``load_reference`` (optional).
+        reverse_complement: Same as the app's "Reverse complement" switch.
+        origin_shift: Same as the app's "Origin shift (bp)" input.
+        selected_ranges: (start, end) ranges using the GenBank/slider
+            convention. Defaults to the whole sequence, like the app's slider.
+        auto_orient: Detect the origin shift and strand from the reference,
+            like the app's "Detect origin and strand" switch. Falls back to
+            ``reverse_complement``/``origin_shift`` if detection fails.
+
+    Raises:
+        ValueError: If the per-base file cannot be read or validated.
+    """
+    parsed = read_validated_per_base_table(per_base_path)
+    ref_seq, reverse_complement, origin_shift = resolve_orientation(
+        parsed, reference, reverse_complement, origin_shift, auto_orient
+    )
+    data = process_and_align(parsed, ref_seq, reverse_complement, origin_shift)
+    return select_and_test(data, selected_ranges)
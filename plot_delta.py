@@ -0,0 +1,141 @@
+"""Minimal updates to the live position-plot widget.
+
+Re-rendering the FigureWidget resends every trace, and replacing the shape
+list on each slider tick resends every feature region and annotation. Here
+the desired state is diffed against what the widget already holds so that
+only the difference goes over the websocket:
+
+* traces are matched on ``meta`` (the metric column). Missing ones are
+  added, deselected ones deleted, and the rest restyled only for the arrays
+  (x, y, customdata) that actually changed;
+* shapes, annotations and titles are compared property by property and sent
+  as ``shapes[i].x0``-style relayout paths, so moving the selection sends the
+  four endpoints of the two selection lines.
+
+The functions take the widget itself: pass ``plotly_position_plot.widget``.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Optional
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from plot_lod import PositionLOD
+from plotly_plots import position_plot_titles, position_trace, position_trace_points
+
+
+def _flatten(obj: dict, prefix: str = "") -> dict[str, Any]:
+    """Nested layout dict as {"line.width": 1, ...}."""
+    flat = {}
+    for key, value in obj.items():
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{prefix}{key}."))
+        else:
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+def layout_list_delta(name: str, current: list[dict], desired: list[dict]) -> dict:
+    """Relayout paths turning the layout list ``name`` from ``current`` into ``desired``.
+
+    Lists of the same length whose items have the same properties are patched
+    value by value; anything else replaces the whole list.
+    """
+    if len(current) != len(desired):
+        return {name: desired}
+    delta = {}
+    for i, (old, new) in enumerate(zip(current, desired)):
+        old_flat, new_flat = _flatten(old), _flatten(new)
+        if old_flat.keys() != new_flat.keys():
+            return {name: desired}
+        for key, value in new_flat.items():
+            if old_flat[key] != value:
+                delta[f"{name}[{i}].{key}"] = value
+    return delta
+
+
+def sync_overlays(widget: go.FigureWidget, shapes: list[dict], annotations: list[dict]) -> None:
+    """Bring the widget's shapes and annotations to the given ones.
+
+    Args:
+        widget: Live position plot.
+        shapes, annotations: As returned by ``position_plot_overlays``.
+    """
+    delta = {
+        **layout_list_delta(
+            "shapes", [s.to_plotly_json() for s in widget.layout.shapes], shapes
+        ),
+        **layout_list_delta(
+            "annotations",
+            [a.to_plotly_json() for a in widget.layout.annotations],
+            annotations,
+        ),
+    }
+    if delta:
+        widget.plotly_relayout(delta)
+
+
+def _same(old: Any, new: np.ndarray) -> bool:
+    old = np.asarray(old) if old is not None else np.empty(0)
+    if old.shape != new.shape:
+        return False
+    if new.dtype.kind == "f":
+        return np.array_equal(old.astype(np.float64), new, equal_nan=True)
+    return bool((old == new).all())
+
+
+def sync_traces(
+    widget: go.FigureWidget,
+    per_base_df: pd.DataFrame,
+    displayed_fields: list,
+    normalize: bool,
+    lod: Optional[PositionLOD] = None,
+    view_range: tuple[float, float] | None = None,
+) -> bool:
+    """Bring the widget's traces and titles to the displayed fields.
+
+    Args:
+        widget: Live position plot.
+        per_base_df: Processed frame the widget was rendered from.
+        displayed_fields: Metric columns to show, in legend order.
+        normalize: As in ``base_position_vs_value_plot_plotly``.
+        lod: Decimation index; None sends every row.
+        view_range: Visible x-range for ``lod``.
+
+    Returns:
+        False if the widget holds a placeholder (or should become one), in
+        which case the caller must re-render instead.
+    """
+    if not displayed_fields or not widget.data:
+        return False
+
+    def rows(field):
+        return None if lod is None else lod.rows(field, view_range)
+
+    kept = tuple(trace for trace in widget.data if trace.meta in displayed_fields)
+    if len(kept) < len(widget.data):
+        widget.data = kept
+    present = {trace.meta for trace in widget.data}
+    for field in displayed_fields:
+        if field not in present:
+            widget.add_trace(position_trace(per_base_df, field, rows(field), normalize))
+    if [trace.meta for trace in widget.data] != list(displayed_fields):
+        by_field = {trace.meta: trace for trace in widget.data}
+        widget.data = tuple(by_field[field] for field in displayed_fields)
+
+    titles = position_plot_titles(displayed_fields, normalize)
+    with widget.batch_update():
+        for trace in widget.data:
+            if trace.meta not in present:
+                continue  # just added with current values
+            points = position_trace_points(per_base_df, trace.meta, rows(trace.meta), normalize)
+            changed = {key: value for key, value in points.items() if not _same(trace[key], value)}
+            if changed:
+                trace.update(changed)
+        for path, text in titles.items():
+            if widget.layout[path] != text:
+                widget.layout[path] = text
+    return True
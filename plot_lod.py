@@ -0,0 +1,115 @@
+"""Level-of-detail decimation for the position scatter plot.
+
+Sending every position of every series to the browser makes genome-scale
+inputs unusable: the websocket payload runs to tens of megabytes and WebGL
+stalls. Instead, for each series we keep a min/max pyramid over the rows in
+``pos`` order: level ``l`` holds, for every bin of ``2**l`` consecutive rows,
+the row of the smallest and of the largest value. Plotting just those two rows
+per bin preserves every peak and dip at screen resolution.
+
+For a visible x-range we pick the coarsest level that still gives about
+``max_points`` points, so the payload tracks the screen width rather than the
+data size; once the range holds fewer rows than that, the raw rows are sent.
+Pyramids are built lazily per series and cost two row indices per position.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+# About two points per horizontal pixel on a wide screen
+default_max_points = 4000
+
+
+class PositionLOD:
+    """Min/max pyramids over the series of one processed per-base frame.
+
+    Args:
+        per_base_df: Processed per-base frame (as plotted).
+    """
+
+    def __init__(self, per_base_df: pd.DataFrame) -> None:
+        self._frame = per_base_df
+        pos = per_base_df["pos"].to_numpy()
+        self._order = None if np.all(pos[:-1] <= pos[1:]) else np.argsort(pos, kind="stable")
+        self._pos = pos if self._order is None else pos[self._order]
+        self._index_dtype = np.int32 if len(pos) < 2**31 else np.int64
+        self._pyramids: dict[str, list[tuple[np.ndarray, np.ndarray]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._pos)
+
+    def _pyramid(self, series: str) -> list[tuple[np.ndarray, np.ndarray]]:
+        """(min rows, max rows) per level, from bins of 2 rows upward."""
+        if series in self._pyramids:
+            return self._pyramids[series]
+        values = self._frame[series].to_numpy(dtype=np.float64)
+        if self._order is not None:
+            values = values[self._order]
+        # NaNs never win a comparison; an all-NaN bin keeps a NaN row.
+        low_key = np.where(np.isnan(values), np.inf, values)
+        high_key = np.where(np.isnan(values), -np.inf, values)
+
+        levels = []
+        mins = maxs = np.arange(len(values), dtype=self._index_dtype)
+        while len(mins) > 1:
+            if len(mins) % 2:
+                mins = np.append(mins, mins[-1])
+                maxs = np.append(maxs, maxs[-1])
+            left_min, right_min = mins[0::2], mins[1::2]
+            left_max, right_max = maxs[0::2], maxs[1::2]
+            mins = np.where(low_key[right_min] < low_key[left_min], right_min, left_min)
+            maxs = np.where(high_key[right_max] > high_key[left_max], right_max, left_max)
+            levels.append((mins, maxs))
+        self._pyramids[series] = levels
+        return levels
+
+    def rows(
+        self,
+        series: str,
+        x_range: tuple[float, float] | None = None,
+        max_points: int = default_max_points,
+    ) -> np.ndarray:
+        """Frame rows (positional, in ``pos`` order) to plot for ``series``.
+
+        Args:
+            series: Column to decimate.
+            x_range: Visible (low, high) positions; None for everything.
+            max_points: Point budget for the visible range.
+        """
+        low, high = 0, len(self._pos)
+        if x_range is not None:
+            low = int(np.searchsorted(self._pos, x_range[0], side="left"))
+            high = int(np.searchsorted(self._pos, x_range[1], side="right"))
+        n_rows = high - low
+        if n_rows <= max_points:
+            rows = np.arange(low, high)
+        else:
+            levels = self._pyramid(series)
+            # Bins of 2**level rows contribute two points each
+            level = min(int(np.ceil(np.log2(2 * n_rows / max_points))), len(levels))
+            mins, maxs = levels[level - 1]
+            first, last = low >> level, ((high - 1) >> level) + 1
+            rows = np.union1d(mins[first:last], maxs[first:last])
+        return rows if self._order is None else self._order[rows]
+
+
+def relayout_x_range(
+    relayout_data: dict, current: tuple[float, float] | None
+) -> tuple[float, float] | None:
+    """Visible x-range after a Plotly relayout event.
+
+    Zoom and pan report ``xaxis.range[0]``/``xaxis.range[1]`` (or a whole
+    ``xaxis.range``), an autoscale reports ``xaxis.autorange``, and anything
+    else (a y-only zoom, say) leaves the x-range at ``current``. None means
+    the full extent.
+    """
+    if relayout_data.get("xaxis.autorange"):
+        return None
+    if "xaxis.range[0]" in relayout_data and "xaxis.range[1]" in relayout_data:
+        return (float(relayout_data["xaxis.range[0]"]), float(relayout_data["xaxis.range[1]"]))
+    if relayout_data.get("xaxis.range"):
+        low, high = relayout_data["xaxis.range"]
+        return (float(low), float(high))
+    return current
@@ -2,10 +2,13 @@ from typing import Optional
 
 import numpy as np
 import pandas as pd
-import plotly.express as px
 import plotly.graph_objects as go
 
+from multi_sample import SampleStack
+from plot_lod import PositionLOD, default_max_points
+from process_data import aggregation_columns, aligned_ref_labels
 from shared import column_colors_dict, column_names_dict
+from violin_summary import ViolinSummary
 
 
 def _empty_fig(message: str | None = None) -> go.Figure:
@@ -30,6 +33,168 @@ def _empty_fig(message: str | None = None) -> go.Figure:
     return fig
 
 
+def position_trace_points(
+    per_base_df: pd.DataFrame,
+    field: str,
+    rows: np.ndarray | None = None,
+    normalize: bool = False,
+) -> dict:
+    """x, y and hover customdata of one position-plot trace.
+
+    Args:
+        per_base_df: Processed per-base frame.
+        field: Metric column to plot.
+        rows: Positional rows to include (e.g. from ``PositionLOD.rows``);
+            None for all.
+        normalize: Scale to 0–1 using the full column's min and max, so the
+            scale does not change with the rows shown.
+    """
+    subset = per_base_df if rows is None else per_base_df.iloc[rows]
+    y_values = subset[field]
+    if normalize:
+        col_min = per_base_df[field].min()
+        col_max = per_base_df[field].max()
+        if col_max > col_min:
+            y_values = (y_values - col_min) / (col_max - col_min)
+        else:
+            y_values = y_values * 0  # all same value → flat at 0
+
+    # Hover context: selected/unselected state and the reference base per position.
+    if "is_selected" in subset.columns:
+        sel_state = np.where(subset["is_selected"].to_numpy(), "Selected", "Unselected")
+    else:
+        sel_state = np.full(len(subset), "", dtype=object)
+    if "aligned_ref_code" in subset.columns:
+        ref_base = aligned_ref_labels(subset)
+    elif "ref" in subset.columns:
+        ref_base = subset["ref"].to_numpy()
+    else:
+        ref_base = np.full(len(subset), "", dtype=object)
+    return dict(
+        x=subset["pos"].to_numpy(),
+        y=y_values.to_numpy(),
+        customdata=np.column_stack([sel_state, ref_base]),
+    )
+
+
+def position_trace(
+    per_base_df: pd.DataFrame,
+    field: str,
+    rows: np.ndarray | None = None,
+    normalize: bool = False,
+) -> go.Scattergl:
+    """One metric's trace in the position plot, tagged with ``meta=field``."""
+    display_name = column_names_dict.get(field, field)
+    return go.Scattergl(
+        **position_trace_points(per_base_df, field, rows, normalize),
+        mode="markers",
+        name=display_name,
+        meta=field,
+        marker=dict(color=column_colors_dict.get(field)),
+        hovertemplate=(
+            f"<b>{display_name}</b><br>"
+            "Position %{x}<br>"
+            "Value %{y:.3g}<br>"
+            "Ref %{customdata[1]} · %{customdata[0]}"
+            "<extra></extra>"
+        ),
+    )
+
+
+def position_plot_titles(displayed_fields: list, normalize: bool) -> dict:
+    """Title and y-axis title reflecting what is actually plotted."""
+    if len(displayed_fields) == 1:
+        title = f"{column_names_dict.get(displayed_fields[0], displayed_fields[0])} by position"
+    else:
+        title = "Per-position metrics"
+    if normalize:
+        title += " — normalized 0–1 per metric"
+    return {
+        "title.text": title,
+        "yaxis.title.text": "Value" if not normalize else "Normalized (0–1)",
+    }
+
+
+def _vline(x: float, dash: str) -> dict:
+    return dict(
+        type="line", x0=x, x1=x, xref="x", y0=0, y1=1, yref="y domain",
+        line=dict(color="black", dash=dash, width=1),
+    )
+
+
+def _hline(y: float, dash: str, text: str) -> tuple[dict, dict]:
+    shape = dict(
+        type="line", x0=0, x1=1, xref="x domain", y0=y, y1=y, yref="y",
+        line=dict(color="black", dash=dash, width=1),
+    )
+    annotation = dict(
+        text=text, showarrow=False, x=1, xref="x domain", xanchor="right",
+        y=y, yref="y", yanchor="bottom",
+    )
+    return shape, annotation
+
+
+def position_plot_overlays(
+    selected_range_low: int,
+    selected_range_high: int,
+    feature_regions: list[dict] | None,
+    mean_values: pd.DataFrame,
+    last_selected_series: str,
+    show_means: bool,
+) -> tuple[list[dict], list[dict]]:
+    """Shapes and annotations of the position plot, as plain layout dicts.
+
+    Shapes are ordered selection lines, feature regions, mean lines, so a
+    slider move only changes the first two.
+
+    Returns:
+        (shapes, annotations)
+    """
+    shapes = [_vline(selected_range_low, "dash"), _vline(selected_range_high, "dash")]
+    annotations = []
+
+    # Shaded regions for annotated genomic features (e.g. CDS)
+    for region in feature_regions or []:
+        shapes.append(
+            dict(
+                type="rect", x0=region["start"], x1=region["end"], xref="x",
+                y0=0, y1=1, yref="y domain", layer="below", line=dict(width=0),
+                fillcolor=region.get("color", "rgba(100, 100, 255, 0.15)"),
+            )
+        )
+        annotations.append(
+            dict(
+                text=region.get("label", ""), showarrow=False,
+                x=region["start"], xref="x", xanchor="left",
+                y=1, yref="y domain", yanchor="top",
+                font=dict(color="gray", size=10),
+            )
+        )
+
+    mean_col = f"{last_selected_series}_mean"
+    if show_means and not mean_values.empty and mean_col in mean_values.columns:
+        selected_mean = mean_values.at["selected", mean_col]
+        if "unselected" in mean_values.index and not pd.isna(
+            mean_values.at["unselected", mean_col]
+        ):
+            all_mean = mean_values.at["unselected", mean_col]
+        else:
+            all_mean = selected_mean
+
+        for value, dash, label in (
+            (selected_mean, "dash", "Selected mean"),
+            (all_mean, "solid", "Full mean"),
+        ):
+            if not pd.isna(value):
+                shape, annotation = _hline(
+                    float(value), dash, f"{label}: {float(value):.2f}"
+                )
+                shapes.append(shape)
+                annotations.append(annotation)
+
+    return shapes, annotations
+
+
 def base_position_vs_value_plot_plotly(
     per_base_df: pd.DataFrame,
     mean_values: pd.DataFrame,
@@ -41,7 +206,15 @@ def base_position_vs_value_plot_plotly(
     show_means: bool,
     feature_regions: list[dict] | None = None,
     normalize: bool = False,
+    lod: Optional[PositionLOD] = None,
+    view_range: tuple[float, float] | None = None,
+    max_points: int = default_max_points,
 ) -> go.Figure:
+    """Scatter of the displayed metrics by position.
+
+    With ``lod``, each trace carries only the min/max-decimated rows for
+    ``view_range`` (see ``plot_lod``) instead of every position.
+    """
     if per_base_df.empty:
         return _empty_fig(
             "Upload per-base sequencing data (TSV) to begin,<br>"
@@ -54,117 +227,69 @@ def base_position_vs_value_plot_plotly(
     if "pos" not in per_base_df.columns:
         return _empty_fig()
 
-    # Shared hover context: selected/unselected state and the reference base per position.
-    sel_state = (
-        per_base_df["is_selected"].map({True: "Selected", False: "Unselected"})
-        if "is_selected" in per_base_df.columns
-        else pd.Series([""] * len(per_base_df), index=per_base_df.index)
+    fig = go.Figure(layout=dict(template="simple_white"))
+    for field in displayed_fields:
+        rows = None if lod is None else lod.rows(field, view_range, max_points)
+        fig.add_trace(position_trace(per_base_df, field, rows, normalize))
+
+    shapes, annotations = position_plot_overlays(
+        selected_range_low,
+        selected_range_high,
+        feature_regions,
+        mean_values,
+        last_selected_series,
+        show_means,
     )
-    if "aligned_ref" in per_base_df.columns:
-        ref_base = per_base_df["aligned_ref"]
-    elif "ref" in per_base_df.columns:
-        ref_base = per_base_df["ref"]
-    else:
-        ref_base = pd.Series([""] * len(per_base_df), index=per_base_df.index)
-    customdata = np.column_stack([sel_state.to_numpy(), ref_base.to_numpy()])
+    fig.update_layout(
+        xaxis_title="Position",
+        xaxis=dict(range=range),
+        uirevision="position-plot",
+        shapes=shapes,
+        annotations=annotations,
+    )
+    fig.plotly_relayout(position_plot_titles(displayed_fields, normalize))
+    return fig
+
 
+def multi_sample_position_plot(
+    stack: Optional[SampleStack],
+    metrics: Optional[np.ndarray],
+    field: str,
+) -> go.Figure:
+    """One metric by position, one overlaid trace per sample.
+
+    Args:
+        stack: Samples on a common position axis (see ``multi_sample``).
+        metrics: ``sample_metrics(stack)``.
+        field: Metric in ``aggregation_columns`` to plot.
+    """
+    if stack is None or metrics is None:
+        return _empty_fig(
+            "Upload two or more per-base tables (TSV) to compare samples."
+        )
+    display_name = column_names_dict.get(field, field)
+    values = metrics[..., aggregation_columns.index(field)]
+    x = stack.pos.astype(np.int32)
     fig = go.Figure(layout=dict(template="simple_white"))
-    for field in displayed_fields:
-        y_values = per_base_df[field]
-        if normalize:
-            col_min = y_values.min()
-            col_max = y_values.max()
-            if col_max > col_min:
-                y_values = (y_values - col_min) / (col_max - col_min)
-            else:
-                y_values = y_values * 0  # all same value → flat at 0
-        display_name = column_names_dict.get(field, field)
+    for name, y in zip(stack.names, values):
         fig.add_trace(
             go.Scattergl(
-                x=per_base_df["pos"],
-                y=y_values,
-                mode="markers",
-                name=display_name,
-                marker=dict(color=column_colors_dict.get(field)),
-                customdata=customdata,
+                x=x,
+                y=y,
+                mode="lines",
+                name=name,
+                line=dict(width=1),
                 hovertemplate=(
-                    f"<b>{display_name}</b><br>"
-                    "Position %{x}<br>"
-                    "Value %{y:.3g}<br>"
-                    "Ref %{customdata[1]} · %{customdata[0]}"
-                    "<extra></extra>"
+                    f"<b>{name}</b><br>Position %{{x}}<br>Value %{{y:.3g}}<extra></extra>"
                 ),
             )
         )
-
-    # Contextual title reflecting what is actually plotted.
-    if len(displayed_fields) == 1:
-        title = f"{column_names_dict.get(displayed_fields[0], displayed_fields[0])} by position"
-    else:
-        title = "Per-position metrics"
-    if normalize:
-        title += " — normalized 0–1 per metric"
-
     fig.update_layout(
-        title=title,
+        title=f"{display_name} by sample",
         xaxis_title="Position",
-        yaxis_title="Value" if not normalize else "Normalized (0–1)",
-        xaxis=dict(range=range),
-        uirevision="position-plot",
-    )
-
-    fig.add_vline(
-        x=selected_range_low, line_width=1, line_dash="dash", line_color="black"
+        yaxis_title=display_name,
+        uirevision="multi-sample-plot",
     )
-    fig.add_vline(
-        x=selected_range_high, line_width=1, line_dash="dash", line_color="black"
-    )
-
-    # Draw shaded regions for annotated genomic features (e.g. CDS)
-    if feature_regions:
-        for region in feature_regions:
-            fig.add_vrect(
-                x0=region["start"],
-                x1=region["end"],
-                fillcolor=region.get("color", "rgba(100, 100, 255, 0.15)"),
-                layer="below",
-                line_width=0,
-                annotation_text=region.get("label", ""),
-                annotation_position="top left",
-                annotation_font_size=10,
-                annotation_font_color="gray",
-            )
-
-    if show_means and not mean_values.empty:
-        mean_col = f"{last_selected_series}_mean"
-        if mean_col not in mean_values.columns:
-            return fig
-
-        selected_mean = mean_values.at["selected", mean_col]
-        if "unselected" in mean_values.index and not pd.isna(
-            mean_values.at["unselected", mean_col]
-        ):
-            all_mean = mean_values.at["unselected", mean_col]
-        else:
-            all_mean = selected_mean
-
-        if not pd.isna(selected_mean):
-            fig.add_hline(
-                y=float(selected_mean),
-                line_width=1,
-                line_dash="dash",
-                line_color="black",
-                annotation_text=f"Selected mean: {float(selected_mean):.2f}",
-            )
-        if not pd.isna(all_mean):
-            fig.add_hline(
-                y=float(all_mean),
-                line_width=1,
-                line_dash="solid",
-                line_color="black",
-                annotation_text=f"Full mean: {float(all_mean):.2f}",
-            )
-
     return fig
 
 
@@ -297,6 +422,118 @@ def distribution_violin_plot_plotly(
     return fig
 
 
+def binned_violin_plot_plotly(
+    summaries: tuple[ViolinSummary | None, ViolinSummary | None],
+    selected_series: str,
+    column_names_dict: dict,
+    column_colors_dict: Optional[dict] = None,
+) -> go.Figure:
+    """
+    Split violin plot like ``distribution_violin_plot_plotly``, drawn from
+    server-side summaries (see ``violin_summary``) instead of raw values.
+
+    Args:
+        summaries: (selected, unselected) summaries from ``ViolinSummaries.get``
+        selected_series: Column name plotted
+        column_names_dict: Dictionary mapping column names to display names
+        column_colors_dict: Optional dictionary mapping column names to colors
+
+    Returns:
+        Plotly figure object
+    """
+    if selected_series not in column_names_dict or summaries == (None, None):
+        return _empty_fig()
+
+    selected_color = "#1F77B4"  # Blue
+    unselected_color = "#FF7F0E"  # Orange
+    if column_colors_dict and selected_series in column_colors_dict:
+        selected_color = column_colors_dict[selected_series]
+
+    fig = go.Figure()
+    halves = (
+        (summaries[0], 1, "Selected Range", selected_color, "selected"),
+        (summaries[1], -1, "Full Sequence", unselected_color, "unselected"),
+    )
+    for summary, side, name, color, group in halves:
+        if summary is None:
+            continue
+        # Density scaled to a half-width of 0.45, as violins with scalemode "width"
+        peak = summary.density.max() or 1.0
+        height = side * 0.45 * summary.density / peak
+        fig.add_trace(
+            go.Scatter(
+                x=np.concatenate([summary.grid, summary.grid[::-1]]),
+                y=np.concatenate([height, np.zeros_like(height)]),
+                fill="toself",
+                fillcolor=color,
+                opacity=0.6,
+                line=dict(color="black", width=1),
+                mode="lines",
+                name=name,
+                legendgroup=group,
+                hoverinfo="skip",
+            )
+        )
+        box_y = side * 0.05
+        fig.add_trace(
+            go.Box(
+                y=[box_y],
+                q1=[summary.q1],
+                median=[summary.median],
+                q3=[summary.q3],
+                lowerfence=[summary.lower_fence],
+                upperfence=[summary.upper_fence],
+                orientation="h",
+                width=0.08,
+                fillcolor="rgba(255,255,255,0.5)",
+                line=dict(color="black", width=1),
+                boxpoints=False,
+                name=name,
+                legendgroup=group,
+                showlegend=False,
+            )
+        )
+        if len(summary.outliers):
+            fig.add_trace(
+                go.Scatter(
+                    x=summary.outliers,
+                    y=np.full(len(summary.outliers), box_y),
+                    mode="markers",
+                    marker=dict(color=color),
+                    name=name,
+                    legendgroup=group,
+                    showlegend=False,
+                )
+            )
+
+    fig.update_layout(
+        title={
+            "text": f"Distribution of {column_names_dict[selected_series]}",
+            "y": 0.95,
+            "x": 0.5,
+            "xanchor": "center",
+            "yanchor": "top",
+            "font": {"size": 18},
+        },
+        yaxis_title="",
+        xaxis_title={"text": column_names_dict[selected_series], "font": {"size": 14}},
+        legend_title_text="",
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        margin=dict(l=50, r=50, t=80, b=50),
+        template="simple_white",
+        uirevision="violin-plot",
+        yaxis=dict(
+            range=[-0.5, 0.5],
+            showgrid=False,
+            zeroline=False,
+            showline=False,
+            showticklabels=False,
+        ),
+    )
+
+    return fig
+
+
 def distribution_histogram_plot_plotly(
     per_base_df: pd.DataFrame,
     selected_series: str,
@@ -309,6 +546,8 @@ def distribution_histogram_plot_plotly(
     if selected_series not in column_names_dict:
         return _empty_fig()
 
+    import plotly.express as px
+
     fig = px.histogram(
         per_base_df,
         x=selected_series,
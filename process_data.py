@@ -1,6 +1,5 @@
 import numpy as np
 import pandas as pd
-import scipy.stats as stats
 
 from shared import COMPLEMENT
 
@@ -41,6 +40,43 @@ aggregation_columns = [
     "deletions",
 ]
 
+# Storage dtypes for compact mode (see compact_per_base_frame). Counts become
+# int32, derived metrics float32, and the low-cardinality string columns
+# categoricals. The mean/std aggregations upcast float32 columns to float64
+# first (see _float64_metrics), so only the stored per-position values lose
+# precision.
+compact_dtypes = {
+    "pos": "int32",
+    "reads_all": "int32",
+    "matches": "int32",
+    "mismatches": "int32",
+    "deletions": "int32",
+    "insertions": "int32",
+    "A": "int32",
+    "C": "int32",
+    "G": "int32",
+    "T": "int32",
+    "codon_number": "int32",
+    "n_variants": "int32",
+    "n_indels": "int32",
+    "n_total": "int32",
+    "max_variant_base": "int32",
+    "alignment_mismatch": "int8",
+    "aligned_ref_code": "uint8",
+    "is_selected": "bool",
+    "alignment_gap": "bool",
+    "variant_fraction": "float32",
+    "variant_fraction_percent": "float32",
+    "indel_fraction": "float32",
+    "indel_substitution_ratio": "float32",
+    "entropy": "float32",
+    "effective_entropy": "float32",
+    "percent_of_max_entropy": "float32",
+    "expected_variant_codons": "float32",
+    "expected_ref_n": "float32",
+    "ref": "category",
+}
+
 
 # Helper functions for data processing
 def compute_n_variants(df: pd.DataFrame, bases: np.ndarray | None = None) -> pd.Series:
@@ -55,6 +91,8 @@ def compute_entropy(df: pd.DataFrame, bases: np.ndarray | None = None) -> np.nda
     """Vectorized Shannon entropy across all rows."""
     if bases is None:
         bases = df[["A", "C", "G", "T"]].to_numpy()
+    from scipy import stats
+
     return stats.entropy(bases.astype(float), axis=1)
 
 
@@ -69,30 +107,46 @@ def compute_effective_entropy(df: pd.DataFrame, bases: np.ndarray | None = None)
     filtered = np.where(bases_f == max_vals, 0, bases_f)
     # Zero out counts below 3
     filtered = np.where(filtered < 3, 0, filtered)
+    from scipy import stats
+
     return stats.entropy(filtered, axis=1)
 
 
-def _extract_ref_base_from_aligned(aligned_val: str) -> str | None:
-    """Extract the true reference base from an aligned_ref value.
+# Aligned reference encoding: ``aligned_ref_code`` is the ASCII code of the
+# reference base aligned to each row (0 where there is none), with the
+# ``alignment_mismatch`` and ``alignment_gap`` flags alongside. The display
+# strings ("A", "[A]" for a mismatch, "-" for a gap/no-call) are only built by
+# ``aligned_ref_labels`` when the table or CSV export needs them.
+_base_column_index = np.full(256, -1, dtype=np.int8)
+for _i, _b in enumerate("ACGT"):
+    _base_column_index[ord(_b)] = _i
 
-    aligned_ref encoding:
-      - plain base char (e.g. 'A') = match
-      - '[X]' = mismatch where X is the ref base
-      - '-' = gap / no-call
+_aligned_match_labels = np.array([chr(c) for c in range(256)], dtype=object)
+_aligned_match_labels[0] = "-"
+_aligned_mismatch_labels = np.array([f"[{chr(c)}]" for c in range(256)], dtype=object)
 
-    Returns the ref base character, or None for gaps/no-call.
-    """
-    if aligned_val == "-":
-        return None
-    if aligned_val.startswith("[") and aligned_val.endswith("]"):
-        return aligned_val[1:-1]
-    return aligned_val
+
+def aligned_ref_labels(per_base_df: pd.DataFrame) -> np.ndarray:
+    """Display strings for the aligned reference, as an object array."""
+    codes = per_base_df["aligned_ref_code"].to_numpy()
+    mismatch = per_base_df["alignment_mismatch"].to_numpy() != 0
+    labels = np.where(mismatch, _aligned_mismatch_labels[codes], _aligned_match_labels[codes])
+    labels[per_base_df["alignment_gap"].to_numpy()] = "-"
+    return labels
+
+
+def with_aligned_ref(per_base_df: pd.DataFrame) -> pd.DataFrame:
+    """Add the display-only ``aligned_ref`` column (tabular view, CSV export)."""
+    if "aligned_ref_code" not in per_base_df.columns:
+        return per_base_df
+    return per_base_df.assign(aligned_ref=aligned_ref_labels(per_base_df))
 
 
 def compute_max_non_ref_base(
     df: pd.DataFrame,
     bases: np.ndarray | None = None,
     ref_bases: np.ndarray | None = None,
+    ref_codes: np.ndarray | None = None,
 ) -> np.ndarray:
     """Vectorized max non-reference base count.
 
@@ -102,44 +156,59 @@ def compute_max_non_ref_base(
         ref_bases: Optional array of reference bases per row. When provided,
             these are used to determine which base to zero out (for aligned
             reference). When None, falls back to df["ref"].
+        ref_codes: Optional ASCII codes of the reference base per row (as in
+            ``aligned_ref_code``); takes precedence over ``ref_bases``.
     """
     if bases is None:
         bases = df[["A", "C", "G", "T"]].to_numpy()
-    base_cols = np.array(["A", "C", "G", "T"])
-
-    if ref_bases is not None:
-        ref_vals = ref_bases
-    else:
-        ref_vals = df["ref"].to_numpy()
 
     # Build a mask where each row's reference base column is True
-    ref_mask = ref_vals[:, None] == base_cols[None, :]
+    if ref_codes is not None:
+        ref_mask = _base_column_index[ref_codes][:, None] == np.arange(4)[None, :]
+    else:
+        base_cols = np.array(["A", "C", "G", "T"])
+        ref_vals = ref_bases if ref_bases is not None else df["ref"].to_numpy()
+        ref_mask = ref_vals[:, None] == base_cols[None, :]
 
     # Zero out the reference base, then take the max
     non_ref = np.where(ref_mask, 0, bases)
     return non_ref.max(axis=1)
 
 
-def process_per_base_file(
-    per_base_df: pd.DataFrame,
-    reverse_complement: bool,
-    origin_shift: int = 0,
+def compact_per_base_frame(per_base_df: pd.DataFrame) -> pd.DataFrame:
+    """Return ``per_base_df`` with columns cast to their ``compact_dtypes``.
+
+    Columns not listed in ``compact_dtypes`` (e.g. ``low_conf`` or extra
+    columns from the upload) are left as they are.
+    """
+    dtypes = {
+        col: dtype
+        for col, dtype in compact_dtypes.items()
+        if col in per_base_df.columns and str(per_base_df[col].dtype) != dtype
+    }
+    if not dtypes:
+        return per_base_df
+    return per_base_df.astype(dtypes)
+
+
+def compute_per_position_metrics(
+    per_base_df: pd.DataFrame, sequence_length: int
 ) -> pd.DataFrame:
-    if per_base_df.empty:
-        return pd.DataFrame()
+    """Add the derived per-position metric columns to a copy of ``per_base_df``.
 
+    Every metric depends only on its own row except through ``sequence_length``
+    (via the subpool codon fraction), so this can run on any slice of a table
+    as long as the full table's sequence length is passed in.
+    """
     per_base_df = per_base_df.copy()
 
-    # Set the sequence length
-    sequence_length = per_base_df["pos"].max()
-
     selected_codon_range = range(0, sequence_length // 3)
 
     subpool_codon_fraction = 1 / (len(selected_codon_range) + 1)
 
     per_base_df["codon_number"] = per_base_df["pos"] // 3
 
-    per_base_df["is_selected"] = [True] * len(per_base_df)
+    per_base_df["is_selected"] = True
 
     bases = per_base_df[["A", "C", "G", "T"]].to_numpy()
 
@@ -183,9 +252,32 @@ def process_per_base_file(
 
     per_base_df["percent_of_max_entropy"] = per_base_df["effective_entropy"] / np.log(3)
 
-    # Create empty columns for alignment to start
-    per_base_df["aligned_ref"] = ["-"] * len(per_base_df)
-    per_base_df["alignment_mismatch"] = [0] * len(per_base_df)
+    # Create empty columns for alignment to start (no aligned reference base)
+    per_base_df["aligned_ref_code"] = np.uint8(0)
+    per_base_df["alignment_gap"] = True
+    per_base_df["alignment_mismatch"] = 0
+
+    return per_base_df
+
+
+def process_per_base_file(
+    per_base_df: pd.DataFrame,
+    reverse_complement: bool,
+    origin_shift: int = 0,
+    compact: bool = False,
+) -> pd.DataFrame:
+    """Compute the per-position QC metrics for a parsed per-base table.
+
+    With ``compact=True`` the result is cast via ``compact_per_base_frame``,
+    roughly halving the frame's memory footprint.
+    """
+    if per_base_df.empty:
+        return pd.DataFrame()
+
+    # Set the sequence length
+    sequence_length = per_base_df["pos"].max()
+
+    per_base_df = compute_per_position_metrics(per_base_df, sequence_length)
 
     # Apply origin shift (before reverse complement so they compose correctly)
     if origin_shift > 0:
@@ -207,9 +299,50 @@ def process_per_base_file(
         # Reverse complement reference base
         per_base_df["ref"] = per_base_df["ref"].map(COMPLEMENT)
 
+    if compact:
+        per_base_df = compact_per_base_frame(per_base_df)
+
     return per_base_df
 
 
+def merge_ranges(selected_range_list: list[tuple[int, int]]) -> np.ndarray:
+    """Union of (start, end) ranges as sorted, disjoint rows of an (m, 2) array.
+
+    Overlapping or touching ranges are merged and empty ones dropped, so the
+    row lengths sum to the number of selected positions.
+    """
+    ranges = np.asarray(selected_range_list, dtype=np.int64).reshape(-1, 2)
+    ranges = ranges[ranges[:, 1] > ranges[:, 0]]
+    if len(ranges) == 0:
+        return ranges
+    ranges = ranges[np.argsort(ranges[:, 0], kind="stable")]
+    # A range starts a new group when it begins after every earlier range ends
+    running_end = np.maximum.accumulate(ranges[:, 1])
+    group_starts = np.flatnonzero(np.r_[True, ranges[1:, 0] > running_end[:-1]])
+    return np.column_stack(
+        [ranges[group_starts, 0], np.maximum.reduceat(ranges[:, 1], group_starts)]
+    )
+
+
+def ranges_mask(pos: np.ndarray, merged_ranges: np.ndarray) -> np.ndarray:
+    """Boolean mask of ``start < pos <= end`` for the output of ``merge_ranges``.
+
+    Built with a difference array over ``pos.min()..pos.max()``: +1 where each
+    range begins, -1 past where it ends, and a cumulative sum. O(n + k).
+    """
+    if len(pos) == 0 or len(merged_ranges) == 0:
+        return np.zeros(len(pos), dtype=bool)
+    low = int(pos.min())
+    span = int(pos.max()) - low + 1
+    # Position p sits at index p - low; a range covers start + 1 .. end.
+    bounds = np.clip(merged_ranges + 1 - low, 0, span)
+    diff = np.bincount(bounds[:, 0], minlength=span + 1) - np.bincount(
+        bounds[:, 1], minlength=span + 1
+    )
+    covered = np.cumsum(diff[:span]) > 0
+    return covered[pos - low]
+
+
 def update_per_base_df(
     per_base_df: pd.DataFrame,
     selected_range_list: list[tuple[int, int]],
@@ -218,14 +351,12 @@ def update_per_base_df(
     if per_base_df.empty:
         return per_base_df
 
-    # Build a vectorized boolean mask from the list of (start, end) ranges.
     # start is 0-based (GenBank), end is half-open. pos is 1-based inclusive.
-    # So: pos >= start + 1 AND pos <= end  (i.e. pos < end + 1)
-    mask = pd.Series(False, index=per_base_df.index)
-    total_selected = 0
-    for start, end in selected_range_list:
-        mask |= (per_base_df["pos"] >= start + 1) & (per_base_df["pos"] <= end)
-        total_selected += end - start
+    # So: pos >= start + 1 AND pos <= end. Overlapping ranges (e.g. nested
+    # GenBank features) are merged first so they are not counted twice.
+    merged = merge_ranges(selected_range_list)
+    mask = ranges_mask(per_base_df["pos"].to_numpy(), merged)
+    total_selected = int((merged[:, 1] - merged[:, 0]).sum())
 
     subpool_codon_fraction = 3 / (total_selected + 1)
 
@@ -243,6 +374,19 @@ def update_per_base_df(
     )
 
 
+def _float64_metrics(processed_per_base_df: pd.DataFrame) -> pd.DataFrame:
+    """The frame's aggregated columns (and ``is_selected``), float32 ones as float64.
+
+    Keeps compact frames from yielding float32 means and stds.
+    """
+    columns = [*aggregation_columns, "is_selected"]
+    metrics = processed_per_base_df[
+        [col for col in columns if col in processed_per_base_df.columns]
+    ]
+    upcast = {col: "float64" for col in metrics.columns if metrics[col].dtype == np.float32}
+    return metrics.astype(upcast) if upcast else metrics
+
+
 def process_full_mean_values(processed_per_base_df: pd.DataFrame) -> pd.DataFrame:
     # Define the expected columns and multi-index structure
     multi_cols = pd.MultiIndex.from_product([aggregation_columns, ["mean", "std"]])
@@ -257,7 +401,7 @@ def process_full_mean_values(processed_per_base_df: pd.DataFrame) -> pd.DataFram
 
     # Aggregate over the full series (no groupby) — produces index ["mean", "std"],
     # columns = metric names
-    agg_result = processed_per_base_df.agg(aggregation_functions)
+    agg_result = _float64_metrics(processed_per_base_df).agg(aggregation_functions)
 
     # Build a single-row DataFrame with flattened column names like "n_total_mean"
     row_data = {}
@@ -285,8 +429,10 @@ def update_mean_values_per_base(
             columns=multi_cols,
         )
 
+    metrics = _float64_metrics(processed_per_base_df)
+
     # Perform the groupby aggregation for selected vs unselected
-    means = processed_per_base_df.groupby("is_selected").agg(aggregation_functions)
+    means = metrics.groupby("is_selected").agg(aggregation_functions)
     means.columns = means.columns.map("_".join)
 
     # Flatten
@@ -296,7 +442,7 @@ def update_mean_values_per_base(
     means = means.reindex(["selected", "unselected"], fill_value=np.nan)
 
     # Also compute full-series means and concatenate
-    agg_result = processed_per_base_df.agg(aggregation_functions)
+    agg_result = metrics.agg(aggregation_functions)
     row_data = {}
     for col in aggregation_columns:
         for stat in ["mean", "std"]:
@@ -1,8 +1,80 @@
-from Bio import Align, SeqIO
 import numpy as np
 import pandas as pd
 
-from process_data import _extract_ref_base_from_aligned, compute_max_non_ref_base
+from anchored_alignment import anchored_alignment
+from process_data import compute_max_non_ref_base
+
+
+def _global_aligner():
+    """The scoring scheme used for reference-to-data alignment (a ``PairwiseAligner``)."""
+    from Bio import Align
+
+    aligner = Align.PairwiseAligner()
+    aligner.mode = "global"
+    aligner.match_score = 2
+    aligner.mismatch_score = -1
+    aligner.open_gap_score = -10
+    aligner.extend_gap_score = -0.5
+    return aligner
+
+
+def align_sequences(reference_sequence: str, data_sequence: str):
+    """Best alignment of the data sequence (row 1) to the reference (row 0).
+
+    Tries the k-mer anchored aligner first, which is near-linear for the nearly
+    identical sequences we expect, and falls back to a full global alignment
+    when anchoring fails. Returns None if neither produces an alignment.
+    """
+    aligner = _global_aligner()
+    alignment = anchored_alignment(reference_sequence, data_sequence, aligner)
+    if alignment is not None:
+        return alignment
+
+    alignments = aligner.align(reference_sequence, data_sequence)
+    try:
+        return alignments[0]
+    except (IndexError, OverflowError):
+        return None
+
+
+def aligned_reference_arrays(
+    coordinates: np.ndarray, reference_sequence: str, data_sequence: str
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Per data position: aligned reference base, mismatch flag and gap flag.
+
+    Works directly on the alignment ``coordinates`` (row 0 reference, row 1
+    data) instead of the gapped strings. Reference bases aligned to nothing in
+    the data are skipped; data positions aligned to nothing in the reference
+    are gaps.
+
+    Returns:
+        ``(ref_codes, mismatch, gap)``: uint8 ASCII code of the aligned
+        reference base (0 at gaps), and bool arrays, each of length
+        ``len(data_sequence)``.
+    """
+    coordinates = np.asarray(coordinates)
+    ref_bytes = np.frombuffer(reference_sequence.encode("ascii", "replace"), dtype=np.uint8)
+    data_bytes = np.frombuffer(data_sequence.encode("ascii", "replace"), dtype=np.uint8)
+
+    # Aligned blocks are the steps where both sequences advance
+    steps = np.diff(coordinates, axis=1)
+    aligned = (steps[0] > 0) & (steps[1] > 0)
+    ref_starts = coordinates[0, :-1][aligned]
+    data_starts = coordinates[1, :-1][aligned]
+    lengths = steps[1][aligned]
+
+    # Expand the blocks into per-position indices without a Python loop
+    block_offsets = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    within = np.arange(lengths.sum()) - block_offsets
+    data_index = np.repeat(data_starts, lengths) + within
+    ref_index = np.repeat(ref_starts, lengths) + within
+
+    ref_codes = np.zeros(len(data_bytes), dtype=np.uint8)
+    ref_codes[data_index] = ref_bytes[ref_index]
+    gap = np.ones(len(data_bytes), dtype=bool)
+    gap[data_index] = False
+    mismatch = ~gap & (ref_codes != data_bytes)
+    return ref_codes, mismatch, gap
 
 
 def align_ref_to_variants(
@@ -15,65 +87,31 @@ def align_ref_to_variants(
         return per_base_df
 
     df_ref_sequence = "".join(per_base_df["ref"])
+    if len(df_ref_sequence) != len(per_base_df):
+        return per_base_df
 
     try:
-        aligner = Align.PairwiseAligner()
-        aligner.mode = "global"
-        aligner.match_score = 2
-        aligner.mismatch_score = -1
-        aligner.open_gap_score = -10
-        aligner.extend_gap_score = -0.5
-
-        alignments = aligner.align(reference_sequence, df_ref_sequence)
-
-        try:
-            best_alignment = alignments[0]
-        except (IndexError, OverflowError):
+        best_alignment = align_sequences(reference_sequence, df_ref_sequence)
+        if best_alignment is None:
             return per_base_df
 
-        ref_aligned = str(best_alignment[0])
-        df_aligned = str(best_alignment[1])
-
-        # Build aligned_ref and alignment_mismatch by iterating the full alignment.
-        # Track df position separately to handle gaps without zip truncation.
-        adjusted_aligned_seq = []
-        mismatch_flags = []
-        df_pos = 0
-
-        for ref_base, df_base in zip(ref_aligned, df_aligned):
-            if df_base == "-":
-                # Insertion in reference (deletion in data) — skip this position
-                continue
-            elif ref_base == "-":
-                # Deletion in reference (insertion in data) — mark as gap
-                adjusted_aligned_seq.append("-")
-                mismatch_flags.append(0)
-                df_pos += 1
-            elif ref_base != df_base:
-                # Mismatch — mark with brackets
-                adjusted_aligned_seq.append(f"[{ref_base}]")
-                mismatch_flags.append(1)
-                df_pos += 1
-            else:
-                # Match
-                adjusted_aligned_seq.append(ref_base)
-                mismatch_flags.append(0)
-                df_pos += 1
-
-        # Only write back if lengths match; otherwise leave placeholder values
-        if len(adjusted_aligned_seq) == len(per_base_df):
-            per_base_df["aligned_ref"] = adjusted_aligned_seq
-            per_base_df["alignment_mismatch"] = mismatch_flags
-
-            # Recompute max_variant_base from the aligned reference
-            bases = per_base_df[["A", "C", "G", "T"]].to_numpy()
-            ref_bases = np.array([
-                _extract_ref_base_from_aligned(v) or ""
-                for v in adjusted_aligned_seq
-            ])
-            per_base_df["max_variant_base"] = compute_max_non_ref_base(
-                per_base_df, bases=bases, ref_bases=ref_bases
-            )
+        ref_codes, mismatch, gap = aligned_reference_arrays(
+            best_alignment.coordinates, reference_sequence, df_ref_sequence
+        )
+
+        mismatch_dtype = (
+            per_base_df["alignment_mismatch"].dtype
+            if "alignment_mismatch" in per_base_df.columns
+            else np.int64
+        )
+        per_base_df["aligned_ref_code"] = ref_codes
+        per_base_df["alignment_gap"] = gap
+        per_base_df["alignment_mismatch"] = mismatch.astype(mismatch_dtype)
+
+        # Recompute max_variant_base from the aligned reference
+        per_base_df["max_variant_base"] = compute_max_non_ref_base(
+            per_base_df, ref_codes=ref_codes
+        ).astype(per_base_df["max_variant_base"].dtype, copy=False)
     except Exception:
         pass
 
@@ -82,6 +120,8 @@ def align_ref_to_variants(
 
 def process_reference_fasta(file) -> dict[str, dict | None] | None:
 
+    from Bio import SeqIO
+
     try:
         fasta_record = list(SeqIO.parse(file[0]["datapath"], "fasta"))
     except Exception:
@@ -97,6 +137,8 @@ def process_reference_fasta(file) -> dict[str, dict | None] | None:
 
 
 def process_reference_genbank(file) -> dict[str, dict | None] | None:
+    from Bio import SeqIO
+
     try:
         genbank_record = list(SeqIO.parse(file[0]["datapath"], "genbank"))
     except Exception:
@@ -124,3 +166,16 @@ def process_reference_genbank(file) -> dict[str, dict | None] | None:
             continue
 
     return {"sequence": sequence, "features": features_dict}
+
+
+def process_reference_file(file) -> dict[str, dict | None] | None:
+    """Parse a FASTA or GenBank reference, dispatching on the file name extension.
+
+    Returns None for unrecognised extensions or files that fail to parse.
+    """
+    name = file[0]["name"]
+    if name.endswith((".fa", ".fasta")):
+        return process_reference_fasta(file)
+    if name.endswith((".gb", ".genbank", ".gbk")):
+        return process_reference_genbank(file)
+    return None
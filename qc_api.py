@@ -0,0 +1,338 @@
+"""Headless HTTP QC API: the pipeline of ``pipeline.run_qc`` without the UI.
+
+POST /api/qc takes a multipart form with a ``per_base`` file, an optional
+``reference`` (FASTA/GenBank) file and optional fields, given in the form or
+the query string:
+
+* ``ranges``: selection ranges, "start-end;start-end" (as in batch_qc.py);
+* ``features``: GenBank feature names to select, "name;name";
+* ``reverse_complement``, ``auto_orient``: "true"/"false";
+* ``origin_shift``: integer;
+* ``format``: ``json`` (default), ``csv`` or ``arrow``;
+* ``table``: for CSV and Arrow, ``processed`` (default), ``means`` or ``tests``.
+
+JSON returns the means, the tests and the processed table (pandas "split"
+layout) in one object. CSV and Arrow return one table; the processed table is
+streamed in chunks as in the app's downloads (see exports.py).
+
+Uploads are written to a temporary directory as they arrive (Starlette
+spools multipart parts to disk) and deleted after the run. Runs go to
+``qc_pool``, a few dedicated threads with a bounded queue, so API load never
+occupies the worker threads the interactive sessions use; beyond
+``max_pending`` runs, requests get a 503 right away. ``qc_pool.stats()`` is
+served at /metrics/api (see asgi.py).
+
+Example:
+    curl -F per_base=@sample.tsv -F reference=@backbone.gb -F ranges=100-400 \\
+        "http://localhost:8080/api/qc?format=csv&table=tests"
+
+Session isolation: ``qc_pool`` holds only counters and its threads.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+from starlette.datastructures import UploadFile
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from exports import aiter_in_thread, iter_arrow_chunks, iter_csv_chunks
+from pipeline import QCResult, load_reference, parse_ranges, run_qc, selection_ranges
+from process_data import with_aligned_ref
+from session_memory import upload_rejection
+
+default_workers = 1
+default_max_pending = 4
+latency_window = 1000
+# Bytes copied from an upload per read
+upload_chunk_bytes = 1 << 20
+
+formats = {
+    "json": "application/json",
+    "csv": "text/csv",
+    "arrow": "application/vnd.apache.arrow.file",
+}
+tables = ("processed", "means", "tests")
+
+
+class QCPoolFull(RuntimeError):
+    """Raised when accepting a run would exceed ``max_pending`` runs."""
+
+
+class QCWorkerPool:
+    """Dedicated threads for API QC runs, with a bounded queue and statistics.
+
+    Args:
+        workers: Runs executed at once.
+        max_pending: Runs that may be queued or running at once.
+    """
+
+    def __init__(
+        self, workers: int = default_workers, max_pending: int = default_max_pending
+    ) -> None:
+        self.workers = workers
+        self.max_pending = max(max_pending, workers)
+        self._lock = threading.Lock()
+        self._executor: concurrent.futures.ThreadPoolExecutor | None = None
+        self._pending = 0
+        self._latencies: deque[float] = deque(maxlen=latency_window)
+        self._counts = {"runs": 0, "errors": 0, "rejected": 0}
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run ``fn(*args)`` on a pool thread and return its result.
+
+        Raises:
+            QCPoolFull: ``max_pending`` runs are already queued or running.
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._counts["rejected"] += 1
+                raise QCPoolFull(
+                    f"The QC API is busy ({self._pending} runs in progress); try again shortly."
+                )
+            self._pending += 1
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    self.workers, thread_name_prefix="qc-api"
+                )
+            executor = self._executor
+        start = time.perf_counter()
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+        except BaseException:
+            with self._lock:
+                self._counts["errors"] += 1
+            raise
+        finally:
+            with self._lock:
+                self._pending -= 1
+        with self._lock:
+            self._latencies.append(time.perf_counter() - start)
+            self._counts["runs"] += 1
+        return result
+
+    def stats(self) -> dict[str, Any]:
+        """Counters, queue depth and run latency percentiles in milliseconds."""
+        with self._lock:
+            latencies = np.array(self._latencies) * 1000
+            stats: dict[str, Any] = {
+                **self._counts,
+                "pending": self._pending,
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+            }
+        if len(latencies):
+            p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+            stats["latency_ms"] = {
+                "count": len(latencies),
+                "p50": round(float(p50), 1),
+                "p90": round(float(p90), 1),
+                "p99": round(float(p99), 1),
+                "max": round(float(latencies.max()), 1),
+            }
+        else:
+            stats["latency_ms"] = {"count": 0}
+        return stats
+
+
+def _flag(value: str | None) -> bool:
+    return str(value).strip().lower() in ("1", "true", "yes", "on")
+
+
+def qc_options(params: dict[str, str]) -> dict[str, Any]:
+    """Keyword arguments of ``run_api_qc`` from request fields.
+
+    Raises:
+        ValueError: If a field is malformed.
+    """
+    try:
+        ranges = parse_ranges(params.get("ranges", ""))
+        origin_shift = int(params.get("origin_shift") or 0)
+    except ValueError as exc:
+        raise ValueError(f"Invalid ranges or origin_shift: {exc}") from exc
+    return {
+        "ranges": ranges,
+        "features": [name.strip() for name in params.get("features", "").split(";") if name.strip()],
+        "reverse_complement": _flag(params.get("reverse_complement")),
+        "origin_shift": origin_shift,
+        "auto_orient": _flag(params.get("auto_orient")),
+    }
+
+
+def run_api_qc(
+    per_base_path: Path,
+    reference_path: Path | None,
+    ranges: list[tuple[int, int]],
+    features: list[str],
+    reverse_complement: bool,
+    origin_shift: int,
+    auto_orient: bool,
+) -> QCResult:
+    """Load the reference, resolve the selection and run the pipeline."""
+    reference = load_reference(reference_path) if reference_path else None
+    return run_qc(
+        per_base_path,
+        reference=reference,
+        reverse_complement=reverse_complement,
+        origin_shift=origin_shift,
+        selected_ranges=selection_ranges(reference, ranges, features) or None,
+        auto_orient=auto_orient,
+    )
+
+
+def json_body(result: QCResult) -> bytes:
+    """Means, tests and the processed table as one JSON object."""
+    return b"".join(
+        [
+            b'{"means":',
+            result.means.to_json(orient="index").encode(),
+            b',"tests":',
+            result.tests.to_json(orient="index").encode(),
+            b',"processed":',
+            with_aligned_ref(result.processed).to_json(orient="split", index=False).encode(),
+            b"}",
+        ]
+    )
+
+
+def summary_frame(result: QCResult, table: str) -> pd.DataFrame:
+    """The means or tests of ``result`` with the index as the first column."""
+    if table == "means":
+        return result.means.reset_index(names="group")
+    return result.tests.reset_index(names="metric")
+
+
+async def _save_upload(upload: UploadFile, directory: Path) -> Path:
+    """Copy an upload into ``directory`` under its own file name."""
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / (Path(upload.filename or "upload").name or "upload")
+    with open(path, "wb") as handle:
+        while chunk := await upload.read(upload_chunk_bytes):
+            handle.write(chunk)
+    return path
+
+
+def error_response(status: int, message: str, **headers: str) -> JSONResponse:
+    return JSONResponse({"error": message}, status_code=status, headers=headers or None)
+
+
+def output_format(params: dict[str, str]) -> tuple[str, str]:
+    """(format, table) requested in ``params``.
+
+    Raises:
+        ValueError: If either is not supported.
+    """
+    fmt = params.get("format", "json")
+    table = params.get("table", "processed")
+    if fmt not in formats:
+        raise ValueError(f"format must be one of: {', '.join(formats)}")
+    if table not in tables:
+        raise ValueError(f"table must be one of: {', '.join(tables)}")
+    return fmt, table
+
+
+async def receive_upload(
+    request: Request, params: dict[str, str], directory: Path
+) -> tuple[Path, Path | None, dict[str, Any]]:
+    """Save a QC request's uploads in ``directory`` and parse its options.
+
+    Form fields are merged into ``params``, overriding the query string.
+
+    Returns:
+        (per-base table path, reference path or None, ``run_api_qc`` options).
+
+    Raises:
+        ValueError: If the per-base upload is missing or a field is malformed.
+    """
+    async with request.form(max_files=2) as form:
+        upload = form.get("per_base")
+        if not isinstance(upload, UploadFile):
+            raise ValueError("Upload the per-base table as the 'per_base' form field")
+        params.update({key: value for key, value in form.items() if isinstance(value, str)})
+        options = qc_options(params)
+        per_base_path = await _save_upload(upload, directory)
+        reference = form.get("reference")
+        reference_path = None
+        if isinstance(reference, UploadFile):
+            # Own directory, in case both uploads have the same name
+            reference_path = await _save_upload(reference, directory / "reference")
+    return per_base_path, reference_path, options
+
+
+def table_response(result: QCResult, fmt: str, table: str, stem: str) -> StreamingResponse:
+    """One table of ``result`` as a streamed CSV or Arrow download."""
+    filename = f"{stem}_{table}.{fmt}"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if table == "processed":
+        processed = result.processed
+        if fmt == "csv":
+            columns = list(with_aligned_ref(processed.iloc[:1]).columns)
+            chunks = iter_csv_chunks(processed, columns)
+        else:
+            chunks = iter_arrow_chunks(processed)
+    else:
+        frame = summary_frame(result, table)
+        chunks = iter([frame.to_csv(index=False)]) if fmt == "csv" else iter_arrow_chunks(frame)
+    return StreamingResponse(aiter_in_thread(chunks), media_type=formats[fmt], headers=headers)
+
+
+async def qc(request: Request) -> Response:
+    """Run QC on an uploaded per-base file; see the module docstring."""
+    params = dict(request.query_params)
+    with tempfile.TemporaryDirectory(prefix="dimple-api-") as tmp:
+        try:
+            per_base_path, reference_path, options = await receive_upload(
+                request, params, Path(tmp)
+            )
+            # After receive_upload, which merges the form fields into params
+            fmt, table = output_format(params)
+        except ValueError as exc:
+            return error_response(400, str(exc))
+
+        rejection = upload_rejection(per_base_path.stat().st_size)
+        if rejection is not None:
+            return error_response(503, rejection, **{"Retry-After": "60"})
+
+        def run() -> QCResult | bytes:
+            result = run_api_qc(per_base_path, reference_path, **options)
+            return json_body(result) if fmt == "json" else result
+
+        try:
+            result = await qc_pool.run(run)
+        except QCPoolFull as exc:
+            return error_response(503, str(exc), **{"Retry-After": "5"})
+        except ValueError as exc:
+            return error_response(422, str(exc))
+
+    if fmt == "json":
+        return Response(result, media_type=formats["json"])
+    return table_response(result, fmt, table, per_base_path.stem)
+
+
+async def api_metrics(_request: Request) -> JSONResponse:
+    """Queue depth, counters and latency percentiles of the QC API's pool."""
+    return JSONResponse(qc_pool.stats())
+
+
+routes = [
+    Route("/api/qc", qc, methods=["POST"]),
+    Route("/metrics/api", api_metrics, methods=["GET"]),
+]
+
+qc_pool = QCWorkerPool(
+    workers=int(os.environ.get("DIMPLE_API_WORKERS", default_workers)),
+    max_pending=int(os.environ.get("DIMPLE_API_MAX_PENDING", default_max_pending)),
+)
@@ -0,0 +1,418 @@
+"""Asynchronous QC jobs for inputs too slow for one request or browser session.
+
+POST /api/jobs takes the same multipart form and fields as POST /api/qc (see
+qc_api.py) and answers 202 with a job id at once. The job then runs in a
+process pool, and everything about it is kept on disk under
+``DIMPLE_JOB_DIR``, so it outlives the request, the session and the server:
+
+    jobs.sqlite3        one row per job: status, stage, timestamps, options,
+                        error, and the frame-cache keys of its frames
+    <id>/input/         the uploaded per-base table (and reference/)
+    <id>/*.parquet      the parsed and aligned frames (as the app caches
+                        them) and the processed, means and tests results
+
+GET /api/jobs/{id} reports a job's status and stage. GET /api/jobs/{id}/result
+returns its results with the ``format`` and ``table`` of /api/qc (409 until
+the job is done). Finished jobs can also be loaded into the Shiny UI by id:
+``load_job_frames`` puts the parsed and processed frames into
+``result_cache.frame_cache`` under the keys the session will look up, so the
+session reads them instead of recomputing them.
+
+Jobs that were queued or running when their server exited are marked as
+failed on the next start; resubmit them. Each job records the boot token of
+the server process that accepted it, a random id drawn at startup, so a
+restarted server recognizes its predecessor's jobs even when it gets the same
+PID (as it does as a container's entrypoint). Each server needs its own
+``DIMPLE_JOB_DIR``.
+
+Session isolation: ``job_queue`` holds only the store's location and the
+process pool; jobs are reachable only by their random 128-bit ids.
+"""
+
+from __future__ import annotations
+
+import json
+import multiprocessing
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import closing
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from per_base_io import preflight_per_base_table
+from pipeline import (
+    QCResult,
+    RunControl,
+    load_reference,
+    process_and_align,
+    read_validated_per_base_table,
+    resolve_orientation,
+    select_and_test,
+    selection_ranges,
+)
+from qc_api import (
+    QCPoolFull,
+    error_response,
+    formats,
+    json_body,
+    output_format,
+    qc_pool,
+    receive_upload,
+    table_response,
+)
+from result_cache import file_digest, frame_cache, processed_cache_key
+
+default_job_dir = Path(tempfile.gettempdir()) / "dimple-qc-jobs"
+default_job_workers = 1
+
+_job_id_pattern = re.compile(r"[0-9a-f]{32}")
+
+_schema = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    stage TEXT,
+    per_base_name TEXT NOT NULL,
+    options TEXT NOT NULL,
+    created REAL NOT NULL,
+    started REAL,
+    finished REAL,
+    error TEXT,
+    settings TEXT,
+    parsed_key TEXT,
+    processed_key TEXT,
+    server_token TEXT NOT NULL
+)
+"""
+_json_fields = ("options", "settings", "parsed_key", "processed_key")
+
+
+class JobStore:
+    """Job records in SQLite plus each job's files, under ``root``.
+
+    Every call opens its own connection, so the store can be used from the
+    server's threads and from the pool's worker processes alike.
+
+    Args:
+        root: Directory of the database and the jobs' files.
+        server_token: Boot token of the server process, recorded with the jobs
+            it creates. Worker processes, which only update jobs, pass None.
+    """
+
+    def __init__(self, root: str | Path, server_token: str | None = None) -> None:
+        self.root = Path(root)
+        self.server_token = server_token
+        self._db = self.root / "jobs.sqlite3"
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialized:
+            self.root.mkdir(parents=True, exist_ok=True)
+            with closing(sqlite3.connect(self._db, timeout=30)) as conn, conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(_schema)
+            self._initialized = True
+        conn = sqlite3.connect(self._db, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def job_dir(self, job_id: str) -> Path:
+        return self.root / job_id
+
+    def new_id(self) -> str:
+        return uuid.uuid4().hex
+
+    def create(self, job_id: str, per_base_name: str, options: dict[str, Any]) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT INTO jobs (id, status, stage, per_base_name, options, created, server_token)"
+                " VALUES (?, 'queued', 'Queued', ?, ?, ?, ?)",
+                (job_id, per_base_name, json.dumps(options), time.time(), self.server_token),
+            )
+
+    def get(self, job_id: str) -> dict[str, Any] | None:
+        """The job's record with its JSON fields decoded, or None if unknown."""
+        if not _job_id_pattern.fullmatch(job_id):
+            return None
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        for name in _json_fields:
+            if job[name] is not None:
+                job[name] = json.loads(job[name])
+        return job
+
+    def update(self, job_id: str, **fields: Any) -> None:
+        for name in _json_fields:
+            if name in fields:
+                fields[name] = json.dumps(fields[name])
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def recover(self) -> int:
+        """Fail the unfinished jobs of earlier server processes; how many there were."""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT id FROM jobs WHERE status IN ('queued', 'running') AND server_token != ?",
+                (self.server_token,),
+            ).fetchall()
+        orphans = [row["id"] for row in rows]
+        for job_id in orphans:
+            self.update(
+                job_id,
+                status="error",
+                finished=time.time(),
+                error="Interrupted by a server restart; submit the job again.",
+            )
+        return len(orphans)
+
+    def load_result(self, job_id: str) -> QCResult:
+        """The processed, means and tests frames of a finished job."""
+        directory = self.job_dir(job_id)
+        return QCResult(
+            processed=pd.read_parquet(directory / "processed.parquet"),
+            means=pd.read_parquet(directory / "means.parquet"),
+            tests=pd.read_parquet(directory / "tests.parquet"),
+        )
+
+
+def job_inputs(store: JobStore, job: dict[str, Any]) -> tuple[Path, Path | None]:
+    """(per-base table path, reference path or None) of a job."""
+    input_dir = store.job_dir(job["id"]) / "input"
+    references = sorted((input_dir / "reference").glob("*"))
+    return input_dir / job["per_base_name"], references[0] if references else None
+
+
+class _StoreControl(RunControl):
+    """Writes each stage the pipeline enters to the job's record."""
+
+    def __init__(self, store: JobStore, job_id: str) -> None:
+        super().__init__()
+        self._store = store
+        self._job_id = job_id
+
+    def enter(self, stage: str) -> None:
+        super().enter(stage)
+        self._store.update(self._job_id, stage=stage)
+
+
+def run_job(root: str, job_id: str) -> None:
+    """Worker entry point: run a stored job and store its results or error."""
+    store = JobStore(root)
+    job = store.get(job_id)
+    options = job["options"]
+    store.update(job_id, status="running", stage="Reading file", started=time.time())
+    try:
+        per_base_path, reference_path = job_inputs(store, job)
+        reference = load_reference(reference_path) if reference_path else None
+        ranges = selection_ranges(
+            reference, [tuple(r) for r in options["ranges"]], options["features"]
+        )
+        parsed = read_validated_per_base_table(per_base_path)
+        ref_seq, reverse_complement, origin_shift = resolve_orientation(
+            parsed,
+            reference,
+            options["reverse_complement"],
+            options["origin_shift"],
+            options["auto_orient"],
+        )
+        control = _StoreControl(store, job_id)
+        processed = process_and_align(
+            parsed, ref_seq, reverse_complement, origin_shift, control
+        )
+        control.enter("Running tests")
+        result = select_and_test(processed, ranges or None)
+
+        control.enter("Saving results")
+        directory = store.job_dir(job_id)
+        frames = {"parsed": parsed, "aligned": processed, **vars(result)}
+        for name, frame in frames.items():
+            frame.to_parquet(directory / f"{name}.parquet")
+        digest = file_digest(per_base_path)
+        store.update(
+            job_id,
+            status="done",
+            stage="Done",
+            finished=time.time(),
+            settings={
+                "reverse_complement": bool(reverse_complement),
+                "origin_shift": int(origin_shift),
+                "n_positions": int(parsed["pos"].max()),
+            },
+            parsed_key=["parsed", digest],
+            processed_key=list(
+                processed_cache_key(digest, ref_seq, reverse_complement, origin_shift)
+            ),
+        )
+    except Exception as exc:
+        store.update(
+            job_id, status="error", finished=time.time(), error=str(exc) or type(exc).__name__
+        )
+
+
+class JobQueue:
+    """A ``JobStore`` plus the process pool that runs its jobs.
+
+    Args:
+        root: Directory of the store.
+        workers: Jobs run at once, each in its own process.
+    """
+
+    def __init__(self, root: str | Path, workers: int = default_job_workers) -> None:
+        self.store = JobStore(root, server_token=uuid.uuid4().hex)
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._executor: ProcessPoolExecutor | None = None
+        self._recovered = False
+
+    def _ensure_recovered(self) -> None:
+        with self._lock:
+            if not self._recovered:
+                self._recovered = True
+                self.store.recover()
+
+    def get(self, job_id: str) -> dict[str, Any] | None:
+        self._ensure_recovered()
+        return self.store.get(job_id)
+
+    def submit(self, job_id: str) -> Future:
+        """Run the stored job ``job_id`` in the pool."""
+        self._ensure_recovered()
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            future = self._executor.submit(run_job, str(self.store.root), job_id)
+
+        def record_crash(done: Future) -> None:
+            # run_job records its own errors; this catches a dead worker process
+            if done.exception() is not None:
+                self.store.update(
+                    job_id, status="error", finished=time.time(), error=str(done.exception())
+                )
+
+        future.add_done_callback(record_crash)
+        return future
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+def public_record(job: dict[str, Any]) -> dict[str, Any]:
+    """The parts of a job's record that the API reports."""
+    fields = ("id", "status", "stage", "per_base_name", "options", "created", "started")
+    record = {name: job[name] for name in fields}
+    record.update(finished=job["finished"], error=job["error"], settings=job["settings"])
+    return record
+
+
+def load_job_frames(job_id: str, queue: JobQueue | None = None) -> dict[str, Any]:
+    """Put a finished job's frames into the frame cache and return its record.
+
+    The record gains ``per_base_path`` and ``reference_path``, the job's
+    stored inputs, for a session to open.
+
+    Raises:
+        ValueError: If there is no such job or it has not finished.
+    """
+    queue = queue or job_queue
+    job = queue.get(job_id)
+    if job is None:
+        raise ValueError(f"There is no QC job {job_id!r}.")
+    if job["status"] != "done":
+        raise ValueError(f"QC job {job_id} is not finished (status: {job['status']}).")
+    directory = queue.store.job_dir(job_id)
+    frame_cache.put(tuple(job["parsed_key"]), pd.read_parquet(directory / "parsed.parquet"))
+    frame_cache.put(tuple(job["processed_key"]), pd.read_parquet(directory / "aligned.parquet"))
+    job["per_base_path"], job["reference_path"] = job_inputs(queue.store, job)
+    return job
+
+
+async def submit_job(request: Request) -> JSONResponse:
+    """Store an uploaded QC job and queue it; see the module docstring."""
+    store = job_queue.store
+    job_id = store.new_id()
+    directory = store.job_dir(job_id)
+    try:
+        per_base_path, _, options = await receive_upload(
+            request, dict(request.query_params), directory / "input"
+        )
+        preflight_per_base_table(per_base_path)
+    except ValueError as exc:
+        shutil.rmtree(directory, ignore_errors=True)
+        return error_response(400, str(exc))
+    store.create(job_id, per_base_path.name, options)
+    job_queue.submit(job_id)
+    return JSONResponse(
+        {
+            "id": job_id,
+            "status": "queued",
+            "status_url": f"/api/jobs/{job_id}",
+            "result_url": f"/api/jobs/{job_id}/result",
+        },
+        status_code=202,
+    )
+
+
+async def job_status(request: Request) -> JSONResponse:
+    job = job_queue.get(request.path_params["job_id"])
+    if job is None:
+        return error_response(404, "No such job")
+    return JSONResponse(public_record(job))
+
+
+async def job_result(request: Request) -> Response:
+    """A finished job's results, with the ``format`` and ``table`` of /api/qc."""
+    job_id = request.path_params["job_id"]
+    job = job_queue.get(job_id)
+    if job is None:
+        return error_response(404, "No such job")
+    if job["status"] != "done":
+        return error_response(409, f"Job is {job['status']}: {job['error'] or job['stage']}")
+    try:
+        fmt, table = output_format(dict(request.query_params))
+    except ValueError as exc:
+        return error_response(400, str(exc))
+
+    def load() -> QCResult | bytes:
+        result = job_queue.store.load_result(job_id)
+        return json_body(result) if fmt == "json" else result
+
+    try:
+        result = await qc_pool.run(load)
+    except QCPoolFull as exc:
+        return error_response(503, str(exc), **{"Retry-After": "5"})
+    if fmt == "json":
+        return Response(result, media_type=formats["json"])
+    return table_response(result, fmt, table, Path(job["per_base_name"]).stem)
+
+
+routes = [
+    Route("/api/jobs", submit_job, methods=["POST"]),
+    Route("/api/jobs/{job_id}", job_status, methods=["GET"]),
+    Route("/api/jobs/{job_id}/result", job_result, methods=["GET"]),
+]
+
+job_queue = JobQueue(
+    os.environ.get("DIMPLE_JOB_DIR", default_job_dir),
+    workers=int(os.environ.get("DIMPLE_JOB_WORKERS", default_job_workers)),
+)
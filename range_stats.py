@@ -0,0 +1,192 @@
+"""Range-statistics index: selected/unselected means without a pass over the frame.
+
+``update_mean_values_per_base`` groups the whole frame on every slider move,
+which is O(n) pandas work per aggregation column. The means and stds of any
+set of position ranges only need the count, sum and sum of squares of each
+column over those rows, and those come from cumulative arrays:
+
+* rows are put in ``pos`` order once, so each range is one contiguous slice
+  found with ``searchsorted``;
+* per column, running count (NaNs excluded, as pandas does), sum and sum of
+  squares are stored at every ``block_size``-th row. Full prefix arrays for
+  15 columns would cost more memory than the frame itself, so a lookup adds
+  the < ``block_size`` rows past the last block boundary directly;
+* values are centered on the column mean before summing, which keeps
+  ``sum of squares - sum**2 / n`` from cancelling catastrophically.
+
+The complement (unselected) and full-series rows fall out of the totals.
+
+Two columns depend on the selection: ``update_per_base_df`` rescales
+``variant_fraction`` and ``n_total`` by a factor derived from the total
+selected length. Their statistics are the base column's, scaled.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from process_data import aggregation_columns, merge_ranges
+
+default_block_size = 256
+
+# Selection-dependent columns: (base column, scale factor given
+# subpool_codon_fraction), mirroring update_per_base_df.
+scaled_columns = {
+    "variant_fraction_percent": ("variant_fraction", lambda f: (4 / 3) / f),
+    "expected_variant_codons": ("n_total", lambda f: f),
+}
+
+
+def column_source(column: str, merged_ranges: np.ndarray) -> tuple[str, float]:
+    """(base column, factor) such that ``column == base column * factor`` for a selection.
+
+    Args:
+        column: Column of the frame ``update_per_base_df`` returns.
+        merged_ranges: Selection as returned by ``merge_ranges``.
+    """
+    if column not in scaled_columns:
+        return column, 1.0
+    total_selected = int((merged_ranges[:, 1] - merged_ranges[:, 0]).sum())
+    base, scale = scaled_columns[column]
+    return base, scale(3 / (total_selected + 1))
+
+
+class RangeStatsIndex:
+    """Cumulative count/sum/sum-of-squares over the ``aggregation_columns``.
+
+    Build once per processed frame (the output of ``process_per_base_file``,
+    optionally aligned); ``means`` then answers any selection.
+
+    Args:
+        per_base_df: Processed per-base frame.
+        block_size: Rows between stored cumulative values. 1 stores a full
+            prefix sum per row; larger values trade a short scan per lookup
+            for proportionally less memory.
+    """
+
+    def __init__(
+        self, per_base_df: pd.DataFrame, block_size: int = default_block_size
+    ) -> None:
+        self.block_size = block_size
+        self._base_columns = [c for c in aggregation_columns if c not in scaled_columns]
+
+        pos = per_base_df["pos"].to_numpy()
+        order = None if np.all(pos[:-1] <= pos[1:]) else np.argsort(pos, kind="stable")
+        self._pos = pos if order is None else pos[order]
+        self._n_rows = len(pos)
+
+        n_blocks = -(-self._n_rows // block_size)
+        starts = np.arange(n_blocks) * block_size
+        shape = (len(self._base_columns), n_blocks + 1)
+        self._values: list[np.ndarray] = []
+        self._shift = np.zeros(len(self._base_columns))
+        self._count = np.zeros(shape)
+        self._sum = np.zeros(shape)
+        self._sumsq = np.zeros(shape)
+        for i, col in enumerate(self._base_columns):
+            values = per_base_df[col].to_numpy()
+            if order is not None:
+                values = values[order]
+            self._values.append(values)
+            if self._n_rows == 0:
+                continue
+            valid = ~np.isnan(values)
+            shift = float(np.nanmean(values)) if valid.any() else 0.0
+            centered = np.where(valid, values.astype(np.float64) - shift, 0.0)
+            self._shift[i] = shift
+            self._count[i, 1:] = np.cumsum(np.add.reduceat(valid.astype(np.float64), starts))
+            self._sum[i, 1:] = np.cumsum(np.add.reduceat(centered, starts))
+            self._sumsq[i, 1:] = np.cumsum(np.add.reduceat(centered**2, starts))
+
+    def _moments(self, values: np.ndarray, i: int, groups: np.ndarray, n_groups: int):
+        """(count, sum, sumsq) of base column ``i``'s ``values`` per group label."""
+        valid = ~np.isnan(values)
+        centered = np.where(valid, values.astype(np.float64) - self._shift[i], 0.0)
+        return (
+            np.bincount(groups, weights=valid, minlength=n_groups),
+            np.bincount(groups, weights=centered, minlength=n_groups),
+            np.bincount(groups, weights=centered**2, minlength=n_groups),
+        )
+
+    def _prefix(self, rows: np.ndarray) -> np.ndarray:
+        """(count, sum, sumsq) per base column over rows [0, row), for each row.
+
+        Returns an array of shape (3, n_columns, len(rows)).
+        """
+        blocks, offsets = np.divmod(rows, self.block_size)
+        out = np.stack(
+            [self._count[:, blocks], self._sum[:, blocks], self._sumsq[:, blocks]]
+        )
+        # Gather the rows between each block boundary and its row in one go:
+        # element j of segment s is row blocks[s] * block_size + j.
+        segment = np.repeat(np.arange(len(rows)), offsets)
+        if len(segment):
+            first = np.cumsum(offsets) - offsets
+            index = np.arange(len(segment)) - first[segment] + blocks[segment] * self.block_size
+            for i, values in enumerate(self._values):
+                partial = self._moments(values[index], i, segment, len(rows))
+                out[:, i, :] += np.stack(partial)
+        return out
+
+    def _selected_moments(self, intervals: np.ndarray) -> np.ndarray:
+        """(count, sum, sumsq) per base column over the union of row intervals."""
+        if len(intervals) == 0:
+            return np.zeros((3, len(self._base_columns)))
+        if 2 * len(intervals) * self.block_size > self._n_rows:
+            # The partial-block scans would touch more rows than one full pass.
+            diff = np.zeros(self._n_rows + 1, dtype=np.int64)
+            diff[intervals[:, 0]] += 1
+            diff[intervals[:, 1]] -= 1
+            selected = (np.cumsum(diff[:-1]) > 0).astype(np.intp)
+            out = np.empty((3, len(self._base_columns)))
+            for i, values in enumerate(self._values):
+                out[:, i] = np.stack(self._moments(values, i, selected, 2))[:, 1]
+            return out
+        prefix = self._prefix(intervals.ravel()).reshape(3, len(self._base_columns), -1, 2)
+        return (prefix[..., 1] - prefix[..., 0]).sum(axis=2)
+
+    def _row_intervals(self, merged_ranges: np.ndarray) -> np.ndarray:
+        """Row slices ``[lo, hi)`` covering ``start < pos <= end`` per merged range."""
+        lo = np.searchsorted(self._pos, merged_ranges[:, 0] + 1, side="left")
+        hi = np.searchsorted(self._pos, merged_ranges[:, 1], side="right")
+        keep = hi > lo
+        return np.column_stack([lo[keep], hi[keep]])
+
+    def _mean_std(self, moments: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        count, total, sumsq = moments
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(count > 0, self._shift + total / count, np.nan)
+            var = np.maximum(sumsq - total**2 / count, 0.0) / (count - 1)
+            std = np.where(count > 1, np.sqrt(var), np.nan)
+        return mean, std
+
+    def means(self, selected_ranges: list[tuple[int, int]]) -> pd.DataFrame:
+        """Equivalent of ``update_mean_values_per_base(update_per_base_df(df, ranges))``.
+
+        Args:
+            selected_ranges: (start, end) ranges as in ``update_per_base_df``.
+
+        Returns:
+            Means/stds indexed ["selected", "unselected", "full"].
+        """
+        merged = merge_ranges(selected_ranges)
+        full = np.stack([self._count[:, -1], self._sum[:, -1], self._sumsq[:, -1]])
+        selected = self._selected_moments(self._row_intervals(merged))
+
+        rows = {}
+        for name, moments in (
+            ("selected", selected),
+            ("unselected", full - selected),
+            ("full", full),
+        ):
+            mean, std = self._mean_std(moments)
+            stats = {col: (mean[i], std[i]) for i, col in enumerate(self._base_columns)}
+            row = {}
+            for col in aggregation_columns:
+                base, factor = column_source(col, merged)
+                col_mean, col_std = stats[base][0] * factor, stats[base][1] * abs(factor)
+                row[f"{col}_mean"] = col_mean
+                row[f"{col}_std"] = col_std
+            rows[name] = row
+        return pd.DataFrame.from_dict(rows, orient="index")
@@ -0,0 +1,155 @@
+"""Process-wide, content-addressed cache of parsed and processed per-base frames.
+
+Several users often upload the same per-base file, and the same user re-uploads
+it after toggling settings. Caching the expensive parse/process/align chain by
+*content* (not by session or file name) lets those repeats skip the work.
+
+Session isolation: this is deliberately shared module-level state, which the
+project otherwise avoids (see tests/test_session_isolation.py). It is safe
+because
+
+* keys are content hashes, so a session can only hit an entry by supplying
+  byte-identical inputs, and therefore learns nothing it did not already have;
+* stored frames are never handed out directly. Every ``get`` returns a fresh
+  shallow copy, and pandas Copy-on-Write guarantees that any mutation of that
+  copy (column assignment, ``.loc`` writes, ...) copies the affected data first
+  instead of writing through to the cached frame. NumPy views obtained from it
+  via ``to_numpy()`` are read-only for the same reason.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from pathlib import Path
+
+import pandas as pd
+
+# Default memory budget for cached frames. The container has 1 GB (see
+# deploy.yaml); override with DIMPLE_CACHE_MAX_BYTES (0 disables caching).
+default_cache_max_bytes = 256 * 1024 * 1024
+
+
+def file_digest(path: str | Path) -> str:
+    """SHA-256 of a file's contents, read in chunks."""
+    with open(path, "rb") as handle:
+        return hashlib.file_digest(handle, "sha256").hexdigest()
+
+
+def sequence_digest(sequence: str | None) -> str | None:
+    """SHA-256 of a reference sequence, or None when there is no reference."""
+    if sequence is None:
+        return None
+    return hashlib.sha256(sequence.encode()).hexdigest()
+
+
+def processed_cache_key(
+    per_base_digest: str,
+    reference_sequence: str | None,
+    reverse_complement: bool,
+    origin_shift: int,
+) -> tuple:
+    """Cache key for the output of process_per_base_file + align_ref_to_variants."""
+    return (
+        "processed",
+        per_base_digest,
+        sequence_digest(reference_sequence),
+        bool(reverse_complement),
+        int(origin_shift),
+    )
+
+
+def frame_nbytes(frame: pd.DataFrame) -> int:
+    """Deep memory usage of ``frame``, index included."""
+    return int(frame.memory_usage(deep=True, index=True).sum())
+
+
+class FrameCache:
+    """Thread-safe LRU cache of DataFrames bounded by total size in bytes.
+
+    Args:
+        max_bytes: Memory budget. Least recently used entries are evicted once
+            the total exceeds it; frames larger than the whole budget are not
+            stored at all.
+    """
+
+    def __init__(self, max_bytes: int = default_cache_max_bytes) -> None:
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[Hashable, tuple[pd.DataFrame, int]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> pd.DataFrame | None:
+        """Return a copy-on-write view of the cached frame, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0].copy(deep=False)
+
+    def put(self, key: Hashable, frame: pd.DataFrame) -> None:
+        """Store ``frame`` under ``key``. Empty frames are never cached."""
+        if frame.empty:
+            return
+        nbytes = frame_nbytes(frame)
+        if nbytes > self.max_bytes:
+            return
+        # Keep our own shallow copy so later writes by the caller to ``frame``
+        # are copied-on-write rather than reaching the cached data.
+        stored = frame.copy(deep=False)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._nbytes -= previous[1]
+            self._entries[key] = (stored, nbytes)
+            self._nbytes += nbytes
+            while self._nbytes > self.max_bytes:
+                _, (_, evicted_bytes) = self._entries.popitem(last=False)
+                self._nbytes -= evicted_bytes
+                self.evictions += 1
+
+    def get_or_compute(
+        self, key: Hashable, compute: Callable[[], pd.DataFrame]
+    ) -> pd.DataFrame:
+        """Return the cached frame for ``key``, computing and storing it on a miss.
+
+        ``compute`` runs outside the lock, so two sessions missing on the same
+        key at once may both compute it; the last one to finish is stored.
+        """
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        frame = compute()
+        self.put(key, frame)
+        return frame.copy(deep=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+    def stats(self) -> dict[str, int]:
+        """Counters and current size, e.g. for logging or a metrics endpoint."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._nbytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+frame_cache = FrameCache(
+    int(os.environ.get("DIMPLE_CACHE_MAX_BYTES", default_cache_max_bytes))
+)
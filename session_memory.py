@@ -0,0 +1,218 @@
+"""Per-session memory accounting, idle release and the upload memory guard.
+
+Every session keeps its own parsed, processed and range-selected frames (plus
+indexes built on them) for as long as it is open. This module keeps track of
+that and of the process as a whole:
+
+* ``session_registry.hold`` records the approximate bytes of each large
+  reactive result per session. Frames shared through
+  ``result_cache.frame_cache`` are counted for every session holding them, so
+  the total is an upper bound on what sessions keep alive;
+* after ``idle_seconds`` without input, app.py drops a session's
+  intermediates (``mark_released``); they are recomputed, mostly from the
+  frame cache, once the user touches a control again;
+* ``upload_rejection`` turns an upload away when the process is close to its
+  memory ceiling (``DIMPLE_MEMORY_LIMIT_BYTES``, else the cgroup limit), so a
+  large upload is refused instead of getting the container OOM-killed.
+
+``stats()`` is served at /metrics/sessions (see asgi.py).
+
+Session isolation: ``session_registry`` holds only byte counts and timestamps
+per session id; the ids are never exposed.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from result_cache import frame_nbytes
+
+# Seconds without input before a session's intermediates are released (0: never)
+default_idle_seconds = 30 * 60
+# Fraction of the memory limit above which new uploads are refused
+default_reject_fraction = 0.85
+# Peak memory of parsing and processing, per byte of uploaded table
+upload_memory_factor = 4
+
+_cgroup_limit_files = (
+    Path("/sys/fs/cgroup/memory.max"),  # cgroup v2
+    Path("/sys/fs/cgroup/memory/memory.limit_in_bytes"),  # cgroup v1
+)
+
+
+def approx_nbytes(obj: Any, _seen: set[int] | None = None) -> int:
+    """Approximate bytes of a frame, array, or object or container holding them.
+
+    Each object is counted once, however often it is referenced.
+    """
+    seen = set() if _seen is None else _seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, pd.DataFrame):
+        return frame_nbytes(obj)
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    if isinstance(obj, dict):
+        obj = list(obj.values())
+    elif not isinstance(obj, (tuple, list)):
+        obj = list(vars(obj).values()) if hasattr(obj, "__dict__") else []
+    return sum(approx_nbytes(item, seen) for item in obj)
+
+
+def memory_limit() -> int | None:
+    """The process's memory ceiling in bytes, or None if there is none."""
+    configured = os.environ.get("DIMPLE_MEMORY_LIMIT_BYTES")
+    if configured:
+        return int(configured)
+    for path in _cgroup_limit_files:
+        try:
+            value = path.read_text().strip()
+        except OSError:
+            continue
+        # "max" (v2) or a page-rounded 2**63 (v1) mean unlimited
+        if value.isdigit() and int(value) < 2**60:
+            return int(value)
+        return None
+    return None
+
+
+def memory_in_use() -> int:
+    """Resident set size of this process in bytes (0 where unavailable)."""
+    try:
+        resident_pages = int(Path("/proc/self/statm").read_text().split()[1])
+    except (OSError, IndexError, ValueError):
+        return 0
+    return resident_pages * os.sysconf("SC_PAGE_SIZE")
+
+
+def upload_rejection(
+    upload_bytes: int, reject_fraction: float = default_reject_fraction
+) -> str | None:
+    """Why an upload of ``upload_bytes`` must be refused now, or None to accept it."""
+    limit = memory_limit()
+    if limit is None:
+        return None
+    expected = memory_in_use() + upload_bytes * upload_memory_factor
+    if expected <= limit * reject_fraction:
+        return None
+    return (
+        "The server is close to its memory limit, so this file cannot be "
+        "processed right now. Please try again in a few minutes."
+    )
+
+
+@dataclass
+class _SessionUsage:
+    started: float
+    last_active: float
+    held: dict[str, int] = field(default_factory=dict)
+    released: bool = False
+
+
+class SessionRegistry:
+    """Bytes held and last activity of each open session.
+
+    Args:
+        idle_seconds: Idle time after which a session's intermediates are
+            released; 0 disables release.
+    """
+
+    def __init__(self, idle_seconds: float = default_idle_seconds) -> None:
+        self.idle_seconds = idle_seconds
+        self._lock = threading.Lock()
+        self._sessions: dict[str, _SessionUsage] = {}
+        self.releases = 0
+
+    def open(self, session_id: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._sessions[session_id] = _SessionUsage(started=now, last_active=now)
+
+    def close(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def hold(self, session_id: str, name: str, obj: Any) -> Any:
+        """Record ``obj`` as the session's ``name`` result and return it unchanged."""
+        nbytes = approx_nbytes(obj)
+        with self._lock:
+            usage = self._sessions.get(session_id)
+            if usage is not None:
+                usage.held[name] = nbytes
+        return obj
+
+    def touch(self, session_id: str) -> None:
+        """Note user activity in the session."""
+        with self._lock:
+            usage = self._sessions.get(session_id)
+            if usage is not None:
+                usage.last_active = time.monotonic()
+                usage.released = False
+
+    def should_release(self, session_id: str) -> bool:
+        """Whether the session has been idle long enough to release its data."""
+        if not self.idle_seconds:
+            return False
+        with self._lock:
+            usage = self._sessions.get(session_id)
+            return (
+                usage is not None
+                and not usage.released
+                and time.monotonic() - usage.last_active >= self.idle_seconds
+            )
+
+    def mark_released(self, session_id: str) -> None:
+        """Record that the session dropped its intermediates."""
+        with self._lock:
+            usage = self._sessions.get(session_id)
+            if usage is not None:
+                usage.held.clear()
+                usage.released = True
+                self.releases += 1
+
+    def stats(self) -> dict[str, Any]:
+        """Session counts, held bytes and process memory, for operators."""
+        now = time.monotonic()
+        with self._lock:
+            sessions = [
+                {
+                    "held_bytes": sum(usage.held.values()),
+                    "idle_seconds": round(now - usage.last_active, 1),
+                    "age_seconds": round(now - usage.started, 1),
+                    "released": usage.released,
+                }
+                for usage in self._sessions.values()
+            ]
+            by_result: dict[str, int] = {}
+            for usage in self._sessions.values():
+                for name, nbytes in usage.held.items():
+                    by_result[name] = by_result.get(name, 0) + nbytes
+            releases = self.releases
+        sessions.sort(key=lambda session: session["held_bytes"], reverse=True)
+        return {
+            "sessions": len(sessions),
+            "released_sessions": sum(session["released"] for session in sessions),
+            "held_bytes": sum(session["held_bytes"] for session in sessions),
+            "held_bytes_by_result": by_result,
+            "releases": releases,
+            "idle_seconds": self.idle_seconds,
+            "memory_in_use_bytes": memory_in_use(),
+            "memory_limit_bytes": memory_limit(),
+            "largest_sessions": sessions[:10],
+        }
+
+
+session_registry = SessionRegistry(
+    float(os.environ.get("DIMPLE_SESSION_IDLE_SECONDS", default_idle_seconds))
+)
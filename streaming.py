@@ -0,0 +1,210 @@
+"""Chunked processing of per-base tables too large to hold in memory.
+
+``process_per_base_file`` loads the whole table and makes several full-size
+temporaries, which for bacterial-genome-scale inputs (millions of rows) does
+not fit the 1 GB container. Every per-position metric depends only on its own
+row plus the global ``sequence_length``, so here we
+
+1. check the header and first rows (``preflight_per_base_table``), then read
+   just the ``pos`` column once to find ``sequence_length``;
+2. stream the table in chunks, checking each chunk's integrity and computing
+   the metrics, origin shift, reverse complement and range selection chunk
+   by chunk;
+3. append each chunk to a Parquet file (the on-disk columnar store) and fold
+   it into running per-group moments, so the selected/unselected/full means
+   come out without a second pass.
+
+Alignment to a reference is global and is not part of the streaming mode.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from per_base_io import iter_per_base_table_chunks, preflight_per_base_table
+from process_data import (
+    aggregation_columns,
+    compact_per_base_frame,
+    compute_per_position_metrics,
+    update_per_base_df,
+)
+from shared import COMPLEMENT
+from validation import integrity_problems
+
+default_chunksize = 200_000
+
+
+class _RunningMoments:
+    """Per-column count/mean/M2 accumulated chunk by chunk.
+
+    Chunks are merged with Chan et al.'s parallel update, which stays
+    accurate where a naive sum/sum-of-squares would cancel catastrophically.
+    NaNs are skipped, matching pandas' mean/std.
+    """
+
+    def __init__(self, n_columns: int) -> None:
+        self.count = np.zeros(n_columns)
+        self.mean = np.zeros(n_columns)
+        self.m2 = np.zeros(n_columns)
+
+    def update(self, values: np.ndarray) -> None:
+        valid = ~np.isnan(values)
+        n_b = valid.sum(axis=0).astype(float)
+        filled = np.where(valid, values, 0.0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean_b = np.where(n_b > 0, filled.sum(axis=0) / n_b, 0.0)
+        m2_b = (np.where(valid, values - mean_b, 0.0) ** 2).sum(axis=0)
+        self._merge(n_b, mean_b, m2_b)
+
+    def merged_with(self, other: _RunningMoments) -> _RunningMoments:
+        out = _RunningMoments(len(self.count))
+        out._merge(self.count, self.mean, self.m2)
+        out._merge(other.count, other.mean, other.m2)
+        return out
+
+    def _merge(self, n_b: np.ndarray, mean_b: np.ndarray, m2_b: np.ndarray) -> None:
+        n = self.count + n_b
+        delta = mean_b - self.mean
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self.mean = np.where(n > 0, self.mean + delta * n_b / n, 0.0)
+            self.m2 = np.where(
+                n > 0, self.m2 + m2_b + delta**2 * self.count * n_b / n, 0.0
+            )
+        self.count = n
+
+    def mean_std(self) -> tuple[np.ndarray, np.ndarray]:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(self.count > 0, self.mean, np.nan)
+            std = np.where(self.count > 1, np.sqrt(self.m2 / (self.count - 1)), np.nan)
+        return mean, std
+
+
+def _orient_chunk(
+    chunk: pd.DataFrame,
+    sequence_length: int,
+    reverse_complement: bool,
+    origin_shift: int,
+) -> pd.DataFrame:
+    """Apply origin shift and reverse complement to a chunk without reordering.
+
+    Same position arithmetic as ``process_per_base_file``; rows keep their file
+    order, so the stored table is ordered by ``pos`` only when neither option
+    is used (``read_processed_store`` sorts on load).
+    """
+    if origin_shift > 0:
+        chunk["pos"] = ((chunk["pos"] - origin_shift - 1) % sequence_length) + 1
+    if reverse_complement:
+        chunk["pos"] = sequence_length - chunk["pos"] + 1
+        chunk[["A", "C", "G", "T"]] = chunk[["T", "G", "C", "A"]].to_numpy()
+        chunk["ref"] = chunk["ref"].map(COMPLEMENT)
+    return chunk
+
+
+def _means_frame(selected: _RunningMoments, unselected: _RunningMoments) -> pd.DataFrame:
+    """Lay out the accumulated moments like ``update_mean_values_per_base``."""
+    rows = {}
+    for name, moments in (
+        ("selected", selected),
+        ("unselected", unselected),
+        ("full", selected.merged_with(unselected)),
+    ):
+        mean, std = moments.mean_std()
+        row = {}
+        for i, col in enumerate(aggregation_columns):
+            row[f"{col}_mean"] = mean[i]
+            row[f"{col}_std"] = std[i]
+        rows[name] = row
+    return pd.DataFrame.from_dict(rows, orient="index")
+
+
+def stream_process_per_base_file(
+    path: str | Path,
+    out_path: str | Path,
+    reverse_complement: bool = False,
+    origin_shift: int = 0,
+    selected_ranges: list[tuple[int, int]] | None = None,
+    chunksize: int = default_chunksize,
+) -> pd.DataFrame:
+    """
+    Process a per-base table chunk by chunk into a Parquet store.
+
+    Produces the same rows as ``process_per_base_file(..., compact=True)``
+    followed by ``update_per_base_df`` (minus alignment), but peak memory is
+    bounded by ``chunksize`` rather than by the table size.
+
+    Args:
+        path: Per-base CSV/TSV on disk.
+        out_path: Parquet file to write.
+        reverse_complement: As in ``process_per_base_file``.
+        origin_shift: As in ``process_per_base_file``.
+        selected_ranges: (start, end) ranges as in ``update_per_base_df``;
+            defaults to the whole sequence.
+        chunksize: Rows per chunk.
+
+    Returns:
+        Means/stds indexed ["selected", "unselected", "full"], in the same
+        layout as ``update_mean_values_per_base``.
+
+    Raises:
+        ValueError: If the file is not a per-base table or a chunk fails the
+            integrity checks of ``validation.integrity_problems``.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    name = Path(path).name
+    preflight_per_base_table(path)
+    sequence_length = 0
+    for chunk in iter_per_base_table_chunks(path, chunksize, usecols=["pos"]):
+        if not chunk.empty:
+            sequence_length = max(sequence_length, int(chunk["pos"].max()))
+    if sequence_length == 0:
+        raise ValueError(f"{Path(path).name} has no rows")
+    if not selected_ranges:
+        selected_ranges = [(0, sequence_length)]
+
+    selected = _RunningMoments(len(aggregation_columns))
+    unselected = _RunningMoments(len(aggregation_columns))
+    writer = None
+    last_pos = None
+    try:
+        for chunk in iter_per_base_table_chunks(path, chunksize):
+            problems = integrity_problems(chunk)
+            if last_pos is not None and not chunk.empty and chunk["pos"].iat[0] != last_pos + 1:
+                problems.append(f"positions are not contiguous (break after pos {last_pos})")
+            if problems:
+                raise ValueError(f"{name} failed integrity checks: {'; '.join(problems)}")
+            if not chunk.empty:
+                last_pos = int(chunk["pos"].iat[-1])
+            chunk = compute_per_position_metrics(chunk, sequence_length)
+            chunk = _orient_chunk(chunk, sequence_length, reverse_complement, origin_shift)
+            chunk = compact_per_base_frame(chunk)
+            chunk = update_per_base_df(chunk, selected_ranges)
+
+            values = chunk[aggregation_columns].to_numpy(dtype=np.float64)
+            mask = chunk["is_selected"].to_numpy()
+            selected.update(values[mask])
+            unselected.update(values[~mask])
+
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(out_path, table.schema)
+            writer.write_table(table.cast(writer.schema))
+    finally:
+        if writer is not None:
+            writer.close()
+
+    return _means_frame(selected, unselected)
+
+
+def read_processed_store(
+    path: str | Path, columns: list[str] | None = None
+) -> pd.DataFrame:
+    """Load (a subset of columns of) a streamed store, ordered by ``pos``."""
+    if columns is not None and "pos" not in columns:
+        columns = ["pos", *columns]
+    df = pd.read_parquet(path, columns=columns)
+    return df.sort_values("pos", kind="stable").reset_index(drop=True)
@@ -0,0 +1,167 @@
+"""Process-wide pipeline stage metrics, served as Prometheus text at /metrics.
+
+Each pipeline stage (parsing, metric computation, alignment, range selection,
+aggregation, tests, plot building) is timed where it runs and recorded with
+the number of rows it worked on:
+
+* ``stage_seconds`` and ``stage_rows`` are cumulative histograms per stage,
+  so slow sessions can be traced to a stage and related to input size;
+* ``cache_requests`` counts hits and misses of the shared frame cache per
+  kind of frame ("parsed", "processed").
+
+Recording is a lock, two bisections and a few integer increments; nothing is
+formatted until /metrics is scraped (see asgi.py).
+
+Session isolation: ``pipeline_metrics`` holds only stage names, counts and durations.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from result_cache import frame_cache
+from session_memory import session_registry
+
+# Upper bounds of the histogram buckets; +Inf is implicit
+seconds_buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+rows_buckets = (1e3, 1e4, 1e5, 1e6, 1e7)
+
+
+class _Histogram:
+    """Per-bucket counts (not yet cumulative), sum and count."""
+
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, n_buckets: int) -> None:
+        self.counts = [0] * (n_buckets + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, bounds: tuple[float, ...], value: float) -> None:
+        self.counts[bisect_left(bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _histogram_lines(
+    name: str, bounds: tuple[float, ...], histograms: dict[str, _Histogram]
+) -> list[str]:
+    lines = []
+    for stage, histogram in sorted(histograms.items()):
+        cumulative = 0
+        for bound, count in zip((*bounds, "+Inf"), histogram.counts):
+            cumulative += count
+            le = bound if bound == "+Inf" else _format_value(float(bound))
+            lines.append(f'{name}_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+        lines.append(f'{name}_sum{{stage="{stage}"}} {_format_value(histogram.sum)}')
+        lines.append(f'{name}_count{{stage="{stage}"}} {histogram.count}')
+    return lines
+
+
+class PipelineMetrics:
+    """Latency and input-size histograms per stage, plus cache outcomes.
+
+    Thread-safe: stages run on worker threads as well as the event loop.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._seconds: dict[str, _Histogram] = {}
+        self._rows: dict[str, _Histogram] = {}
+        self._cache: dict[tuple[str, str], int] = {}
+
+    def observe(self, stage: str, seconds: float, rows: int | None = None) -> None:
+        """Record one run of ``stage`` that took ``seconds`` on ``rows`` rows."""
+        with self._lock:
+            histogram = self._seconds.get(stage)
+            if histogram is None:
+                histogram = self._seconds[stage] = _Histogram(len(seconds_buckets))
+            histogram.observe(seconds_buckets, seconds)
+            if rows is not None:
+                histogram = self._rows.get(stage)
+                if histogram is None:
+                    histogram = self._rows[stage] = _Histogram(len(rows_buckets))
+                histogram.observe(rows_buckets, rows)
+
+    @contextmanager
+    def timed(self, stage: str, rows: int | None = None) -> Iterator[None]:
+        """Time the block as one run of ``stage``; not recorded if it raises."""
+        start = time.perf_counter()
+        yield
+        self.observe(stage, time.perf_counter() - start, rows)
+
+    def cache(self, kind: str, hit: bool) -> None:
+        """Record a frame-cache lookup for a ``kind`` of frame."""
+        key = (kind, "hit" if hit else "miss")
+        with self._lock:
+            self._cache[key] = self._cache.get(key, 0) + 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._seconds.clear()
+            self._rows.clear()
+            self._cache.clear()
+
+    def prometheus_text(self) -> str:
+        """Prometheus text exposition of the recorded metrics."""
+        with self._lock:
+            seconds = _histogram_lines("dimple_stage_seconds", seconds_buckets, self._seconds)
+            rows = _histogram_lines("dimple_stage_rows", rows_buckets, self._rows)
+            cache = [
+                f'dimple_cache_requests_total{{cache="{kind}",outcome="{outcome}"}} {count}'
+                for (kind, outcome), count in sorted(self._cache.items())
+            ]
+        return "\n".join(
+            [
+                "# HELP dimple_stage_seconds Duration of each pipeline stage.",
+                "# TYPE dimple_stage_seconds histogram",
+                *seconds,
+                "# HELP dimple_stage_rows Per-base rows each pipeline stage worked on.",
+                "# TYPE dimple_stage_rows histogram",
+                *rows,
+                "# HELP dimple_cache_requests_total Shared frame cache lookups by outcome.",
+                "# TYPE dimple_cache_requests_total counter",
+                *cache,
+                "",
+            ]
+        )
+
+
+def prometheus_text() -> str:
+    """Stage metrics plus frame cache and session memory gauges, for /metrics."""
+    stats = frame_cache.stats()
+    sessions = session_registry.stats()
+    return pipeline_metrics.prometheus_text() + "\n".join(
+        [
+            "# HELP dimple_frame_cache_bytes Bytes held by the shared frame cache.",
+            "# TYPE dimple_frame_cache_bytes gauge",
+            f"dimple_frame_cache_bytes {stats['bytes']}",
+            "# HELP dimple_frame_cache_entries Frames held by the shared frame cache.",
+            "# TYPE dimple_frame_cache_entries gauge",
+            f"dimple_frame_cache_entries {stats['entries']}",
+            "# HELP dimple_frame_cache_evictions_total Frames evicted from the shared frame cache.",
+            "# TYPE dimple_frame_cache_evictions_total counter",
+            f"dimple_frame_cache_evictions_total {stats['evictions']}",
+            "# HELP dimple_sessions Open sessions.",
+            "# TYPE dimple_sessions gauge",
+            f"dimple_sessions {sessions['sessions']}",
+            "# HELP dimple_session_held_bytes Approximate bytes of results held by sessions.",
+            "# TYPE dimple_session_held_bytes gauge",
+            f"dimple_session_held_bytes {sessions['held_bytes']}",
+            "# HELP dimple_process_resident_bytes Resident memory of this process.",
+            "# TYPE dimple_process_resident_bytes gauge",
+            f"dimple_process_resident_bytes {sessions['memory_in_use_bytes']}",
+            "",
+        ]
+    )
+
+
+pipeline_metrics = PipelineMetrics()
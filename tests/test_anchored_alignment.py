@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from anchored_alignment import anchored_alignment, encode_sequence, find_anchor_blocks, kmer_codes
+from benchmarks.synthetic import make_per_base_table, make_reference
+from process_reference import _global_aligner, align_ref_to_variants
+
+
+def _substitute(sequence, sites):
+    seq = list(sequence)
+    for i in sites:
+        seq[i] = "A" if seq[i] != "A" else "C"
+    return "".join(seq)
+
+
+class TestKmerCodes:
+    def test_non_acgt_kmers_are_invalid(self):
+        values, valid = kmer_codes(encode_sequence("ACGTNACGT"), 4)
+        assert valid.tolist() == [True, False, False, False, False, True]
+        assert values[0] == values[5]
+
+    def test_sequence_shorter_than_k(self):
+        values, valid = kmer_codes(encode_sequence("ACG"), 4)
+        assert len(values) == 0 and len(valid) == 0
+
+
+class TestFindAnchorBlocks:
+    def test_identical_sequences_form_one_block(self):
+        ref = make_reference(1000, seed=1)
+        blocks = find_anchor_blocks(ref, ref, k=15)
+        assert len(blocks) == 1
+        r, q, length = blocks[0]
+        assert r == q == 0
+        assert length >= 1000 - 2 * 15
+
+    def test_unrelated_sequences_have_no_anchors(self):
+        assert find_anchor_blocks("A" * 500, "C" * 500) == []
+
+
+class TestAnchoredAlignment:
+    @pytest.mark.parametrize(
+        "edit",
+        ["substitutions", "deletion", "insertion", "subsequence"],
+    )
+    def test_matches_global_alignment_score(self, edit):
+        ref = make_reference(2000, seed=3)
+        query = _substitute(ref, [10, 500, 1200, 1990])
+        if edit == "deletion":
+            query = query[:800] + query[809:]
+        elif edit == "insertion":
+            query = query[:800] + "GATTACA" + query[800:]
+        elif edit == "subsequence":
+            query = query[120:1700]
+        aligner = _global_aligner()
+        anchored = anchored_alignment(ref, query, aligner)
+        assert anchored is not None
+        assert anchored.score == aligner.align(ref, query)[0].score
+        # Gapped rows reproduce the inputs
+        assert anchored[0].replace("-", "") == ref
+        assert anchored[1].replace("-", "") == query
+
+    def test_returns_none_without_anchors(self):
+        assert anchored_alignment("ACGT" * 10, "TTTT" * 10, _global_aligner()) is None
+
+    def test_returns_none_when_gap_too_large(self):
+        ref = make_reference(3000, seed=4)
+        query = ref[:1000] + make_reference(1000, seed=5) + ref[2000:]
+        assert anchored_alignment(ref, query, _global_aligner(), max_gap_cells=1000) is None
+
+
+class TestAlignRefToVariantsAnchored:
+    def test_large_construct_marks_mismatches(self):
+        # Large enough that a full global alignment would be slow
+        n = 60_000
+        ref = make_reference(n, seed=6)
+        df = make_per_base_table(n, seed=6, reference=ref)
+        df["aligned_ref_code"] = np.uint8(0)
+        df["alignment_gap"] = True
+        df["alignment_mismatch"] = 0
+        sites = [100, 30_000, 59_000]
+        result = align_ref_to_variants(df, _substitute(ref, sites))
+        assert np.flatnonzero(result["alignment_mismatch"].to_numpy()).tolist() == sites
+        assert not result["alignment_gap"].any()
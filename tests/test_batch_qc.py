@@ -0,0 +1,83 @@
+"""Tests for the batch QC command-line tool."""
+
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from batch_qc import main, parse_ranges
+
+
+@pytest.fixture
+def per_base_files(tmp_path: Path, variant_region_per_base_df: pd.DataFrame) -> list[Path]:
+    paths = []
+    for name in ("lib1", "lib2", "lib3"):
+        path = tmp_path / f"{name}.tsv"
+        variant_region_per_base_df.to_csv(path, sep="\t", index=False)
+        paths.append(path)
+    return paths
+
+
+class TestParseRanges:
+    def test_multiple_ranges(self) -> None:
+        assert parse_ranges("1-10; 20-30") == [(1, 10), (20, 30)]
+
+    def test_empty(self) -> None:
+        assert parse_ranges("") == []
+
+
+class TestMain:
+    @pytest.mark.parametrize("jobs", [1, 2])
+    def test_writes_per_sample_and_summary(
+        self, tmp_path: Path, per_base_files: list[Path], jobs: int
+    ) -> None:
+        out_dir = tmp_path / "out"
+        argv = [str(p) for p in per_base_files]
+        argv += ["--out-dir", str(out_dir), "--jobs", str(jobs), "--range", "30", "60"]
+        assert main(argv) == 0
+
+        summary = pd.read_csv(out_dir / "summary.csv")
+        assert summary["sample"].tolist() == ["lib1", "lib2", "lib3"]
+        assert (summary["status"] == "ok").all()
+        assert (summary["n_selected"] == 30).all()
+        for name in ("lib1", "lib2", "lib3"):
+            assert (out_dir / f"{name}_per_base.csv").is_file()
+            assert (out_dir / f"{name}_tests.csv").is_file()
+
+    def test_sample_sheet_and_failures_are_reported(
+        self, tmp_path: Path, per_base_files: list[Path]
+    ) -> None:
+        bad = tmp_path / "bad.csv"
+        bad.write_text("pos,ref\n1,A\n")
+        sheet = tmp_path / "samples.csv"
+        pd.DataFrame(
+            {
+                "sample": ["good", "broken"],
+                "per_base": [per_base_files[0].name, bad.name],
+                "ranges": ["30-60", ""],
+            }
+        ).to_csv(sheet, index=False)
+        out_dir = tmp_path / "out"
+
+        assert main(["--sample-sheet", str(sheet), "--out-dir", str(out_dir), "--jobs", "1"]) == 1
+
+        summary = pd.read_csv(out_dir / "summary.csv").set_index("sample")
+        assert summary.at["good", "status"] == "ok"
+        assert summary.at["broken", "status"] == "error"
+        assert "missing required columns" in summary.at["broken", "error"]
+
+    def test_streaming_matches_in_memory(
+        self, tmp_path: Path, per_base_files: list[Path]
+    ) -> None:
+        argv = [str(per_base_files[0]), "--jobs", "1", "--range", "30", "60"]
+        assert main([*argv, "--out-dir", str(tmp_path / "mem")]) == 0
+        assert main([*argv, "--out-dir", str(tmp_path / "stream"), "--chunksize", "17"]) == 0
+
+        in_memory = pd.read_csv(tmp_path / "mem" / "summary.csv").iloc[0]
+        streamed = pd.read_csv(tmp_path / "stream" / "summary.csv").iloc[0]
+        assert (tmp_path / "stream" / "lib1_per_base.parquet").is_file()
+        assert streamed["n_positions"] == 100 and streamed["n_selected"] == 30
+        means = [c for c in in_memory.index if c.endswith("_mean")]
+        pd.testing.assert_series_equal(
+            streamed[means].astype(float), in_memory[means].astype(float), rtol=1e-5
+        )
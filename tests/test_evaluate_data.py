@@ -1,5 +1,9 @@
+import numpy as np
 import pandas as pd
+import scipy.stats as stats
+from statsmodels.stats.multitest import multipletests
 
+from evaluate_data import fdr_bh, welch_t_tests
 from evaluate_data import test_per_base_file as run_test_per_base_file
 from evaluate_data import test_mean_values as run_test_mean_values
 from process_data import process_full_mean_values, process_per_base_file, update_per_base_df
@@ -68,3 +72,42 @@ class TestTestMeanValues:
         assert len(valid) > 0, "Expected at least some non-NaN p-values"
         for _, row in valid.iterrows():
             assert float(row["p_adjusted"]) >= float(row["p_value"]) - 1e-10
+
+
+class TestWelchTTests:
+    def test_matches_scipy_exactly(self, processed_test_data):
+        data, _, _ = processed_test_data
+        from shared import test_cols
+
+        mask = data["is_selected"].to_numpy()
+        values = np.stack([data[c].to_numpy(dtype=np.float64) for c in test_cols])
+        t_stats, p_values = welch_t_tests(
+            np.ascontiguousarray(values[:, mask]), np.ascontiguousarray(values[:, ~mask])
+        )
+        for i, column in enumerate(test_cols):
+            x = data[column].to_numpy(dtype=np.float64)
+            expected = stats.ttest_ind(x[mask], x[~mask], equal_var=False)
+            np.testing.assert_array_equal(t_stats[i], expected.statistic)
+            np.testing.assert_array_equal(p_values[i], expected.pvalue)
+
+    def test_nan_propagates_per_metric(self):
+        selected = np.array([[1.0, 2.0], [1.0, np.nan]])
+        unselected = np.array([[3.0, 4.0, 5.0], [3.0, 4.0, 6.0]])
+        t_stats, p_values = welch_t_tests(selected, unselected)
+        assert not np.isnan(p_values[0])
+        assert np.isnan(t_stats[1]) and np.isnan(p_values[1])
+
+    def test_small_groups_are_nan(self):
+        values = np.arange(6, dtype=float).reshape(2, 3)
+        t_stats, p_values = welch_t_tests(values[:, :1].copy(), values[:, 1:].copy())
+        assert np.isnan(t_stats).all() and np.isnan(p_values).all()
+
+
+class TestFdrBh:
+    def test_matches_statsmodels(self):
+        rng = np.random.default_rng(0)
+        p_values = np.concatenate([rng.uniform(size=20), rng.uniform(0, 0.01, 5), [0.03, 0.03]])
+        rejected, corrected = fdr_bh(p_values)
+        expected_rejected, expected_corrected, _, _ = multipletests(p_values, method="fdr_bh")
+        np.testing.assert_array_equal(rejected, expected_rejected)
+        np.testing.assert_array_equal(corrected, expected_corrected)
@@ -0,0 +1,69 @@
+"""Tests for the streamed per-base downloads."""
+
+import asyncio
+import gzip
+import io
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from exports import (
+    aiter_in_thread,
+    gzip_chunks,
+    iter_arrow_chunks,
+    iter_csv_chunks,
+    iter_parquet_chunks,
+)
+from process_data import process_per_base_file, update_per_base_df, with_aligned_ref
+from process_reference import align_ref_to_variants
+from shared import tabular_cols
+
+
+@pytest.fixture
+def processed(variant_region_per_base_df):
+    data = process_per_base_file(variant_region_per_base_df, False, compact=True)
+    data = align_ref_to_variants(data, "A" * 100)
+    return update_per_base_df(data, [(29, 60)])
+
+
+class TestCsv:
+    def test_chunks_match_single_shot(self, processed):
+        chunks = list(iter_csv_chunks(processed, tabular_cols, rows=30))
+        assert len(chunks) == 4
+        assert "".join(chunks) == with_aligned_ref(processed)[tabular_cols].to_csv(index=False)
+
+    def test_gzip_round_trip(self, processed):
+        chunks = iter_csv_chunks(processed, tabular_cols, rows=30)
+        data = b"".join(gzip_chunks(chunks))
+        expected = with_aligned_ref(processed)[tabular_cols].to_csv(index=False)
+        assert gzip.decompress(data).decode() == expected
+
+    def test_empty_frame(self):
+        assert list(iter_csv_chunks(pd.DataFrame(), tabular_cols)) == []
+
+
+class TestColumnar:
+    def test_parquet_has_every_column(self, processed):
+        chunks = list(iter_parquet_chunks(processed, rows=30))
+        table = pq.read_table(io.BytesIO(b"".join(chunks)))
+        assert table.num_rows == len(processed)
+        assert pq.ParquetFile(io.BytesIO(b"".join(chunks))).num_row_groups == 4
+        loaded = table.to_pandas()
+        pd.testing.assert_frame_equal(loaded, with_aligned_ref(processed), check_dtype=False)
+        assert loaded["entropy"].dtype == "float32"
+
+    def test_arrow_file_reads_back(self, processed):
+        data = b"".join(iter_arrow_chunks(processed, rows=30))
+        reader = pa.ipc.open_file(data)
+        assert reader.num_record_batches == 4
+        loaded = pd.read_feather(io.BytesIO(data))
+        pd.testing.assert_frame_equal(loaded, with_aligned_ref(processed), check_dtype=False)
+
+
+def test_aiter_in_thread_keeps_order():
+    async def collect():
+        return [chunk async for chunk in aiter_in_thread(iter(range(5)))]
+
+    assert asyncio.run(collect()) == list(range(5))
@@ -0,0 +1,117 @@
+"""Tests for the shared warm image-export renderer.
+
+kaleido needs a Chrome install, so these drive ``ImageRenderer`` through its
+``open_browser`` hook with a stand-in that has kaleido's async interface.
+"""
+
+import asyncio
+import threading
+import time
+
+import plotly.graph_objects as go
+import pytest
+
+from image_export import ExportQueueFull, ImageRenderer
+
+
+class FakeBrowser:
+    """Async context manager with kaleido's ``calc_fig``; returns the title as bytes."""
+
+    def __init__(self, release: threading.Event | None = None) -> None:
+        self.opened = 0
+        self.closed = False
+        self.rendered: list[dict] = []
+        self.release = release
+
+    def __call__(self, concurrency: int, timeout: float) -> "FakeBrowser":
+        return self
+
+    async def __aenter__(self) -> "FakeBrowser":
+        self.opened += 1
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self.closed = True
+
+    async def calc_fig(self, fig: dict, opts: dict) -> bytes:
+        if self.release is not None:
+            await asyncio.to_thread(self.release.wait)
+        self.rendered.append(opts)
+        return fig["layout"]["title"]["text"].encode()
+
+
+def _fig(title: str) -> go.Figure:
+    return go.Figure(layout=dict(title=title))
+
+
+@pytest.fixture
+def browser():
+    return FakeBrowser()
+
+
+@pytest.fixture
+def renderer(browser):
+    renderer = ImageRenderer(concurrency=2, max_pending=4, timeout=5, open_browser=browser)
+    yield renderer
+    renderer.close()
+
+
+class TestImageRenderer:
+    def test_started_lazily_once(self, renderer, browser):
+        assert not renderer.running and browser.opened == 0
+        assert renderer.render(_fig("a")) == b"a"
+        assert renderer.render(_fig("b"), width=800) == b"b"
+        assert browser.opened == 1
+        assert browser.rendered[-1] == {"format": "png", "width": 800}
+        assert renderer.stats()["startup_ms"] is not None
+
+    def test_batch_keeps_order(self, renderer):
+        titles = [f"series {i}" for i in range(4)]
+        images = renderer.render_many([_fig(t) for t in titles])
+        assert images == [t.encode() for t in titles]
+        stats = renderer.stats()
+        assert stats["renders"] == 1 and stats["figures"] == 4
+
+    def test_queue_is_bounded(self):
+        release = threading.Event()
+        renderer = ImageRenderer(max_pending=2, timeout=5, open_browser=FakeBrowser(release))
+        worker = threading.Thread(target=renderer.render_many, args=([_fig("a"), _fig("b")],))
+        worker.start()
+        try:
+            while renderer.stats()["pending"] < 2:
+                time.sleep(0.001)
+            with pytest.raises(ExportQueueFull):
+                renderer.render(_fig("c"))
+        finally:
+            release.set()
+            worker.join()
+        assert renderer.render(_fig("d")) == b"d"
+        stats = renderer.stats()
+        assert stats["rejected"] == 1 and stats["pending"] == 0
+        renderer.close()
+
+    def test_failed_start_is_retried(self, browser):
+        attempts = []
+
+        def open_browser(concurrency, timeout):
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise RuntimeError("Kaleido requires Google Chrome to be installed.")
+            return browser
+
+        renderer = ImageRenderer(timeout=5, open_browser=open_browser)
+        with pytest.raises(RuntimeError):
+            renderer.render(_fig("a"))
+        assert renderer.render(_fig("b")) == b"b"
+        assert renderer.stats()["errors"] == 1
+        renderer.close()
+
+    def test_latency_percentiles_and_close(self, renderer, browser):
+        assert renderer.stats()["latency_ms"] == {"count": 0}
+        for i in range(5):
+            renderer.render(_fig(str(i)))
+        latency = renderer.stats()["latency_ms"]
+        assert latency["count"] == 5
+        assert 0 <= latency["p50"] <= latency["p90"] <= latency["p99"] <= latency["max"]
+        renderer.close()
+        assert browser.closed and not renderer.running
@@ -0,0 +1,77 @@
+"""Tests for the batched multi-sample comparison."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import make_per_base_table
+from multi_sample import sample_metrics, sample_summary, stack_samples
+from plotly_plots import multi_sample_position_plot
+from process_data import aggregation_columns, process_full_mean_values, process_per_base_file
+
+
+@pytest.fixture
+def frames(variant_region_per_base_df):
+    shorter = make_per_base_table(80, seed=1, variant_region=(10, 30))
+    return [variant_region_per_base_df, shorter, make_per_base_table(100, seed=2)]
+
+
+def _sample_frame(stack, metrics, sample):
+    values = pd.DataFrame(metrics[sample], index=stack.pos, columns=aggregation_columns)
+    return values[stack.present[sample]]
+
+
+class TestStackSamples:
+    def test_union_axis_and_presence(self, frames):
+        stack = stack_samples(frames, ["a", "b", "c"])
+        np.testing.assert_array_equal(stack.pos, np.arange(1, 101))
+        assert stack.counts.shape == (3, 100, 7)
+        assert stack.present.sum(axis=1).tolist() == [100, 80, 100]
+        assert stack.sequence_lengths.tolist() == [100, 80, 100]
+
+    def test_rejects_mismatched_or_empty_input(self, frames):
+        with pytest.raises(ValueError):
+            stack_samples(frames, ["a"])
+        with pytest.raises(ValueError, match="empty.tsv"):
+            stack_samples([frames[0], frames[0].iloc[:0]], ["a", "empty.tsv"])
+
+
+class TestSampleMetrics:
+    @pytest.mark.parametrize("reverse_complement", [False, True])
+    @pytest.mark.parametrize("origin_shift", [0, 7])
+    def test_matches_per_sample_pipeline(self, frames, reverse_complement, origin_shift):
+        stack = stack_samples(frames, ["a", "b", "c"], reverse_complement, origin_shift)
+        metrics = sample_metrics(stack)
+        summary = sample_summary(stack, metrics)
+        for sample, frame in enumerate(frames):
+            processed = process_per_base_file(frame, reverse_complement, origin_shift)
+            expected = processed.set_index("pos")[aggregation_columns].sort_index()
+            np.testing.assert_allclose(
+                _sample_frame(stack, metrics, sample).to_numpy(np.float64),
+                expected.to_numpy(np.float64),
+                rtol=1e-5,
+                equal_nan=True,
+            )
+            means = process_full_mean_values(processed)[summary.columns]
+            np.testing.assert_allclose(
+                summary.iloc[sample].to_numpy(),
+                means.iloc[0].to_numpy(),
+                rtol=1e-5,
+                atol=1e-9,
+            )
+
+    def test_missing_positions_are_nan(self, frames):
+        stack = stack_samples(frames, ["a", "b", "c"])
+        metrics = sample_metrics(stack)
+        assert np.isnan(metrics[1, 80:]).all()
+        assert metrics.dtype == np.float32
+
+
+class TestMultiSamplePlot:
+    def test_one_trace_per_sample(self, frames):
+        stack = stack_samples(frames, ["a", "b", "c"])
+        fig = multi_sample_position_plot(stack, sample_metrics(stack), "entropy")
+        assert [trace.name for trace in fig.data] == ["a", "b", "c"]
+
+    def test_empty_state(self):
+        assert len(multi_sample_position_plot(None, None, "entropy").data) == 0
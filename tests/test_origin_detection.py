@@ -0,0 +1,57 @@
+import pytest
+
+from benchmarks.synthetic import make_per_base_table, make_reference
+from origin_detection import data_sequence, detect_origin
+from process_data import process_per_base_file
+from shared import reverse_complement_sequence
+
+
+def _rotated(sequence: str, shift: int) -> str:
+    return sequence[shift:] + sequence[:shift]
+
+
+class TestDetectOrigin:
+    @pytest.mark.parametrize("reverse", [False, True])
+    @pytest.mark.parametrize("rotation", [0, 1, 1234, 2999])
+    def test_processed_data_matches_reference(self, rotation, reverse):
+        reference = make_reference(3000, seed=rotation)
+        data_seq = reverse_complement_sequence(reference) if reverse else reference
+        data = make_per_base_table(3000, reference=_rotated(data_seq, rotation))
+
+        orientation = detect_origin(reference, "".join(data["ref"]))
+
+        assert orientation is not None
+        assert orientation.reverse_complement == reverse
+        processed = process_per_base_file(
+            data, orientation.reverse_complement, orientation.origin_shift
+        )
+        assert "".join(processed["ref"]) == reference
+
+    def test_tolerates_variants_and_indels(self):
+        reference = make_reference(5000, seed=7)
+        mutated = reference[:2000] + "GATTACA" + reference[2000:4000] + reference[4010:]
+        orientation = detect_origin(reference, _rotated(mutated, 300))
+        assert orientation is not None
+        # Within the indel offsets of the exact rotation; alignment absorbs the rest
+        assert abs(orientation.origin_shift - (len(mutated) - 300)) <= 10
+        assert not orientation.reverse_complement
+        assert orientation.support > 0.3
+
+    def test_unrelated_sequences(self):
+        assert detect_origin(make_reference(2000, seed=1), make_reference(2000, seed=2)) is None
+
+    def test_short_sequences(self):
+        assert detect_origin("ACGT", "ACGT") is None
+
+
+class TestDataSequence:
+    def test_orders_by_position(self):
+        reference = make_reference(50, seed=3)
+        data = make_per_base_table(50, reference=reference).sample(frac=1, random_state=0)
+        assert data_sequence(data) == reference
+
+    def test_categorical_and_missing_bases(self):
+        data = make_per_base_table(4, reference="ACGT")
+        data["ref"] = data["ref"].astype("category")
+        data.loc[1, "ref"] = None
+        assert data_sequence(data) == "ANGT"
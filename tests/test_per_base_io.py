@@ -5,7 +5,13 @@ from pathlib import Path
 import pandas as pd
 import pytest
 
-from per_base_io import read_per_base_table
+from per_base_io import (
+    _sniff_header_delimiter,
+    per_base_dtypes,
+    preflight_per_base_table,
+    preflight_rows,
+    read_per_base_table,
+)
 from validation import expected_columns
 
 
@@ -70,3 +76,109 @@ class TestReadPerBaseTable:
         df_out = read_per_base_table(csv_path)
         assert not df_out.empty
         assert set(expected_columns).issubset(set(df_out.columns))
+
+    def test_fast_path_applies_dtype_schema(self, tmp_path: Path) -> None:
+        df_in = pd.DataFrame({col: [1, 2] for col in expected_columns})
+        df_in["ref"] = ["A", "C"]
+        tsv_path = tmp_path / "sample.tsv"
+        df_in.to_csv(tsv_path, sep="\t", index=False)
+        df_out = read_per_base_table(tsv_path)
+        for col, dtype in per_base_dtypes.items():
+            assert str(df_out[col].dtype) == dtype, col
+
+    def test_leading_index_column_uses_fast_path(self, tmp_path: Path) -> None:
+        df_in = pd.DataFrame({col: [1, 2] for col in expected_columns})
+        df_in["ref"] = ["A", "C"]
+        csv_path = tmp_path / "sample.csv"
+        df_in.to_csv(csv_path, index=True)
+        df_out = read_per_base_table(csv_path)
+        assert df_out["pos"].tolist() == [1, 2]
+        assert str(df_out["pos"].dtype) == "int32"
+
+    def test_counts_beyond_int32_are_kept_exactly(self, tmp_path: Path) -> None:
+        df_in = pd.DataFrame({col: [1, 2] for col in expected_columns})
+        df_in["ref"] = ["A", "C"]
+        df_in["reads_all"] = [3_000_000_000, 5]
+        tsv_path = tmp_path / "deep.tsv"
+        df_in.to_csv(tsv_path, sep="\t", index=False)
+        df_out = read_per_base_table(tsv_path)
+        assert df_out["reads_all"].tolist() == [3_000_000_000, 5]
+        assert str(df_out["reads_all"].dtype) == "int64"
+        assert str(df_out["A"].dtype) == "int32"
+
+    def test_falls_back_when_counts_do_not_fit_schema(self, tmp_path: Path) -> None:
+        df_in = pd.DataFrame({col: [1, 2] for col in expected_columns})
+        df_in["ref"] = ["A", "C"]
+        df_in["A"] = [1.5, None]
+        csv_path = tmp_path / "sample.csv"
+        df_in.to_csv(csv_path, index=False)
+        df_out = read_per_base_table(csv_path)
+        assert len(df_out) == 2
+        assert df_out["A"].isna().iloc[1]
+
+
+class TestSniffHeaderDelimiter:
+    @pytest.mark.parametrize("sep", ["\t", ",", ";"])
+    def test_detects_delimiter(self, tmp_path: Path, sep: str) -> None:
+        path = tmp_path / "sample.txt"
+        path.write_text(sep.join(expected_columns) + "\n")
+        assert _sniff_header_delimiter(path) == sep
+
+    def test_unrecognised_header_returns_none(self, tmp_path: Path) -> None:
+        path = tmp_path / "reads.fastq"
+        path.write_text("@read1\nACGT\n+\nIIII\n")
+        assert _sniff_header_delimiter(path) is None
+
+
+class TestPreflightPerBaseTable:
+    @pytest.fixture
+    def table(self) -> pd.DataFrame:
+        df = pd.DataFrame({col: [1, 2, 3] for col in expected_columns})
+        df["pos"] = [1, 2, 3]
+        df["ref"] = ["A", "C", "G"]
+        return df
+
+    @pytest.mark.parametrize("sep", ["\t", ",", "|"])
+    def test_accepts_per_base_table(self, tmp_path: Path, table: pd.DataFrame, sep: str) -> None:
+        path = tmp_path / "sample.txt"
+        table.to_csv(path, sep=sep, index=False)
+        preflight_per_base_table(path)
+
+    @pytest.mark.parametrize(
+        "text, match",
+        [
+            ("@read1\nACGT\n+\nIIII\n", "upload.txt looks like a FASTQ file"),
+            (">ref\nACGT\n", "looks like a FASTA file"),
+            ("sample,ranges\ns1,1-10\n", "missing required columns: A, C, G, T"),
+            ("\t".join(expected_columns) + "\n", "has no data rows"),
+        ],
+    )
+    def test_rejects_other_files(self, tmp_path: Path, text: str, match: str) -> None:
+        path = tmp_path / "0.txt"
+        path.write_text(text)
+        with pytest.raises(ValueError, match=match):
+            preflight_per_base_table(path, "upload.txt")
+
+    def test_rejects_text_counts(self, tmp_path: Path, table: pd.DataFrame) -> None:
+        table["reads_all"] = ["many", "few", "some"]
+        path = tmp_path / "sample.tsv"
+        table.to_csv(path, sep="\t", index=False)
+        with pytest.raises(ValueError, match="non-integer values in: reads_all"):
+            preflight_per_base_table(path)
+
+    def test_rejects_unsorted_positions(self, tmp_path: Path, table: pd.DataFrame) -> None:
+        table["pos"] = [1, 3, 2]
+        path = tmp_path / "sample.tsv"
+        table.to_csv(path, sep="\t", index=False)
+        with pytest.raises(ValueError, match="out of order"):
+            preflight_per_base_table(path)
+
+    def test_reads_only_the_head(self, tmp_path: Path) -> None:
+        n = preflight_rows
+        table = pd.DataFrame({col: [1] * n for col in expected_columns})
+        table["pos"] = range(1, n + 1)
+        path = tmp_path / "sample.tsv"
+        table.to_csv(path, sep="\t", index=False)
+        with open(path, "a") as handle:
+            handle.write("\n".join(["not\ta\tvalid\trow"] * 200) + "\n")
+        preflight_per_base_table(path)
@@ -0,0 +1,91 @@
+"""Tests for the session-free QC pipeline."""
+
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from pipeline import (
+    PipelineCancelled,
+    RunControl,
+    check_per_base_table,
+    load_reference,
+    process_and_align,
+    read_validated_per_base_table,
+    run_qc,
+)
+from process_data import with_aligned_ref
+from shared import test_cols
+
+
+@pytest.fixture
+def per_base_path(tmp_path: Path, variant_region_per_base_df: pd.DataFrame) -> Path:
+    path = tmp_path / "sample.tsv"
+    variant_region_per_base_df.to_csv(path, sep="\t", index=False)
+    return path
+
+
+class TestRunQc:
+    def test_defaults_select_whole_sequence(self, per_base_path: Path) -> None:
+        result = run_qc(per_base_path)
+        assert result.processed["is_selected"].all()
+        assert (result.tests["Result"] == "Skip").all()
+
+    def test_selected_range_produces_tests(self, per_base_path: Path) -> None:
+        result = run_qc(per_base_path, selected_ranges=[(30, 60)])
+        assert list(result.tests.index) == test_cols
+        assert (result.tests["Result"] == "Pass").any()
+        assert {"selected", "unselected", "full"} <= set(result.means.index)
+
+    def test_reference_is_aligned(self, per_base_path: Path, tmp_path: Path) -> None:
+        fasta = tmp_path / "ref.fasta"
+        fasta.write_text(">ref\n" + "A" * 100 + "\n")
+        result = run_qc(per_base_path, reference=load_reference(fasta))
+        assert (with_aligned_ref(result.processed)["aligned_ref"] == "A").all()
+
+    def test_auto_orient_maps_data_onto_reference(
+        self, per_base_path: Path, tmp_path: Path
+    ) -> None:
+        parsed = read_validated_per_base_table(per_base_path)
+        data_seq = "".join(parsed["ref"])
+        reference = data_seq[40:] + data_seq[:40]
+        fasta = tmp_path / "ref.fasta"
+        fasta.write_text(">ref\n" + reference + "\n")
+        result = run_qc(per_base_path, reference=load_reference(fasta), auto_orient=True)
+        assert "".join(result.processed["ref"]) == reference
+        assert not result.processed["alignment_mismatch"].any()
+
+
+class TestProcessAndAlign:
+    def test_reports_final_stage(self, per_base_path: Path) -> None:
+        parsed = read_validated_per_base_table(per_base_path)
+        control = RunControl()
+        data = process_and_align(parsed, "A" * 100, False, 0, control)
+        assert control.stage == "Done"
+        assert "alignment_mismatch" in data.columns
+
+    def test_cancelled_run_stops_before_next_stage(self, per_base_path: Path) -> None:
+        parsed = read_validated_per_base_table(per_base_path)
+        control = RunControl()
+        control.cancel()
+        with pytest.raises(PipelineCancelled):
+            process_and_align(parsed, "A" * 100, False, 0, control)
+        assert control.stage == "Queued"
+
+
+class TestValidation:
+    def test_missing_columns_raise(self, tmp_path: Path) -> None:
+        path = tmp_path / "bad.csv"
+        pd.DataFrame({"pos": [1], "ref": ["A"]}).to_csv(path, index=False)
+        with pytest.raises(ValueError, match="bad.csv is missing required columns: A, C"):
+            read_validated_per_base_table(path)
+
+    def test_errors_name_the_upload(self) -> None:
+        with pytest.raises(ValueError, match="upload.tsv is missing required columns"):
+            check_per_base_table(pd.DataFrame({"pos": [1]}), "upload.tsv")
+
+    def test_unparseable_reference_raises(self, tmp_path: Path) -> None:
+        path = tmp_path / "ref.txt"
+        path.write_text("not a reference")
+        with pytest.raises(ValueError):
+            load_reference(path)
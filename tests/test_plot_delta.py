@@ -0,0 +1,125 @@
+"""Tests for delta updates of the live position-plot widget."""
+
+import json
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import pytest
+from plotly.utils import PlotlyJSONEncoder
+
+from plot_delta import layout_list_delta, sync_overlays, sync_traces
+from plot_lod import PositionLOD
+from plotly_plots import base_position_vs_value_plot_plotly, position_plot_overlays
+
+N_POSITIONS = 20_000
+REGIONS = [{"start": 500 * i, "end": 500 * i + 200, "label": f"CDS{i}"} for i in range(20)]
+
+
+class MessageLog:
+    """Bytes the widget would send to the browser, per message type."""
+
+    def __init__(self, widget: go.FigureWidget) -> None:
+        self.messages: list[tuple[str, int]] = []
+        names = [name for name in widget.trait_names() if name.startswith("_py2js_")]
+        widget.observe(self._record, names=names)
+
+    def _record(self, change) -> None:
+        if change["new"]:
+            size = len(json.dumps(change["new"], cls=PlotlyJSONEncoder))
+            self.messages.append((change["name"], size))
+
+    def take(self) -> tuple[list[str], int]:
+        names = [name for name, _ in self.messages]
+        total = sum(size for _, size in self.messages)
+        self.messages.clear()
+        return names, total
+
+
+@pytest.fixture
+def per_base_df() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(
+        {
+            "pos": np.arange(1, N_POSITIONS + 1),
+            "entropy": rng.random(N_POSITIONS),
+            "variant_fraction": rng.random(N_POSITIONS),
+            "is_selected": np.ones(N_POSITIONS, dtype=bool),
+            "ref": np.array(list("ACGT"))[np.arange(N_POSITIONS) % 4],
+        }
+    )
+
+
+@pytest.fixture
+def means() -> pd.DataFrame:
+    return pd.DataFrame({"entropy_mean": [0.6, 0.4]}, index=["selected", "unselected"])
+
+
+def _render(per_base_df, means, fields, lod, normalize=False):
+    return base_position_vs_value_plot_plotly(
+        per_base_df, means, fields, [0, N_POSITIONS], 100, 2_000, "entropy", True,
+        REGIONS, normalize=normalize, lod=lod,
+    )
+
+
+class TestLayoutListDelta:
+    def test_changed_values_only(self):
+        old = [{"type": "line", "x0": 1, "line": {"width": 1}}]
+        new = [{"type": "line", "x0": 2, "line": {"width": 1}}]
+        assert layout_list_delta("shapes", old, new) == {"shapes[0].x0": 2}
+
+    def test_length_change_replaces_list(self):
+        new = [{"x0": 1}, {"x0": 2}]
+        assert layout_list_delta("shapes", [{"x0": 1}], new) == {"shapes": new}
+
+
+class TestBytesPerInteraction:
+    def test_slider_move_sends_only_selection_lines(self, per_base_df, means):
+        lod = PositionLOD(per_base_df)
+        widget = go.FigureWidget(_render(per_base_df, means, ["entropy"], lod))
+        log = MessageLog(widget)
+
+        shapes, annotations = position_plot_overlays(150, 2_500, REGIONS, means, "entropy", True)
+        sync_overlays(widget, shapes, annotations)
+        names, sent = log.take()
+        assert names == ["_py2js_relayout"]
+        assert sent < 200
+        assert widget.layout.shapes[0].x0 == 150 and widget.layout.shapes[1].x1 == 2_500
+
+        sync_overlays(widget, shapes, annotations)
+        assert log.take() == ([], 0)
+
+    def test_series_toggle_sends_one_trace(self, per_base_df, means):
+        lod = PositionLOD(per_base_df)
+        widget = go.FigureWidget(_render(per_base_df, means, ["entropy"], lod))
+        log = MessageLog(widget)
+        both = _render(per_base_df, means, ["entropy", "variant_fraction"], lod)
+        rerender = len(json.dumps(both, cls=PlotlyJSONEncoder))
+
+        assert sync_traces(widget, per_base_df, ["entropy", "variant_fraction"], False, lod)
+        names, added = log.take()
+        assert names[0] == "_py2js_addTraces"
+        assert added < 0.7 * rerender
+        assert [t.meta for t in widget.data] == ["entropy", "variant_fraction"]
+
+        assert sync_traces(widget, per_base_df, ["variant_fraction"], False, lod)
+        names, removed = log.take()
+        assert names[0] == "_py2js_deleteTraces"
+        assert removed < 500
+        assert widget.layout.title.text == "Variant fraction by position"
+
+    def test_normalize_restyles_y_only(self, per_base_df, means):
+        lod = PositionLOD(per_base_df)
+        widget = go.FigureWidget(_render(per_base_df, means, ["entropy"], lod))
+        log = MessageLog(widget)
+        sync_traces(widget, per_base_df, ["entropy"], True, lod)
+
+        names, _ = log.take()
+        assert names == ["_py2js_update"]
+        expected = _render(per_base_df, means, ["entropy"], lod, normalize=True)
+        np.testing.assert_allclose(widget.data[0].y, expected.data[0].y)
+        assert widget.layout.yaxis.title.text == expected.layout.yaxis.title.text
+
+    def test_placeholder_needs_rerender(self, per_base_df, means):
+        widget = go.FigureWidget(_render(per_base_df, means, [], None))
+        assert not sync_traces(widget, per_base_df, ["entropy"], False)
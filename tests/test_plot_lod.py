@@ -0,0 +1,73 @@
+"""Tests for min/max level-of-detail decimation of the position plot."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from plot_lod import PositionLOD, relayout_x_range
+from plotly_plots import base_position_vs_value_plot_plotly
+
+
+def _frame(n: int, seed: int = 0, shuffle: bool = False) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({"pos": np.arange(1, n + 1), "entropy": rng.normal(size=n)})
+    df.loc[rng.choice(n, n // 50, replace=False), "entropy"] = np.nan
+    if shuffle:
+        df = df.sample(frac=1, random_state=seed).reset_index(drop=True)
+    return df
+
+
+class TestPositionLOD:
+    def test_small_range_returns_raw_rows(self):
+        df = _frame(1000)
+        rows = PositionLOD(df).rows("entropy", (100, 199), max_points=500)
+        np.testing.assert_array_equal(df["pos"].to_numpy()[rows], np.arange(100, 200))
+
+    @pytest.mark.parametrize("n", [10_000, 12_345])
+    def test_point_budget_respected(self, n):
+        rows = PositionLOD(_frame(n)).rows("entropy", max_points=400)
+        assert 200 <= len(rows) <= 400
+
+    @pytest.mark.parametrize("shuffle", [False, True])
+    def test_extremes_in_view_are_kept(self, shuffle):
+        df = _frame(50_000, shuffle=shuffle)
+        lod = PositionLOD(df)
+        view = (10_000.0, 30_000.0)
+        rows = lod.rows("entropy", view, max_points=300)
+
+        in_view = df["pos"].between(*view)
+        plotted = df.iloc[rows]
+        assert plotted["entropy"].max() == df.loc[in_view, "entropy"].max()
+        assert plotted["entropy"].min() == df.loc[in_view, "entropy"].min()
+        # Rows come back in position order, limited to bins touching the view.
+        assert plotted["pos"].is_monotonic_increasing
+        assert plotted["pos"].between(view[0] - 512, view[1] + 512).all()
+
+    def test_all_nan_series(self):
+        df = _frame(5000).assign(entropy=np.nan)
+        rows = PositionLOD(df).rows("entropy", max_points=100)
+        assert 0 < len(rows) <= 100
+
+    def test_plot_uses_decimated_rows(self):
+        df = _frame(20_000)
+        fig = base_position_vs_value_plot_plotly(
+            df, pd.DataFrame(), ["entropy"], [0, 20_000], 0, 20_000, "entropy", False,
+            lod=PositionLOD(df), max_points=1000,
+        )
+        trace = fig.data[0]
+        assert trace.meta == "entropy"
+        assert len(trace.x) <= 1000
+        assert len(trace.customdata) == len(trace.x)
+
+
+class TestRelayoutXRange:
+    def test_zoom(self):
+        data = {"xaxis.range[0]": 10.5, "xaxis.range[1]": 99}
+        assert relayout_x_range(data, None) == (10.5, 99.0)
+
+    def test_autorange_resets(self):
+        assert relayout_x_range({"xaxis.autorange": True}, (1.0, 2.0)) is None
+
+    def test_y_only_zoom_keeps_current(self):
+        data = {"yaxis.range[0]": 0, "yaxis.range[1]": 1}
+        assert relayout_x_range(data, (1.0, 2.0)) == (1.0, 2.0)
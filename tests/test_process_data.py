@@ -2,11 +2,15 @@ import numpy as np
 import pandas as pd
 
 from process_data import (
+    compact_dtypes,
+    compact_per_base_frame,
     compute_entropy,
     compute_effective_entropy,
     compute_max_non_ref_base,
     compute_n_variants,
     process_per_base_file,
+    merge_ranges,
+    ranges_mask,
     update_per_base_df,
     process_full_mean_values,
     update_mean_values_per_base,
@@ -105,7 +109,7 @@ class TestProcessPerBaseFile:
             "n_variants", "n_indels", "n_total", "variant_fraction",
             "indel_fraction", "entropy", "effective_entropy",
             "percent_of_max_entropy", "max_variant_base",
-            "is_selected", "aligned_ref", "alignment_mismatch",
+            "is_selected", "aligned_ref_code", "alignment_gap", "alignment_mismatch",
         ]
         for col in expected_cols:
             assert col in result.columns, f"Missing column: {col}"
@@ -149,6 +153,56 @@ class TestProcessPerBaseFile:
         assert rev_last["G"] == fwd_first["C"]
 
 
+class TestCompactMode:
+    def test_compact_dtypes_applied(self, minimal_per_base_df):
+        result = process_per_base_file(minimal_per_base_df, False, compact=True)
+        for col, dtype in compact_dtypes.items():
+            assert str(result[col].dtype) == dtype, col
+
+    def test_compact_values_match_default(self, minimal_per_base_df):
+        default = process_per_base_file(minimal_per_base_df, True, 2)
+        compact = process_per_base_file(minimal_per_base_df, True, 2, compact=True)
+        pd.testing.assert_frame_equal(
+            compact.astype(default.dtypes.to_dict()),
+            default,
+            check_exact=False,
+            rtol=1e-6,
+        )
+
+    def test_compact_frame_is_smaller(self, variant_region_per_base_df):
+        default = process_per_base_file(variant_region_per_base_df, False)
+        compact = process_per_base_file(variant_region_per_base_df, False, compact=True)
+        assert (
+            compact.memory_usage(deep=True).sum()
+            < default.memory_usage(deep=True).sum() / 2
+        )
+
+    def test_already_compact_frame_is_returned_unchanged(self, minimal_per_base_df):
+        compact = process_per_base_file(minimal_per_base_df, False, compact=True)
+        assert compact_per_base_frame(compact) is compact
+
+    def test_range_update_keeps_compact_dtypes(self, minimal_per_base_df):
+        compact = process_per_base_file(minimal_per_base_df, False, compact=True)
+        result = update_per_base_df(compact, [(2, 4)])
+        assert result["is_selected"].dtype == bool
+        assert result["variant_fraction_percent"].dtype == np.float32
+
+    def test_compact_aggregations_are_float64(self, variant_region_per_base_df):
+        default = update_per_base_df(
+            process_per_base_file(variant_region_per_base_df, False), [(2, 4)]
+        )
+        compact = update_per_base_df(
+            process_per_base_file(variant_region_per_base_df, False, compact=True), [(2, 4)]
+        )
+        means = update_mean_values_per_base(compact)
+        full = process_full_mean_values(compact)
+        assert (means.dtypes == np.float64).all()
+        assert (full.dtypes == np.float64).all()
+        pd.testing.assert_frame_equal(
+            means, update_mean_values_per_base(default), check_exact=False, rtol=1e-6
+        )
+
+
 class TestUpdatePerBaseDf:
     def test_does_not_mutate_input(self, minimal_per_base_df):
         processed = process_per_base_file(minimal_per_base_df, False)
@@ -185,6 +239,35 @@ class TestUpdatePerBaseDf:
         result = update_per_base_df(pd.DataFrame(), [(1, 5)])
         assert result.empty
 
+    def test_overlapping_ranges_count_once(self, minimal_per_base_df):
+        processed = process_per_base_file(minimal_per_base_df, False)
+        overlapping = update_per_base_df(processed, [(0, 4), (2, 6), (3, 5)])
+        union = update_per_base_df(processed, [(0, 6)])
+        pd.testing.assert_frame_equal(overlapping, union)
+
+
+class TestMergeRanges:
+    def test_merges_overlapping_and_touching(self):
+        merged = merge_ranges([(50, 60), (0, 10), (5, 20), (20, 30), (40, 40)])
+        np.testing.assert_array_equal(merged, [[0, 30], [50, 60]])
+
+    def test_nested(self):
+        np.testing.assert_array_equal(merge_ranges([(0, 100), (10, 20)]), [[0, 100]])
+
+    def test_empty(self):
+        assert merge_ranges([]).shape == (0, 2)
+
+
+class TestRangesMask:
+    def test_matches_per_range_comparisons(self):
+        rng = np.random.default_rng(1)
+        pos = rng.permutation(np.arange(1, 1001))
+        ranges = [(int(s), int(s + w)) for s, w in zip(rng.integers(-5, 1000, 50), rng.integers(0, 40, 50))]
+        expected = np.zeros(len(pos), dtype=bool)
+        for start, end in ranges:
+            expected |= (pos >= start + 1) & (pos <= end)
+        np.testing.assert_array_equal(ranges_mask(pos, merge_ranges(ranges)), expected)
+
 
 class TestProcessFullMeanValues:
     def test_empty_input(self):
@@ -1,7 +1,9 @@
+import numpy as np
 import pandas as pd
 import pytest
 
-from process_reference import align_ref_to_variants
+from process_data import aligned_ref_labels, process_per_base_file, with_aligned_ref
+from process_reference import aligned_reference_arrays, align_ref_to_variants
 
 
 class TestAlignRefToVariants:
@@ -11,12 +13,12 @@ class TestAlignRefToVariants:
 
     def test_none_reference_returns_unchanged(self, minimal_per_base_df):
         result = align_ref_to_variants(minimal_per_base_df, None)
-        assert "aligned_ref" not in result.columns
+        assert "aligned_ref_code" not in result.columns
 
     def test_matching_reference_produces_columns(self, minimal_per_base_df):
         ref_seq = "".join(minimal_per_base_df["ref"])
         result = align_ref_to_variants(minimal_per_base_df.copy(), ref_seq)
-        assert "aligned_ref" in result.columns
+        assert "aligned_ref_code" in result.columns
         assert "alignment_mismatch" in result.columns
         assert len(result) == len(minimal_per_base_df)
 
@@ -30,7 +32,7 @@ class TestAlignRefToVariants:
         ref_seq = "".join(minimal_per_base_df["ref"])
         rc_seq = "".join(complement.get(b, b) for b in reversed(ref_seq))
         result = align_ref_to_variants(minimal_per_base_df.copy(), rc_seq)
-        assert "aligned_ref" in result.columns
+        assert "aligned_ref_code" in result.columns
         assert "alignment_mismatch" in result.columns
         assert len(result) == len(minimal_per_base_df)
 
@@ -47,9 +49,38 @@ class TestAlignRefToVariants:
             "G": [5, 5, 5],
             "T": [1, 1, 1],
         })
-        df["aligned_ref"] = ["-"] * len(df)
+        df["aligned_ref_code"] = np.uint8(0)
+        df["alignment_gap"] = True
         df["alignment_mismatch"] = [0] * len(df)
         ref_seq = "ACGTACGTACGT"
         result = align_ref_to_variants(df.copy(), ref_seq)
-        assert result["aligned_ref"].tolist() == ["A", "C", "G"]
+        assert aligned_ref_labels(result).tolist() == ["A", "C", "G"]
         assert result["alignment_mismatch"].tolist() == [0, 0, 0]
+
+
+class TestAlignedReferenceArrays:
+    def test_mismatch_and_gaps_from_coordinates(self):
+        # ref:  ACGTTACGT-A
+        # data: AC-TAACGTGA
+        coordinates = np.array([[0, 2, 3, 9, 9, 10], [0, 2, 2, 8, 9, 10]])
+        codes, mismatch, gap = aligned_reference_arrays(coordinates, "ACGTTACGTA", "ACTAACGTGA")
+        assert bytes(codes).replace(b"\0", b"-") == b"ACTTACGT-A"
+        assert np.flatnonzero(mismatch).tolist() == [3]
+        assert np.flatnonzero(gap).tolist() == [8]
+
+    def test_labels_built_on_demand(self, minimal_per_base_df):
+        data = process_per_base_file(minimal_per_base_df, False)
+        ref_seq = list("".join(minimal_per_base_df["ref"]))
+        ref_seq[2] = "A" if ref_seq[2] != "A" else "C"
+        result = align_ref_to_variants(data, "".join(ref_seq))
+        assert "aligned_ref" not in result.columns
+        labels = with_aligned_ref(result)["aligned_ref"]
+        assert labels.iloc[2] == f"[{ref_seq[2]}]"
+        assert result["alignment_mismatch"].tolist()[2] == 1
+
+    def test_max_variant_base_uses_aligned_reference(self, minimal_per_base_df):
+        data = process_per_base_file(minimal_per_base_df, False)
+        bases = data[["A", "C", "G", "T"]].to_numpy()
+        result = align_ref_to_variants(data.copy(), "T" * len(data))
+        expected = np.delete(bases, 3, axis=1).max(axis=1)
+        assert result["max_variant_base"].tolist() == expected.tolist()
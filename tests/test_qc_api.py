@@ -0,0 +1,167 @@
+"""Tests for the headless QC API, driven as a plain ASGI app."""
+
+import asyncio
+import io
+import json
+import threading
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+from starlette.routing import Router
+
+import qc_api
+from qc_api import QCPoolFull, QCWorkerPool, qc_options
+from shared import test_cols
+
+
+def multipart(fields: dict[str, str], files: dict[str, tuple[str, bytes]]) -> tuple[bytes, str]:
+    """(body, content type) of a multipart/form-data request."""
+    boundary = "dimple-test-boundary"
+    parts = []
+    for name, value in fields.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+        )
+    for name, (filename, content) in files.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; '
+            f'filename="{filename}"\r\nContent-Type: application/octet-stream\r\n\r\n'.encode()
+            + content
+            + b"\r\n"
+        )
+    parts.append(f"--{boundary}--\r\n".encode())
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+def post(query: str = "", fields=None, files=None) -> tuple[int, dict[str, str], bytes]:
+    """POST to /api/qc; returns (status, headers, body)."""
+    body, content_type = multipart(fields or {}, files or {})
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/api/qc",
+        "raw_path": b"/api/qc",
+        "root_path": "",
+        "scheme": "http",
+        "query_string": query.encode(),
+        "headers": [
+            (b"content-type", content_type.encode()),
+            (b"content-length", str(len(body)).encode()),
+        ],
+        "server": ("testserver", 80),
+        "client": ("testclient", 50000),
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    sent = []
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await asyncio.Event().wait()  # the client stays connected
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(Router(routes=qc_api.routes)(scope, receive, send))
+    start = sent[0]
+    headers = {key.decode(): value.decode() for key, value in start["headers"]}
+    return start["status"], headers, b"".join(m.get("body", b"") for m in sent[1:])
+
+
+@pytest.fixture
+def per_base_file(variant_region_per_base_df: pd.DataFrame) -> tuple[str, bytes]:
+    return "sample.tsv", variant_region_per_base_df.to_csv(sep="\t", index=False).encode()
+
+
+class TestQcEndpoint:
+    def test_json_has_means_tests_and_processed(self, per_base_file) -> None:
+        status, headers, body = post(files={"per_base": per_base_file}, fields={"ranges": "30-60"})
+        assert status == 200
+        assert headers["content-type"] == "application/json"
+        result = json.loads(body)
+        assert set(result["means"]) == {"selected", "unselected", "full"}
+        assert list(result["tests"]) == test_cols
+        assert result["tests"]["variant_fraction"]["Result"] == "Pass"
+        processed = result["processed"]
+        assert len(processed["data"]) == 100
+        selected = [row[processed["columns"].index("is_selected")] for row in processed["data"]]
+        assert sum(selected) == 30
+
+    def test_query_parameters_and_csv(self, per_base_file) -> None:
+        status, headers, body = post(
+            "format=csv&table=tests&ranges=30-60", files={"per_base": per_base_file}
+        )
+        assert status == 200
+        assert 'filename="sample_tests.csv"' in headers["content-disposition"]
+        tests = pd.read_csv(io.BytesIO(body)).set_index("metric")
+        assert list(tests.index) == test_cols
+
+    def test_format_and_table_as_form_fields(self, per_base_file) -> None:
+        status, headers, body = post(
+            fields={"format": "csv", "table": "tests"}, files={"per_base": per_base_file}
+        )
+        assert status == 200
+        assert headers["content-type"].startswith("text/csv")
+        tests = pd.read_csv(io.BytesIO(body)).set_index("metric")
+        assert list(tests.index) == test_cols
+
+    def test_processed_arrow(self, per_base_file) -> None:
+        fasta = (">ref\n" + "A" * 100 + "\n").encode()
+        status, _, body = post(
+            "format=arrow",
+            files={"per_base": per_base_file, "reference": ("ref.fasta", fasta)},
+        )
+        assert status == 200
+        processed = pa.ipc.open_file(pa.BufferReader(body)).read_all().to_pandas()
+        assert len(processed) == 100
+        assert (processed["aligned_ref"] == "A").all()
+
+    def test_invalid_upload_is_unprocessable(self) -> None:
+        status, _, body = post(files={"per_base": ("reads.fastq", b"@read1\nACGT\n+\nIIII\n")})
+        assert status == 422
+        assert "reads.fastq looks like a FASTQ file" in json.loads(body)["error"]
+
+    @pytest.mark.parametrize(
+        "query, fields", [("format=xml", {}), ("", {"ranges": "1-x"}), ("table=all", {})]
+    )
+    def test_bad_parameters(self, per_base_file, query: str, fields: dict) -> None:
+        status, _, _ = post(query, fields=fields, files={"per_base": per_base_file})
+        assert status == 400
+
+    def test_missing_upload(self) -> None:
+        status, _, _ = post(fields={"ranges": "1-10"})
+        assert status == 400
+
+
+class TestQCWorkerPool:
+    def test_rejects_beyond_max_pending(self) -> None:
+        pool = QCWorkerPool(workers=1, max_pending=2)
+        release = threading.Event()
+
+        async def scenario():
+            first = asyncio.ensure_future(pool.run(release.wait))
+            second = asyncio.ensure_future(pool.run(lambda: "queued"))
+            await asyncio.sleep(0.05)
+            with pytest.raises(QCPoolFull):
+                await pool.run(lambda: "rejected")
+            release.set()
+            return await first, await second
+
+        assert asyncio.run(scenario()) == (True, "queued")
+        stats = pool.stats()
+        assert (stats["runs"], stats["rejected"], stats["pending"]) == (2, 1, 0)
+        assert stats["latency_ms"]["count"] == 2
+
+
+def test_qc_options() -> None:
+    options = qc_options(
+        {"ranges": "1-10;20-30", "features": "CDS; ori", "reverse_complement": "true"}
+    )
+    assert options == {
+        "ranges": [(1, 10), (20, 30)],
+        "features": ["CDS", "ori"],
+        "reverse_complement": True,
+        "origin_shift": 0,
+        "auto_orient": False,
+    }
@@ -0,0 +1,223 @@
+"""Tests for the asynchronous QC jobs: store, worker, cache seeding and routes."""
+
+import asyncio
+import json
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from starlette.routing import Router
+
+import qc_jobs
+from pipeline import process_and_align, read_validated_per_base_table, resolve_orientation
+from qc_jobs import JobQueue, JobStore, load_job_frames, run_job
+from result_cache import file_digest, frame_cache, processed_cache_key
+from shared import test_cols
+from tests.test_qc_api import multipart
+
+
+def request(method: str, path: str, query: str = "", fields=None, files=None):
+    """Send one request to the job routes; returns (status, headers, body)."""
+    body, content_type = multipart(fields or {}, files or {}) if method == "POST" else (b"", "")
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "scheme": "http",
+        "query_string": query.encode(),
+        "headers": [
+            (b"content-type", content_type.encode()),
+            (b"content-length", str(len(body)).encode()),
+        ],
+        "server": ("testserver", 80),
+        "client": ("testclient", 50000),
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    sent = []
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await asyncio.Event().wait()  # the client stays connected
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(Router(routes=qc_jobs.routes)(scope, receive, send))
+    start = sent[0]
+    headers = {key.decode(): value.decode() for key, value in start["headers"]}
+    return start["status"], headers, b"".join(m.get("body", b"") for m in sent[1:])
+
+
+class InlineQueue(JobQueue):
+    """Runs each job at once in this process, so tests need no worker pool."""
+
+    def submit(self, job_id: str) -> None:
+        run_job(str(self.store.root), job_id)
+
+
+@pytest.fixture
+def queue(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> JobQueue:
+    queue = InlineQueue(tmp_path / "jobs")
+    monkeypatch.setattr(qc_jobs, "job_queue", queue)
+    return queue
+
+
+@pytest.fixture
+def per_base_bytes(variant_region_per_base_df: pd.DataFrame) -> bytes:
+    return variant_region_per_base_df.to_csv(sep="\t", index=False).encode()
+
+
+reference_fasta = (">ref\n" + "A" * 100 + "\n").encode()
+options = {
+    "ranges": [(30, 60)],
+    "features": [],
+    "reverse_complement": False,
+    "origin_shift": 0,
+    "auto_orient": False,
+}
+
+
+def stored_job(store: JobStore, per_base_bytes: bytes, **overrides) -> str:
+    job_id = store.new_id()
+    input_dir = store.job_dir(job_id) / "input"
+    (input_dir / "reference").mkdir(parents=True)
+    (input_dir / "sample.tsv").write_bytes(per_base_bytes)
+    (input_dir / "reference" / "ref.fasta").write_bytes(reference_fasta)
+    store.create(job_id, "sample.tsv", {**options, **overrides})
+    return job_id
+
+
+class TestJobStore:
+    def test_create_get_update(self, tmp_path: Path) -> None:
+        store = JobStore(tmp_path, server_token="boot")
+        job_id = store.new_id()
+        store.create(job_id, "sample.tsv", options)
+        job = store.get(job_id)
+        assert (job["status"], job["stage"], job["options"]["ranges"]) == (
+            "queued",
+            "Queued",
+            [[30, 60]],
+        )
+        store.update(job_id, status="done", settings={"origin_shift": 3})
+        assert store.get(job_id)["settings"] == {"origin_shift": 3}
+
+    @pytest.mark.parametrize("job_id", ["nope", "../jobs", "0" * 31])
+    def test_malformed_ids_are_unknown(self, tmp_path: Path, job_id: str) -> None:
+        assert JobStore(tmp_path).get(job_id) is None
+
+    def test_recover_fails_jobs_of_earlier_servers(self, tmp_path: Path) -> None:
+        orphan = JobStore(tmp_path, server_token="earlier-boot").new_id()
+        JobStore(tmp_path, server_token="earlier-boot").create(orphan, "a.tsv", options)
+        store = JobStore(tmp_path, server_token="this-boot")
+        live = store.new_id()
+        store.create(live, "b.tsv", options)
+        assert store.recover() == 1
+        assert store.get(orphan)["status"] == "error"
+        assert store.get(live)["status"] == "queued"
+
+
+class TestRunJob:
+    def test_stores_results_and_cache_keys(self, tmp_path: Path, per_base_bytes: bytes) -> None:
+        store = JobStore(tmp_path, server_token="boot")
+        job_id = stored_job(store, per_base_bytes)
+        run_job(str(tmp_path), job_id)
+
+        job = store.get(job_id)
+        assert (job["status"], job["stage"], job["error"]) == ("done", "Done", None)
+        assert job["settings"] == {"reverse_complement": False, "origin_shift": 0, "n_positions": 100}
+        result = store.load_result(job_id)
+        assert list(result.tests.index) == test_cols
+        assert int(result.processed["is_selected"].sum()) == 30
+
+        # The keys are those the app computes for the same inputs and settings
+        per_base_path = store.job_dir(job_id) / "input" / "sample.tsv"
+        digest = file_digest(per_base_path)
+        assert job["parsed_key"] == ["parsed", digest]
+        ref_seq, rc, shift = resolve_orientation(
+            read_validated_per_base_table(per_base_path), {"sequence": "A" * 100}, False, 0, False
+        )
+        assert tuple(job["processed_key"]) == processed_cache_key(digest, ref_seq, rc, shift)
+
+    def test_records_errors(self, tmp_path: Path) -> None:
+        store = JobStore(tmp_path, server_token="boot")
+        job_id = stored_job(store, b"pos\tref\n1\tA\n")
+        run_job(str(tmp_path), job_id)
+        job = store.get(job_id)
+        assert job["status"] == "error"
+        assert "missing required columns" in job["error"]
+
+
+class TestLoadJobFrames:
+    def test_seeds_the_frame_cache(self, queue: JobQueue, per_base_bytes: bytes) -> None:
+        job_id = stored_job(queue.store, per_base_bytes)
+        queue.submit(job_id)
+        frame_cache.clear()
+        job = load_job_frames(job_id, queue)
+        assert job["per_base_path"].name == "sample.tsv"
+        assert job["reference_path"].name == "ref.fasta"
+        parsed = read_validated_per_base_table(job["per_base_path"])
+        expected = process_and_align(parsed, "A" * 100, False, 0)
+        pd.testing.assert_frame_equal(frame_cache.get(tuple(job["processed_key"])), expected)
+        assert frame_cache.get(tuple(job["parsed_key"])) is not None
+
+    def test_unfinished_and_unknown_jobs(self, queue: JobQueue, per_base_bytes: bytes) -> None:
+        job_id = stored_job(queue.store, per_base_bytes)
+        with pytest.raises(ValueError, match="not finished"):
+            load_job_frames(job_id, queue)
+        with pytest.raises(ValueError, match="no QC job"):
+            load_job_frames("0" * 32, queue)
+
+
+class TestJobRoutes:
+    def test_submit_poll_and_fetch(self, queue: JobQueue, per_base_bytes: bytes) -> None:
+        status, _, body = request(
+            "POST",
+            "/api/jobs",
+            fields={"ranges": "30-60"},
+            files={"per_base": ("sample.tsv", per_base_bytes)},
+        )
+        assert status == 202
+        job_id = json.loads(body)["id"]
+
+        status, _, body = request("GET", f"/api/jobs/{job_id}")
+        assert status == 200
+        record = json.loads(body)
+        assert (record["status"], record["options"]["ranges"]) == ("done", [[30, 60]])
+
+        status, _, body = request("GET", f"/api/jobs/{job_id}/result")
+        assert status == 200
+        assert json.loads(body)["tests"]["variant_fraction"]["Result"] == "Pass"
+
+        status, headers, _ = request(
+            "GET", f"/api/jobs/{job_id}/result", "format=csv&table=tests"
+        )
+        assert status == 200
+        assert 'filename="sample_tests.csv"' in headers["content-disposition"]
+
+    def test_invalid_upload_is_rejected_before_queueing(self, queue: JobQueue) -> None:
+        status, _, body = request(
+            "POST", "/api/jobs", files={"per_base": ("reads.fastq", b"@read1\nACGT\n+\nIIII\n")}
+        )
+        assert status == 400
+        assert "FASTQ" in json.loads(body)["error"]
+        assert not [path for path in queue.store.root.iterdir() if path.is_dir()]
+
+    def test_unknown_and_unfinished_jobs(self, queue: JobQueue, per_base_bytes: bytes) -> None:
+        assert request("GET", f"/api/jobs/{'0' * 32}")[0] == 404
+        job_id = stored_job(queue.store, per_base_bytes)
+        status, _, body = request("GET", f"/api/jobs/{job_id}/result")
+        assert status == 409
+        assert "queued" in json.loads(body)["error"]
+
+
+def test_process_pool_runs_jobs(tmp_path: Path, per_base_bytes: bytes) -> None:
+    queue = JobQueue(tmp_path)
+    job_id = stored_job(queue.store, per_base_bytes)
+    try:
+        queue.submit(job_id).result(timeout=120)
+    finally:
+        queue.shutdown()
+    assert queue.get(job_id)["status"] == "done"
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import make_per_base_table
+from process_data import process_per_base_file, update_mean_values_per_base, update_per_base_df
+from range_stats import RangeStatsIndex
+
+
+@pytest.fixture(scope="module")
+def processed() -> pd.DataFrame:
+    data = make_per_base_table(3000, seed=3, variant_region=(900, 1500))
+    # Zero-read positions give NaN ratios, which must be skipped like pandas does
+    data.loc[[10, 11, 2000], ["reads_all", "A", "C", "G", "T"]] = 0
+    return process_per_base_file(data, False, compact=True)
+
+
+def _expected(df: pd.DataFrame, ranges: list[tuple[int, int]]) -> pd.DataFrame:
+    return update_mean_values_per_base(update_per_base_df(df, ranges))
+
+
+class TestRangeStatsIndex:
+    @pytest.mark.parametrize("block_size", [1, 7, 256])
+    @pytest.mark.parametrize(
+        "ranges",
+        [
+            [(0, 3000)],
+            [(899, 1500)],
+            [(0, 1)],
+            [(100, 400), (300, 900), (2500, 2600)],
+            [(5000, 6000)],
+        ],
+    )
+    def test_matches_groupby(self, processed, block_size, ranges):
+        index = RangeStatsIndex(processed, block_size=block_size)
+        pd.testing.assert_frame_equal(
+            index.means(ranges), _expected(processed, ranges), check_exact=False, check_dtype=False, rtol=1e-6
+        )
+
+    @pytest.mark.parametrize("block_size", [7, 256])
+    def test_many_overlapping_ranges(self, processed, block_size):
+        rng = np.random.default_rng(0)
+        starts = rng.integers(0, 2900, 400)
+        ranges = [(int(s), int(s + w)) for s, w in zip(starts, rng.integers(1, 60, 400))]
+        index = RangeStatsIndex(processed, block_size=block_size)
+        pd.testing.assert_frame_equal(
+            index.means(ranges),
+            _expected(processed, ranges),
+            check_exact=False,
+            check_dtype=False,
+            rtol=1e-6,
+        )
+
+    def test_unsorted_positions(self, processed):
+        shuffled = processed.sample(frac=1, random_state=0)
+        ranges = [(1000, 1200)]
+        pd.testing.assert_frame_equal(
+            RangeStatsIndex(shuffled, block_size=16).means(ranges),
+            _expected(processed, ranges),
+            check_exact=False,
+            check_dtype=False,
+            rtol=1e-6,
+        )
+
+    def test_empty_selection_is_nan(self, processed):
+        means = RangeStatsIndex(processed).means([(5000, 6000)])
+        assert means.loc["selected"].isna().all()
+        assert not np.isnan(means.at["unselected", "entropy_mean"])
@@ -0,0 +1,86 @@
+"""Tests for the content-addressed frame cache."""
+
+from pathlib import Path
+
+import pandas as pd
+
+from process_data import process_per_base_file
+from result_cache import (
+    FrameCache,
+    file_digest,
+    processed_cache_key,
+    sequence_digest,
+)
+
+
+class TestDigests:
+    def test_file_digest_depends_only_on_content(self, tmp_path: Path) -> None:
+        a = tmp_path / "a.tsv"
+        b = tmp_path / "b.tsv"
+        a.write_text("pos\tref\n1\tA\n")
+        b.write_text("pos\tref\n1\tA\n")
+        assert file_digest(a) == file_digest(b)
+        b.write_text("pos\tref\n1\tC\n")
+        assert file_digest(a) != file_digest(b)
+
+    def test_sequence_digest_none(self) -> None:
+        assert sequence_digest(None) is None
+
+    def test_processed_key_distinguishes_settings(self) -> None:
+        keys = {
+            processed_cache_key("abc", None, False, 0),
+            processed_cache_key("abc", "ACGT", False, 0),
+            processed_cache_key("abc", None, True, 0),
+            processed_cache_key("abc", None, False, 5),
+        }
+        assert len(keys) == 4
+
+
+class TestFrameCache:
+    def test_miss_then_hit(self, minimal_per_base_df: pd.DataFrame) -> None:
+        cache = FrameCache(max_bytes=10**7)
+        assert cache.get("k") is None
+        cache.put("k", minimal_per_base_df)
+        pd.testing.assert_frame_equal(cache.get("k"), minimal_per_base_df)
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+    def test_get_or_compute_computes_once(self, minimal_per_base_df: pd.DataFrame) -> None:
+        cache = FrameCache(max_bytes=10**7)
+        calls = []
+
+        def compute() -> pd.DataFrame:
+            calls.append(1)
+            return process_per_base_file(minimal_per_base_df, False)
+
+        first = cache.get_or_compute("k", compute)
+        second = cache.get_or_compute("k", compute)
+        assert len(calls) == 1
+        pd.testing.assert_frame_equal(first, second)
+
+    def test_lru_eviction_respects_byte_budget(self, minimal_per_base_df: pd.DataFrame) -> None:
+        size = int(minimal_per_base_df.memory_usage(deep=True, index=True).sum())
+        cache = FrameCache(max_bytes=2 * size)
+        cache.put("a", minimal_per_base_df)
+        cache.put("b", minimal_per_base_df)
+        cache.get("a")  # "b" is now least recently used
+        cache.put("c", minimal_per_base_df)
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.get("c") is not None
+        stats = cache.stats()
+        assert stats["evictions"] == 1
+        assert stats["bytes"] <= stats["max_bytes"]
+
+    def test_oversized_and_empty_frames_not_stored(
+        self, minimal_per_base_df: pd.DataFrame
+    ) -> None:
+        cache = FrameCache(max_bytes=10)
+        cache.put("big", minimal_per_base_df)
+        cache.put("empty", pd.DataFrame())
+        assert cache.stats()["entries"] == 0
+
+    def test_zero_budget_disables_cache(self, minimal_per_base_df: pd.DataFrame) -> None:
+        cache = FrameCache(max_bytes=0)
+        cache.put("k", minimal_per_base_df)
+        assert cache.get("k") is None
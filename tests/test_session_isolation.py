@@ -13,6 +13,15 @@ These tests assert two complementary properties:
    them on user A's data does not affect what they return for user B, and
    they do not mutate their inputs in place.
 
+A few modules keep one deliberately shared object at module level: the frame
+cache, the metrics, the PNG renderer, the session registry and the API's
+worker pools. They are allowed because none of them lets one session reach
+another's data: either they hold no user data (only counters, timings, byte
+counts or executors), or they hold it only under keys a session cannot know
+without already having that data (see result_cache.py, and the random job ids
+of qc_jobs.py). Each such module says in one "Session isolation:" line what
+its shared object holds; keep that true when changing it.
+
 If these tests fail, the most likely cause is a recent change that
 re-introduced shared mutable state. See CLAUDE.md for the project's
 no-module-level-mutable-state rule.
@@ -29,18 +38,35 @@ import pytest
 from shiny import reactive
 
 from process_data import process_per_base_file
+from result_cache import FrameCache, processed_cache_key
 
 # Modules that participate in the per-session data pipeline. app.py is excluded
 # because in Shiny Express the entire file is re-executed per session, so its
 # module-scope reactive primitives are session-scoped by design.
 APP_MODULES = [
+    "anchored_alignment",
     "evaluate_data",
+    "exports",
+    "image_export",
+    "multi_sample",
+    "origin_detection",
     "per_base_io",
+    "pipeline",
+    "plot_delta",
+    "plot_lod",
     "plotly_plots",
     "process_data",
     "process_reference",
+    "qc_api",
+    "qc_jobs",
+    "range_stats",
+    "result_cache",
+    "session_memory",
     "shared",
+    "streaming",
+    "telemetry",
     "validation",
+    "violin_summary",
 ]
 
 
@@ -103,3 +129,48 @@ class TestPipelineIsPure:
         before = minimal_per_base_df.copy()
         _ = process_per_base_file(minimal_per_base_df, False)
         pd.testing.assert_frame_equal(before, minimal_per_base_df)
+
+
+class TestSharedFrameCacheIsIsolated:
+    """The process-wide frame cache is shared by design; it must still never let
+    one session's writes reach another session's view of a cached result."""
+
+    def test_mutating_a_hit_does_not_leak_to_other_sessions(
+        self, minimal_per_base_df: pd.DataFrame
+    ) -> None:
+        cache = FrameCache(max_bytes=10**7)
+        key = processed_cache_key("digest", None, False, 0)
+        original = process_per_base_file(minimal_per_base_df, False)
+        cache.put(key, original)
+
+        # User A gets a hit and edits it in every way pandas allows.
+        a = cache.get(key)
+        a["entropy"] = -1.0
+        a.loc[0, "pos"] = 999
+        a.drop(columns=["n_total"], inplace=True)
+
+        # User B's hit is unaffected.
+        b = cache.get(key)
+        pd.testing.assert_frame_equal(b, original)
+
+    def test_cached_arrays_are_read_only(self, minimal_per_base_df: pd.DataFrame) -> None:
+        cache = FrameCache(max_bytes=10**7)
+        cache.put("k", process_per_base_file(minimal_per_base_df, False))
+        values = cache.get("k")["entropy"].to_numpy()
+        with pytest.raises(ValueError):
+            values[0] = -1.0
+
+    def test_caller_writes_after_put_do_not_reach_cache(
+        self, minimal_per_base_df: pd.DataFrame
+    ) -> None:
+        cache = FrameCache(max_bytes=10**7)
+        frame = process_per_base_file(minimal_per_base_df, False)
+        expected = frame.copy()
+        cache.put("k", frame)
+        frame["entropy"] = -1.0
+        pd.testing.assert_frame_equal(cache.get("k"), expected)
+
+    def test_different_content_never_hits(self, minimal_per_base_df: pd.DataFrame) -> None:
+        cache = FrameCache(max_bytes=10**7)
+        cache.put(processed_cache_key("user-a", None, False, 0), minimal_per_base_df)
+        assert cache.get(processed_cache_key("user-b", None, False, 0)) is None
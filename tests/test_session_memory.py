@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+
+from session_memory import SessionRegistry, approx_nbytes, memory_limit, upload_rejection
+
+
+class TestApproxNbytes:
+    def test_shared_objects_are_counted_once(self):
+        array = np.zeros(1000)
+        assert approx_nbytes(array) == 8000
+        assert approx_nbytes((array, [array, {"a": array}])) == 8000
+
+    def test_frames_and_object_attributes(self):
+        df = pd.DataFrame({"pos": np.arange(100), "reads_all": np.ones(100)})
+
+        class Holder:
+            def __init__(self):
+                self.frame = df
+                self.index = np.arange(10, dtype=np.int64)
+
+        assert approx_nbytes(Holder()) == approx_nbytes(df) + 80
+        assert approx_nbytes(df) >= 1600
+
+
+class TestSessionRegistry:
+    def test_held_bytes_per_session_and_result(self):
+        registry = SessionRegistry(idle_seconds=0)
+        registry.open("a")
+        registry.open("b")
+        array = np.zeros(100)
+        assert registry.hold("a", "parsed", array) is array
+        registry.hold("a", "processed", np.zeros(200))
+        registry.hold("b", "parsed", array)
+        registry.hold("closed", "parsed", array)
+        stats = registry.stats()
+        assert stats["sessions"] == 2
+        assert stats["held_bytes"] == 800 + 1600 + 800
+        assert stats["held_bytes_by_result"] == {"parsed": 1600, "processed": 1600}
+        assert [s["held_bytes"] for s in stats["largest_sessions"]] == [2400, 800]
+        registry.close("a")
+        assert registry.stats()["held_bytes"] == 800
+
+    def test_idle_sessions_are_released_once(self):
+        registry = SessionRegistry(idle_seconds=1e-9)
+        registry.open("a")
+        registry.hold("a", "parsed", np.zeros(100))
+        assert registry.should_release("a")
+        registry.mark_released("a")
+        assert not registry.should_release("a")
+        stats = registry.stats()
+        assert stats["held_bytes"] == 0
+        assert stats["released_sessions"] == 1
+        assert stats["releases"] == 1
+        registry.touch("a")
+        assert registry.stats()["released_sessions"] == 0
+
+    def test_zero_idle_seconds_never_releases(self):
+        registry = SessionRegistry(idle_seconds=0)
+        registry.open("a")
+        assert not registry.should_release("a")
+
+
+class TestUploadRejection:
+    def test_uploads_near_the_limit_are_refused(self, monkeypatch):
+        monkeypatch.setattr("session_memory.memory_in_use", lambda: 500)
+        monkeypatch.setenv("DIMPLE_MEMORY_LIMIT_BYTES", "1000")
+        assert memory_limit() == 1000
+        assert upload_rejection(50) is None
+        assert "memory limit" in upload_rejection(100)
+
+    def test_no_limit_accepts_everything(self, monkeypatch):
+        monkeypatch.delenv("DIMPLE_MEMORY_LIMIT_BYTES", raising=False)
+        monkeypatch.setattr("session_memory.memory_limit", lambda: None)
+        assert upload_rejection(10**15) is None
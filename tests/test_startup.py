@@ -0,0 +1,79 @@
+"""Startup budgets: cold import of the app and per-session re-execution.
+
+Shiny Express re-executes app.py for every session, and the container's
+readiness probe waits on the cold import, so heavy dependencies are imported
+by the feature that first needs them (see ``deferred_modules``) rather than
+at module top.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+import time
+import warnings
+from pathlib import Path
+
+from shiny.express._run import run_express
+from shiny.express._stub_session import ExpressStubSession
+from shiny.session import session_context
+
+repo_root = Path(__file__).resolve().parent.parent
+app_file = repo_root / "app.py"
+
+# Seconds. Generous against a ~2 s cold start and ~0.15 s session setup, so
+# that only a regression (e.g. an eager scipy.stats import) trips them.
+cold_start_budget = 6.0
+session_setup_budget = 1.0
+
+# Imported lazily: scipy.stats (entropy) and scipy.special (t-tests) on the
+# first processing run, Biopython when a reference is uploaded, plotly.express
+# for the histogram and pyarrow.parquet for Parquet downloads.
+deferred_modules = ["scipy", "Bio", "plotly.express", "pyarrow.parquet"]
+
+_cold_start_script = """
+import json, sys, time, warnings
+from pathlib import Path
+warnings.simplefilter("ignore")
+start = time.perf_counter()
+from shiny.express import wrap_express_app
+wrap_express_app(Path("app.py"))
+print(json.dumps({
+    "seconds": time.perf_counter() - start,
+    "loaded": [m for m in %r if m in sys.modules],
+}))
+"""
+
+
+def _cold_start() -> dict:
+    env = {**os.environ, "PYTHONPATH": str(repo_root)}
+    result = subprocess.run(
+        [sys.executable, "-c", _cold_start_script % deferred_modules],
+        cwd=repo_root,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_cold_start_defers_heavy_imports_and_meets_budget():
+    result = _cold_start()
+    assert result["loaded"] == []
+    assert result["seconds"] < cold_start_budget
+
+
+def test_session_setup_meets_budget():
+    def run_session() -> float:
+        start = time.perf_counter()
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            with session_context(ExpressStubSession()):
+                run_express(app_file)
+        return time.perf_counter() - start
+
+    run_session()  # imports, as the first session after startup would
+    assert min(run_session() for _ in range(3)) < session_setup_budget
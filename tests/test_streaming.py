@@ -0,0 +1,103 @@
+"""Tests for chunked streaming processing."""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from per_base_io import read_per_base_table
+from process_data import (
+    aggregation_columns,
+    process_per_base_file,
+    update_mean_values_per_base,
+    update_per_base_df,
+)
+from streaming import read_processed_store, stream_process_per_base_file
+
+
+@pytest.fixture
+def per_base_path(tmp_path: Path, variant_region_per_base_df: pd.DataFrame) -> Path:
+    path = tmp_path / "sample.tsv"
+    variant_region_per_base_df.to_csv(path, sep="\t", index=False)
+    return path
+
+
+class TestStreamProcessPerBaseFile:
+    @pytest.mark.parametrize(
+        "reverse_complement, origin_shift", [(False, 0), (True, 0), (False, 17), (True, 17)]
+    )
+    def test_matches_in_memory_pipeline(
+        self,
+        per_base_path: Path,
+        tmp_path: Path,
+        reverse_complement: bool,
+        origin_shift: int,
+    ) -> None:
+        ranges = [(30, 60)]
+        store = tmp_path / "out.parquet"
+        means = stream_process_per_base_file(
+            per_base_path,
+            store,
+            reverse_complement=reverse_complement,
+            origin_shift=origin_shift,
+            selected_ranges=ranges,
+            chunksize=7,
+        )
+
+        expected = update_per_base_df(
+            process_per_base_file(
+                read_per_base_table(per_base_path),
+                reverse_complement,
+                origin_shift,
+                compact=True,
+            ),
+            ranges,
+        ).reset_index(drop=True)
+        streamed = read_processed_store(store)
+        pd.testing.assert_frame_equal(
+            streamed[expected.columns],
+            expected,
+            check_categorical=False,
+            check_dtype=False,
+        )
+
+        expected_means = update_mean_values_per_base(expected)
+        for col in aggregation_columns:
+            for stat in ("mean", "std"):
+                key = f"{col}_{stat}"
+                np.testing.assert_allclose(
+                    means[key].to_numpy(dtype=float),
+                    expected_means.loc[means.index, key].to_numpy(dtype=float),
+                    rtol=1e-5,
+                    atol=1e-9,
+                    err_msg=key,
+                )
+
+    def test_defaults_to_whole_sequence_selected(self, per_base_path: Path, tmp_path: Path) -> None:
+        means = stream_process_per_base_file(per_base_path, tmp_path / "out.parquet", chunksize=13)
+        assert means.loc["unselected"].isna().all()
+        assert means.at["selected", "n_total_mean"] == pytest.approx(
+            means.at["full", "n_total_mean"]
+        )
+
+    def test_column_subset(self, per_base_path: Path, tmp_path: Path) -> None:
+        store = tmp_path / "out.parquet"
+        stream_process_per_base_file(per_base_path, store, origin_shift=5, chunksize=10)
+        df = read_processed_store(store, columns=["entropy"])
+        assert list(df.columns) == ["pos", "entropy"]
+        assert df["pos"].is_monotonic_increasing
+
+    def test_rejects_non_per_base_file(self, tmp_path: Path) -> None:
+        path = tmp_path / "reads.fastq"
+        path.write_text("@read1\nACGT\n+\nIIII\n")
+        with pytest.raises(ValueError):
+            stream_process_per_base_file(path, tmp_path / "out.parquet")
+
+    def test_checks_integrity_across_chunks(
+        self, tmp_path: Path, variant_region_per_base_df: pd.DataFrame
+    ) -> None:
+        path = tmp_path / "gap.tsv"
+        variant_region_per_base_df.drop(index=50).to_csv(path, sep="\t", index=False)
+        with pytest.raises(ValueError, match="gap.tsv failed integrity checks"):
+            stream_process_per_base_file(path, tmp_path / "out.parquet", chunksize=50)
@@ -0,0 +1,67 @@
+import pytest
+
+from process_data import process_per_base_file
+from telemetry import PipelineMetrics, prometheus_text
+
+
+def _samples(text: str) -> dict[str, float]:
+    """Metric samples of a Prometheus text exposition, keyed by name and labels."""
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+
+class TestPipelineMetrics:
+    def test_histograms_are_cumulative(self):
+        metrics = PipelineMetrics()
+        for seconds, rows in [(0.003, 500), (0.2, 50_000), (120.0, 2 * 10**7)]:
+            metrics.observe("process_per_base_file", seconds, rows)
+        samples = _samples(metrics.prometheus_text())
+        bucket = 'dimple_stage_seconds_bucket{stage="process_per_base_file",le="%s"}'
+        assert samples[bucket % "0.005"] == 1
+        assert samples[bucket % "0.25"] == 2
+        assert samples[bucket % "60.0"] == 2
+        assert samples[bucket % "+Inf"] == 3
+        assert samples['dimple_stage_seconds_count{stage="process_per_base_file"}'] == 3
+        assert samples['dimple_stage_seconds_sum{stage="process_per_base_file"}'] == (
+            pytest.approx(120.203)
+        )
+        rows = 'dimple_stage_rows_bucket{stage="process_per_base_file",le="%s"}'
+        assert samples[rows % "1000.0"] == 1
+        assert samples[rows % "+Inf"] == 3
+
+    def test_bucket_bounds_are_inclusive(self):
+        metrics = PipelineMetrics()
+        metrics.observe("tests", 0.1)
+        samples = _samples(metrics.prometheus_text())
+        assert samples['dimple_stage_seconds_bucket{stage="tests",le="0.1"}'] == 1
+        assert samples['dimple_stage_seconds_bucket{stage="tests",le="0.05"}'] == 0
+
+    def test_timed_skips_failed_runs(self, minimal_per_base_df):
+        metrics = PipelineMetrics()
+        with metrics.timed("process_per_base_file", len(minimal_per_base_df)):
+            process_per_base_file(minimal_per_base_df, False)
+        with pytest.raises(KeyError):
+            with metrics.timed("process_per_base_file"):
+                raise KeyError("pos")
+        samples = _samples(metrics.prometheus_text())
+        assert samples['dimple_stage_seconds_count{stage="process_per_base_file"}'] == 1
+        assert samples['dimple_stage_rows_count{stage="process_per_base_file"}'] == 1
+
+    def test_cache_outcomes(self):
+        metrics = PipelineMetrics()
+        metrics.cache("parsed", hit=False)
+        metrics.cache("parsed", hit=True)
+        metrics.cache("parsed", hit=True)
+        samples = _samples(metrics.prometheus_text())
+        assert samples['dimple_cache_requests_total{cache="parsed",outcome="hit"}'] == 2
+        assert samples['dimple_cache_requests_total{cache="parsed",outcome="miss"}'] == 1
+
+    def test_exposition_includes_frame_cache(self):
+        text = prometheus_text()
+        assert "# TYPE dimple_stage_seconds histogram" in text
+        assert "dimple_frame_cache_bytes" in _samples(text)
+        assert text.endswith("\n")
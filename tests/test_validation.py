@@ -1,6 +1,6 @@
 import pandas as pd
 
-from validation import validate_per_base_file
+from validation import integrity_problems, validate_per_base_file
 
 
 class TestValidatePerBaseFile:
@@ -18,3 +18,24 @@ class TestValidatePerBaseFile:
     def test_extra_columns_ok(self, valid_df, patch_validation_ui):
         valid_df["extra_col"] = [42]
         assert validate_per_base_file(valid_df) is True
+
+
+class TestIntegrityProblems:
+    def test_consistent_table(self, minimal_per_base_df):
+        assert integrity_problems(minimal_per_base_df) == []
+
+    def test_negative_counts(self, minimal_per_base_df):
+        minimal_per_base_df.loc[2, ["deletions", "G"]] = -1
+        assert integrity_problems(minimal_per_base_df) == ["negative counts in deletions, G"]
+
+    def test_position_gaps(self, minimal_per_base_df):
+        minimal_per_base_df["pos"] = [1, 2, 3, 5, 6, 8]
+        assert integrity_problems(minimal_per_base_df) == [
+            "positions are not contiguous (2 breaks, first after pos 3)"
+        ]
+
+    def test_reads_all_below_base_calls(self, minimal_per_base_df):
+        minimal_per_base_df.loc[4, "reads_all"] = 150
+        assert integrity_problems(minimal_per_base_df) == [
+            "reads_all is less than A+C+G+T at 1 positions (first at pos 5)"
+        ]
@@ -0,0 +1,73 @@
+"""Tests for server-side violin summaries."""
+
+import numpy as np
+import pytest
+from scipy.stats import gaussian_kde
+
+from plotly_plots import binned_violin_plot_plotly
+from process_data import process_per_base_file, update_per_base_df
+from shared import column_colors_dict, column_names_dict
+from violin_summary import ViolinSummaries, binned_kde, max_outliers, summarize_values
+
+
+class TestBinnedKde:
+    def test_matches_exact_kde(self):
+        values = np.random.default_rng(0).normal(size=5000)
+        bandwidth = 0.3
+        grid, density = binned_kde(values, bandwidth, -4.0, 4.0, 256)
+        exact = gaussian_kde(values, bw_method=bandwidth / values.std(ddof=1))(grid)
+        np.testing.assert_allclose(density, exact, atol=2e-3)
+        assert np.trapezoid(density, grid) == pytest.approx(1.0, abs=1e-3)
+
+
+class TestSummarizeValues:
+    def test_box_statistics(self):
+        values = np.concatenate([np.arange(1.0, 101.0), [500.0, np.nan]])
+        summary = summarize_values(values)
+        q1, median, q3 = np.quantile(values[:-1], [0.25, 0.5, 0.75])
+        assert (summary.q1, summary.median, summary.q3) == (q1, median, q3)
+        assert summary.lower_fence == 1.0 and summary.upper_fence == 100.0
+        np.testing.assert_array_equal(summary.outliers, [500.0])
+        assert summary.n == 101
+        assert len(summary.grid) <= 256
+
+    def test_outliers_capped_keeping_extremes(self):
+        rng = np.random.default_rng(1)
+        values = np.concatenate([rng.normal(size=10_000), rng.uniform(50, 100, 1_000)])
+        summary = summarize_values(values)
+        assert len(summary.outliers) == max_outliers
+        assert summary.outliers[-1] == values.max()
+
+    def test_constant_and_empty(self):
+        summary = summarize_values(np.full(10, 3.0))
+        assert summary.median == 3.0 and np.isfinite(summary.density).all()
+        assert summarize_values(np.array([np.nan])) is None
+
+
+class TestViolinSummaries:
+    def test_selected_groups_and_scaled_columns(self, variant_region_per_base_df):
+        processed = process_per_base_file(variant_region_per_base_df, False)
+        ranges = [(29, 60)]
+        updated = update_per_base_df(processed, ranges)
+        summaries = ViolinSummaries(processed)
+        for series in ["entropy", "variant_fraction_percent"]:
+            selected, unselected = summaries.get(series, ranges)
+            values = updated[series].to_numpy(dtype=np.float64)
+            mask = updated["is_selected"].to_numpy()
+            assert selected.median == pytest.approx(np.median(values[mask]))
+            assert unselected.q3 == pytest.approx(np.quantile(values[~mask], 0.75))
+
+    def test_repeat_lookups_are_cached(self, variant_region_per_base_df):
+        summaries = ViolinSummaries(process_per_base_file(variant_region_per_base_df, False))
+        first = summaries.get("entropy", [(29, 60)])
+        summaries.get("variant_fraction", [(29, 60)])
+        assert summaries.get("entropy", [(29, 45), (40, 60)]) is first
+
+    def test_plot_sends_summary_only(self, variant_region_per_base_df):
+        processed = process_per_base_file(variant_region_per_base_df, False)
+        summaries = ViolinSummaries(processed).get("entropy", [(29, 60)])
+        fig = binned_violin_plot_plotly(
+            summaries, "entropy", column_names_dict, column_colors_dict
+        )
+        sent = sum(len(trace.x) for trace in fig.data if trace.x is not None)
+        assert sent <= 2 * (2 * 256 + max_outliers)
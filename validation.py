@@ -1,5 +1,6 @@
 # validation.py
 
+import numpy as np
 import pandas as pd
 from shiny.express import ui
 
@@ -19,6 +20,24 @@ expected_columns = [
     "T",
 ]
 
+# Columns holding read counts, which can never be negative
+count_columns = [
+    "reads_all",
+    "matches",
+    "mismatches",
+    "deletions",
+    "insertions",
+    "A",
+    "C",
+    "G",
+    "T",
+]
+
+
+def missing_columns(per_base_file: pd.DataFrame) -> set[str]:
+    """Return the required columns that ``per_base_file`` lacks (no UI side effects)."""
+    return set(expected_columns) - set(per_base_file.columns)
+
 
 def validate_per_base_file(per_base_file: pd.DataFrame) -> bool:
     """
@@ -34,7 +53,7 @@ def validate_per_base_file(per_base_file: pd.DataFrame) -> bool:
         return False
 
     # Check that the file has the required columns defined in shared.py
-    missing_cols = set(expected_columns) - set(per_base_file.columns)
+    missing_cols = missing_columns(per_base_file)
     if missing_cols:
         ui.notification_show(
             f"Input per-base file is missing required data. Check format. Missing columns: {', '.join(missing_cols)}",
@@ -42,3 +61,35 @@ def validate_per_base_file(per_base_file: pd.DataFrame) -> bool:
         return False
 
     return True
+
+
+def integrity_problems(per_base_file: pd.DataFrame) -> list[str]:
+    """Return what is inconsistent in a parsed per-base table (no UI side effects).
+
+    Checks, vectorized over the whole table, that counts are non-negative,
+    positions are contiguous, and ``reads_all`` is at least the number of
+    base calls (A+C+G+T); deletions and N calls may make it larger, never
+    smaller. Expects the required columns to be present.
+    """
+    problems = []
+    counts = per_base_file[count_columns].to_numpy(dtype=np.int64)
+    negative = (counts < 0).any(axis=0)
+    if negative.any():
+        columns = [col for col, bad in zip(count_columns, negative) if bad]
+        problems.append(f"negative counts in {', '.join(columns)}")
+
+    pos = per_base_file["pos"].to_numpy(dtype=np.int64)
+    gaps = np.flatnonzero(np.diff(pos) != 1)
+    if gaps.size:
+        problems.append(
+            f"positions are not contiguous ({gaps.size} breaks, first after pos {pos[gaps[0]]})"
+        )
+
+    base_calls = counts[:, count_columns.index("A") :].sum(axis=1)
+    short = np.flatnonzero(counts[:, count_columns.index("reads_all")] < base_calls)
+    if short.size:
+        problems.append(
+            f"reads_all is less than A+C+G+T at {short.size} positions "
+            f"(first at pos {pos[short[0]]})"
+        )
+    return problems
@@ -0,0 +1,178 @@
+"""Server-side violin summaries: binned density, box statistics and outliers.
+
+A Plotly violin ships every value to the browser, which then runs a KDE and
+box statistics over all positions on each refresh. Here the same summary is
+computed with NumPy and only a few hundred numbers are sent:
+
+* the density is a binned KDE: values are linearly binned onto a grid of at
+  most ``max_grid_points`` and convolved with a Gaussian kernel, using the
+  bandwidth (Silverman's rule) and soft span (two bandwidths past the data)
+  Plotly itself uses;
+* quartiles, fences and outliers follow Plotly's box definitions (linear
+  quartiles, whiskers at the furthest values within 1.5 IQR);
+* at most ``max_outliers`` outliers are kept, evenly spaced in sorted order
+  so that both extremes are always shown.
+
+``ViolinSummaries`` memoizes summaries per (series, selection) for one
+processed frame, so returning to a previously viewed series is a lookup.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from process_data import merge_ranges, ranges_mask
+from range_stats import column_source
+
+max_grid_points = 256
+max_outliers = 200
+default_cache_entries = 64
+
+
+@dataclass(frozen=True)
+class ViolinSummary:
+    """Everything needed to draw one half of a violin."""
+
+    grid: np.ndarray
+    density: np.ndarray
+    q1: float
+    median: float
+    q3: float
+    lower_fence: float
+    upper_fence: float
+    outliers: np.ndarray
+    n: int
+
+    def scaled(self, factor: float) -> ViolinSummary:
+        """Summary of the values multiplied by a positive ``factor``."""
+        return ViolinSummary(
+            grid=self.grid * factor,
+            density=self.density / factor,
+            q1=self.q1 * factor,
+            median=self.median * factor,
+            q3=self.q3 * factor,
+            lower_fence=self.lower_fence * factor,
+            upper_fence=self.upper_fence * factor,
+            outliers=self.outliers * factor,
+            n=self.n,
+        )
+
+
+def _bandwidth(values: np.ndarray, iqr: float) -> float:
+    """Silverman's rule as in Plotly, falling back when the spread is zero."""
+    std = float(values.std(ddof=1)) if len(values) > 1 else 0.0
+    spread = min(std, iqr / 1.349) or std
+    bandwidth = 1.059 * spread * len(values) ** -0.2
+    # Near-constant series leave only rounding noise in the spread
+    scale = float(np.abs(values).max()) or 1.0
+    if bandwidth > scale * 1e-9:
+        return bandwidth
+    return scale * 1e-3
+
+
+def binned_kde(
+    values: np.ndarray, bandwidth: float, low: float, high: float, n_points: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """Gaussian KDE of ``values`` on ``n_points`` evenly spaced points in [low, high].
+
+    Returns:
+        (grid, density), with the density normalized to integrate to 1.
+    """
+    grid = np.linspace(low, high, n_points)
+    delta = grid[1] - grid[0]
+    # Linear binning: each value splits its weight between its two neighbours.
+    position = (values - low) / delta
+    left = np.clip(np.floor(position).astype(np.intp), 0, n_points - 2)
+    right_weight = np.clip(position - left, 0.0, 1.0)
+    counts = np.bincount(left, weights=1.0 - right_weight, minlength=n_points)
+    counts += np.bincount(left + 1, weights=right_weight, minlength=n_points)
+
+    half_width = min(int(np.ceil(4 * bandwidth / delta)), n_points - 1)
+    offsets = np.arange(-half_width, half_width + 1) * delta
+    kernel = np.exp(-0.5 * (offsets / bandwidth) ** 2) / (bandwidth * np.sqrt(2 * np.pi))
+    density = np.convolve(counts, kernel)[half_width : half_width + n_points]
+    return grid, density / len(values)
+
+
+def summarize_values(values: np.ndarray) -> ViolinSummary | None:
+    """Violin summary of ``values`` (NaNs ignored); None when there are none."""
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return None
+    q1, median, q3 = np.quantile(values, [0.25, 0.5, 0.75])
+    iqr = q3 - q1
+    bandwidth = _bandwidth(values, iqr)
+
+    low, high = float(values.min()), float(values.max())
+    span_low, span_high = low - 2 * bandwidth, high + 2 * bandwidth
+    # About three grid points per bandwidth, as Plotly samples the density
+    n_points = np.ceil(3 * (span_high - span_low) / bandwidth) + 1
+    n_points = int(np.clip(n_points, 16, max_grid_points))
+    grid, density = binned_kde(values, bandwidth, span_low, span_high, n_points)
+
+    inside = (values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)
+    outliers = np.sort(values[~inside])
+    if len(outliers) > max_outliers:
+        keep = np.linspace(0, len(outliers) - 1, max_outliers).round().astype(np.intp)
+        outliers = outliers[keep]
+    within = values[inside]
+    return ViolinSummary(
+        grid=grid,
+        density=density,
+        q1=float(q1),
+        median=float(median),
+        q3=float(q3),
+        lower_fence=float(within.min()),
+        upper_fence=float(within.max()),
+        outliers=outliers,
+        n=len(values),
+    )
+
+
+class ViolinSummaries:
+    """Selected/unselected violin summaries for one processed per-base frame.
+
+    Args:
+        per_base_df: Processed per-base frame, before range selection.
+        max_entries: (series, selection) pairs to keep.
+    """
+
+    def __init__(
+        self, per_base_df: pd.DataFrame, max_entries: int = default_cache_entries
+    ) -> None:
+        self._frame = per_base_df
+        self._pos = per_base_df["pos"].to_numpy()
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, tuple] = OrderedDict()
+
+    def get(
+        self, series: str, selected_ranges: list[tuple[int, int]]
+    ) -> tuple[ViolinSummary | None, ViolinSummary | None]:
+        """(selected, unselected) summaries of ``series``.
+
+        Args:
+            series: Column of the frame ``update_per_base_df`` would return.
+            selected_ranges: (start, end) ranges as in ``update_per_base_df``.
+        """
+        merged = merge_ranges(selected_ranges)
+        key = (series, merged.tobytes())
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+        base, factor = column_source(series, merged)
+        values = self._frame[base].to_numpy()
+        mask = ranges_mask(self._pos, merged)
+        result = tuple(
+            None if summary is None else summary.scaled(factor)
+            for summary in map(summarize_values, (values[mask], values[~mask]))
+        )
+        self._entries[key] = result
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return result